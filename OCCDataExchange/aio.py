@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""asyncio API of OCCDataExchange (Python >= 3.5)
+
+Summary
+-------
+
+Imports and exports that do not block the event loop : each one runs in a child process
+(see OCCDataExchange.isolation) and the coroutine waits for its result. Shapes cross the process
+boundary serialized in the BREP format, (de)serialized in the default executor of the event loop.
+
+    shape = await aimport_file("part.stp")
+    await aexport(shape, "part.stl")
+
+A semaphore limits the number of conversions running at the same time. Cancelling the coroutine
+(e.g. asyncio.wait_for() timing out, or the client going away) kills the child process.
+
+"""
+
+from __future__ import print_function
+
+import asyncio
+import logging
+import multiprocessing
+import time
+
+from OCCDataExchange.isolation import IsolatedCall, read_brep_string
+
+logger = logging.getLogger(__name__)
+
+
+def _export_from_brep_string(brep_string, filename, format):
+    r"""Deserialize a shape from the BREP format and write it to a file (child process)"""
+    from OCCDataExchange.brep import shape_from_string
+    from OCCDataExchange.registry import write_shape
+
+    write_shape(shape_from_string(brep_string), filename, format)
+    return filename
+
+
+def _wake(future):
+    r"""Reader callback : mark future as done"""
+    if not future.done():
+        future.set_result(None)
+
+
+async def _wait(call):
+    r"""Wait for the outcome of a started IsolatedCall without blocking the event loop"""
+    loop = asyncio.get_event_loop()
+    while True:
+        outcome = call.poll()
+        if outcome is not None:
+            return outcome
+        timeout = None if call.deadline is None else max(0., call.deadline - time.time())
+        ready = loop.create_future()
+        fd = call.connection.fileno()
+        try:
+            loop.add_reader(fd, _wake, ready)
+        except NotImplementedError:  # e.g. the proactor event loop on Windows
+            await asyncio.sleep(0.05 if timeout is None else min(0.05, timeout))
+            continue
+        try:
+            await asyncio.wait([ready], timeout=timeout)
+        finally:
+            loop.remove_reader(fd)
+            ready.cancel()
+
+
+class AsyncConverter(object):
+    r"""Runs imports and exports in child processes for asyncio applications
+
+    Parameters
+    ----------
+    max_workers : int or None
+        maximum number of conversions running at the same time, None for the number of CPUs
+    timeout : float or None
+        wall clock limit of a conversion in seconds, None for no limit
+    max_memory : int or None
+        memory limit of a conversion in bytes, None for no limit
+    max_cpu : float or None
+        CPU time limit of a conversion in seconds, None for no limit
+
+    """
+
+    def __init__(self, max_workers=None, timeout=None, max_memory=None, max_cpu=None):
+        self.max_workers = max_workers or multiprocessing.cpu_count()
+        self.timeout = timeout
+        self.max_memory = max_memory
+        self.max_cpu = max_cpu
+        self._semaphores = dict()  # event loop -> semaphore
+
+    def _semaphore(self):
+        r"""Semaphore of the running event loop (asyncio primitives are bound to a loop)"""
+        loop = asyncio.get_event_loop()
+        if loop not in self._semaphores:
+            self._semaphores[loop] = asyncio.Semaphore(self.max_workers)
+        return self._semaphores[loop]
+
+    async def run(self, func, *args):
+        r"""Call func(*args) in a child process and return its value
+
+        Raises
+        ------
+        ValueError
+            if the call failed, timed out or ran out of memory or CPU time
+
+        """
+        async with self._semaphore():
+            call = IsolatedCall(func, args, timeout=self.timeout, max_memory=self.max_memory,
+                                max_cpu=self.max_cpu).start()
+            try:
+                outcome = await _wait(call)
+            except asyncio.CancelledError:
+                call.kill()
+                call.wait()
+                raise
+        if not outcome.ok:
+            msg = "%s failed : %s" % (getattr(func, "__name__", str(func)), outcome.error)
+            logger.error(msg)
+            raise ValueError(msg)
+        return outcome.value
+
+    async def import_file(self, filename, format=None):
+        r"""Read the shape of a file
+
+        Parameters
+        ----------
+        filename : str
+        format : str or None
+            format name or extension, None to detect it (see OCCDataExchange.registry)
+
+        Returns
+        -------
+        TopoDS.TopoDS_Shape
+
+        """
+        from OCCDataExchange.brep import shape_from_string
+
+        brep_string = await self.run(read_brep_string, filename, format)
+        return await asyncio.get_event_loop().run_in_executor(None, shape_from_string, brep_string)
+
+    async def export(self, a_shape, filename, format=None):
+        r"""Write a shape to a file
+
+        Parameters
+        ----------
+        a_shape : TopoDS.TopoDS_Shape
+        filename : str
+        format : str or None
+            format name or extension, None to use the extension of filename
+
+        Returns
+        -------
+        str
+            filename
+
+        """
+        from OCCDataExchange.brep import shape_to_string
+
+        brep_string = await asyncio.get_event_loop().run_in_executor(None, shape_to_string, a_shape)
+        return await self.run(_export_from_brep_string, brep_string, filename, format)
+
+
+_default_converter = AsyncConverter()
+
+
+def configure(max_workers=None, timeout=None, max_memory=None, max_cpu=None):
+    r"""Set the limits used by aimport_file() and aexport()
+
+    Parameters
+    ----------
+    max_workers, timeout, max_memory, max_cpu
+        see AsyncConverter
+
+    """
+    global _default_converter
+    _default_converter = AsyncConverter(max_workers, timeout, max_memory, max_cpu)
+
+
+async def aimport_file(filename, format=None):
+    r"""Read the shape of a file in a child process (see AsyncConverter.import_file())"""
+    return await _default_converter.import_file(filename, format)
+
+
+async def aexport(a_shape, filename, format=None):
+    r"""Write a shape to a file in a child process (see AsyncConverter.export())"""
+    return await _default_converter.export(a_shape, filename, format)
@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""archive module of OCCDataExchange
+
+Summary
+-------
+
+Reads the CAD files contained in a zip archive without extracting it.
+
+The members are listed and their formats sniffed from their first bytes only. The selected members
+are then read in parallel child processes (see OCCDataExchange.isolation) : each child streams its member
+out of the archive and sends the shape back serialized in the BREP format.
+
+    importer = ArchiveImporter("supplier.zip", members="parts/*.stp", workers=8, timeout=300)
+    importer.shapes  # member name -> shape
+    importer.errors  # member name -> Outcome, for the members that could not be read
+
+"""
+
+from __future__ import print_function
+
+import collections
+import contextlib
+import fnmatch
+import logging
+import zipfile
+
+from OCCDataExchange.checks import check_importer_filename
+from OCCDataExchange.compression import MAGIC_SIZE, codec_from_extension, codec_from_magic, decompressing_reader, \
+    split_extension
+from OCCDataExchange.extensions import archive_extensions
+from OCCDataExchange.isolation import IsolatedCall, read_brep_string, run_many
+from OCCDataExchange.registry import SNIFF_SIZE, get_format, sniff_head
+from OCCDataExchange.utils import _string_types, build_compound
+
+logger = logging.getLogger(__name__)
+
+ArchiveMember = collections.namedtuple("ArchiveMember", ["name", "size", "format"])
+ArchiveMember.__doc__ = r"""A file in an archive : its name, its uncompressed size in bytes and its format name
+
+format is None if the member content and extension are not recognized.
+"""
+
+
+def _member_format(archive, info):
+    r"""Format name of an archive member, from its first bytes and otherwise from its extension"""
+    with contextlib.closing(archive.open(info)) as member:
+        head = member.read(SNIFF_SIZE)
+    size = info.file_size
+    codec = codec_from_magic(head[:MAGIC_SIZE]) or codec_from_extension(info.filename)
+    if codec is not None:  # e.g. part.stp.gz in the archive
+        with contextlib.closing(archive.open(info)) as member:
+            with contextlib.closing(decompressing_reader(member, codec)) as reader:
+                head, size = reader.read(SNIFF_SIZE), None
+    a_format = sniff_head(head, size)
+    if a_format is not None:
+        return a_format.name
+    extension = split_extension(info.filename)[0]
+    if extension:
+        try:
+            return get_format(extension).name
+        except ValueError:
+            pass
+    return None
+
+
+def list_members(filename):
+    r"""Files in a zip archive, with their formats
+
+    Only the first bytes of each member are decompressed to sniff its format.
+
+    Parameters
+    ----------
+    filename : str
+
+    Returns
+    -------
+    list[ArchiveMember]
+        in the archive order, directories excluded
+
+    """
+    members = list()
+    with zipfile.ZipFile(filename) as archive:
+        for info in archive.infolist():
+            if info.filename.endswith("/"):
+                continue
+            members.append(ArchiveMember(info.filename, info.file_size, _member_format(archive, info)))
+    return members
+
+
+def read_member_brep_string(filename, name, format=None):
+    r"""Read the shape of an archive member and serialize it in the BREP format
+
+    The member is streamed out of the archive, the other members are not read.
+
+    Parameters
+    ----------
+    filename : str
+        the zip archive
+    name : str
+        member name
+    format : str or None
+        format name or extension, None to detect it from the member content
+
+    Returns
+    -------
+    str
+
+    """
+    with zipfile.ZipFile(filename) as archive:
+        with contextlib.closing(archive.open(name)) as member:
+            return read_brep_string(member, format)
+
+
+def import_members(filename, members, workers=None, timeout=None, max_memory=None, max_cpu=None):
+    r"""Read the shapes of archive members in parallel child processes, at most workers at the same time
+
+    Parameters
+    ----------
+    filename : str
+        the zip archive
+    members : iterable of ArchiveMember
+    workers : int or None
+        None for the number of CPUs
+    timeout, max_memory, max_cpu
+        limits of each member read, see OCCDataExchange.isolation.import_isolated()
+
+    Yields
+    ------
+    tuple(str, Outcome)
+        member name and outcome, whose value is the shape serialized in the BREP format,
+        in the order the reads finish
+
+    """
+    def calls():
+        for member in members:
+            call = IsolatedCall(read_member_brep_string, (filename, member.name, member.format), timeout=timeout,
+                                max_memory=max_memory, max_cpu=max_cpu)
+            call.name = member.name
+            yield call
+
+    for call in run_many(calls(), workers):
+        yield call.name, call.outcome
+
+
+class ArchiveImporter(object):
+    r"""Zip archive importer : reads the CAD files it contains, in parallel
+
+    Parameters
+    ----------
+    filename : str
+        the zip archive
+    members : None, str or iterable of str
+        None (default) for every member of a format that can be imported, a shell pattern matching
+        member names (e.g. "parts/*.stp") or member names
+    workers : int or None
+        number of members read at the same time, None for the number of CPUs
+    timeout : float or None
+        wall clock limit of a member read in seconds, None for no limit
+    max_memory : int or None
+        memory limit of a member read in bytes, None for no limit
+    max_cpu : float or None
+        CPU time limit of a member read in seconds, None for no limit
+    transfer : bool
+        If True (default), the members are read when the importer is instantiated.
+        If False, nothing is read until read_file() is called.
+
+    Notes
+    -----
+    A member that cannot be read does not stop the others : it is left out of shapes,
+    and its Outcome is in errors.
+
+    """
+
+    def __init__(self, filename, members=None, workers=None, timeout=None, max_memory=None, max_cpu=None,
+                 transfer=True):
+        logger.info("ArchiveImporter instantiated with filename : %s" % filename)
+
+        check_importer_filename(filename, archive_extensions)
+
+        self._filename = filename
+        self._members = list_members(filename)
+        self._selected = self._select(members)
+        self.workers = workers
+        self.timeout = timeout
+        self.max_memory = max_memory
+        self.max_cpu = max_cpu
+        self._shapes = collections.OrderedDict()
+        self._errors = collections.OrderedDict()
+        self._compound = None
+
+        if transfer:
+            logger.info("Reading archive ....")
+            self.read_file()
+
+    def _select(self, members):
+        r"""Members to read
+
+        Raises
+        ------
+        ValueError
+            if a member name is not in the archive
+
+        """
+        if members is None:
+            return [member for member in self._members
+                    if member.format is not None and get_format(member.format).importer is not None]
+        if isinstance(members, _string_types):
+            return [member for member in self._members if fnmatch.fnmatchcase(member.name, members)]
+        by_name = dict((member.name, member) for member in self._members)
+        selected = list()
+        for name in members:
+            if name not in by_name:
+                msg = "No member %s in %s" % (name, self._filename)
+                logger.error(msg)
+                raise ValueError(msg)
+            selected.append(by_name[name])
+        return selected
+
+    def read_file(self):
+        r"""Read the selected members and store their shapes, in the archive order"""
+        from OCCDataExchange.brep import shape_from_string
+
+        results = dict(import_members(self._filename, self._selected, self.workers, self.timeout, self.max_memory,
+                                      self.max_cpu))
+        self._shapes.clear()
+        self._errors.clear()
+        self._compound = None
+        for member in self._selected:
+            outcome = results[member.name]
+            if outcome.ok:
+                self._shapes[member.name] = shape_from_string(outcome.value)
+            else:
+                logger.warning("Member %s could not be read : %s" % (member.name, outcome.error))
+                self._errors[member.name] = outcome
+        logger.info("%i member(s) read, %i failed" % (len(self._shapes), len(self._errors)))
+        return True
+
+    @property
+    def members(self):
+        r"""Files in the archive, selected or not
+
+        Returns
+        -------
+        list[ArchiveMember]
+
+        """
+        return self._members
+
+    @property
+    def selected(self):
+        r"""Members read by read_file()
+
+        Returns
+        -------
+        list[ArchiveMember]
+
+        """
+        return self._selected
+
+    @property
+    def shapes(self):
+        r"""Shapes of the members read, by member name
+
+        Returns
+        -------
+        collections.OrderedDict[str, TopoDS.TopoDS_Shape]
+
+        """
+        return self._shapes
+
+    @property
+    def errors(self):
+        r"""Outcomes of the members that could not be read, by member name
+
+        Returns
+        -------
+        collections.OrderedDict[str, OCCDataExchange.isolation.Outcome]
+
+        """
+        return self._errors
+
+    @property
+    def compound(self):
+        r"""Compound of the shapes of the members read
+
+        Returns
+        -------
+        TopoDS.TopoDS_Compound
+
+        """
+        if self._compound is None:
+            self._compound = build_compound(self._shapes.values())
+        return self._compound
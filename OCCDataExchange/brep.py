@@ -5,33 +5,111 @@ r"""BREP module of OCCDataExchange"""
 from __future__ import absolute_import
 from __future__ import print_function
 
+import importlib
 import logging
 
-from OCC import BRep
-from OCC import BRepTools
-from OCC import Message
-from OCC import TopoDS
-
-from OCCDataExchange.checks import check_importer_filename, check_exporter_filename, check_shape, check_overwrite
+from OCCDataExchange.checks import check_importer_source, check_exporter_filename, check_exporter_has_filename, \
+    check_shape, check_overwrite
+from OCCDataExchange.compression import codec_from_extension, write_compressed
 from OCCDataExchange.extensions import brep_extensions
+from OCCDataExchange.utils import is_plain_file, read_source, source_name, written_bytes
 
 logger = logging.getLogger(__name__)
 
 
+def preload():
+    r"""Import the OpenCascade modules used by this module (see OCCDataExchange.registry.Format.preload())"""
+    for module_name in ["OCC.BRep", "OCC.BRepTools", "OCC.Message", "OCC.TopLoc", "OCC.TopoDS"]:
+        importlib.import_module(module_name)
+
+
+_ORIENTATION_CHARS = {0: "+", 1: "-", 2: "i", 3: "e"}  # TopAbs_Orientation -> BREP format character
+
+
+def shape_to_string(a_shape):
+    r"""Serialize a shape to a string in the BREP file format
+
+    The string is what BrepExporter would write to a file, it can be used to send
+    shapes to other processes or to store them without going through the disk.
+
+    Parameters
+    ----------
+    a_shape : TopoDS_Shape or subclass
+
+    Returns
+    -------
+    str
+
+    """
+    from OCC import BRepTools
+
+    check_shape(a_shape)  # raises an exception if the shape is not valid
+    shape_set = BRepTools.BRepTools_ShapeSet()
+    shape_set.Add(a_shape)
+    # The root shape is the last one added to the set, shapes are numbered backwards in the file
+    return "DBRep_DrawableShape\n%s\n%s1 %i \n" % (shape_set.WriteToString(),
+                                                  _ORIENTATION_CHARS[a_shape.Orientation()],
+                                                  shape_set.Locations().Index(a_shape.Location()))
+
+
+def shape_from_string(brep_string):
+    r"""Deserialize a shape from a string in the BREP file format
+
+    Parameters
+    ----------
+    brep_string : str
+        e.g. the content of a .brep file or the output of shape_to_string()
+
+    Returns
+    -------
+    TopoDS.TopoDS_Shape
+
+    Raises
+    ------
+    ValueError
+        if the string does not contain a shape
+
+    """
+    from OCC import BRepTools
+    from OCC import TopLoc
+
+    body, _, root = brep_string.rstrip().rpartition("\n")
+    if body.startswith("DBRep_DrawableShape"):
+        body = body.partition("\n")[2]
+    shape_set = BRepTools.BRepTools_ShapeSet()
+    shape_set.ReadFromString(body)
+    root = root.split()
+    if shape_set.NbShapes() == 0 or len(root) != 2 or root[0][0] not in _ORIENTATION_CHARS.values():
+        msg = "No shape found in the BREP string"
+        logger.error(msg)
+        raise ValueError(msg)
+
+    location_index = int(root[1])
+    if location_index > 0:
+        location = shape_set.Locations().Location(location_index)
+    else:
+        location = TopLoc.TopLoc_Location()
+    orientations = dict((char, orientation) for orientation, char in _ORIENTATION_CHARS.items())
+    # Located() and Oriented() return new shapes that do not depend on the lifetime of shape_set
+    a_shape = shape_set.Shape(shape_set.NbShapes() - int(root[0][1:]) + 1)
+    return a_shape.Located(location).Oriented(orientations[root[0][0]])
+
+
 class BrepImporter(object):
     r"""Brep importer
 
     Parameters
     ----------
-    filename : str
+    filename : str, bytes, bytearray, memoryview or binary file object
+        In memory data and compressed files are read with shape_from_string(), without going through the disk
 
     """
 
     def __init__(self, filename):
-        logger.info("BrepImporter instantiated with filename : %s" % filename)
+        logger.info("BrepImporter instantiated with filename : %s" % source_name(filename))
 
-        check_importer_filename(filename, brep_extensions)
-        self._filename = filename
+        check_importer_source(filename, brep_extensions, compressed=True)
+        self._source = filename
         self._shape = None
 
         logger.info("Reading file ....")
@@ -39,9 +117,18 @@ class BrepImporter(object):
 
     def read_file(self):
         r"""Read the BREP file and stores the result in a TopoDS_Shape"""
+        if not is_plain_file(self._source):
+            # BREP files are ASCII, latin-1 maps each byte to a character
+            self._shape = shape_from_string(read_source(self._source).decode("latin-1"))
+            return
+
+        from OCC import BRep
+        from OCC import BRepTools
+        from OCC import TopoDS
+
         shape = TopoDS.TopoDS_Shape()
         builder = BRep.BRep_Builder()
-        BRepTools.breptools_Read(shape, self._filename, builder)
+        BRepTools.breptools_Read(shape, self._source, builder)
         self._shape = shape
 
     @property
@@ -58,13 +145,15 @@ class BrepExporter(object):
 
     Parameters
     ----------
-    filename : str
+    filename : str or None
+        None for an exporter that only writes to streams (write_to()) or bytes (to_bytes())
     """
 
     def __init__(self, filename=None):
         logger.info("BrepExporter instantiated with filename : %s" % filename)
-        check_exporter_filename(filename, brep_extensions)
-        check_overwrite(filename)
+        if filename is not None:
+            check_exporter_filename(filename, brep_extensions, compressed=True)
+            check_overwrite(filename)
 
         self._shape = None  # only one shape can be exported
         self._filename = filename
@@ -83,7 +172,34 @@ class BrepExporter(object):
 
     def write_file(self):
         r"""Write file"""
+        from OCC import BRepTools
+        from OCC import Message
+
+        check_exporter_has_filename(self._filename)
+        if codec_from_extension(self._filename) is not None:
+            write_compressed(self.write_to, self._filename)
+            return
         logger.info("Writing brep : {cad_file}".format(cad_file=self._filename))
         builder = Message.Handle_Message_ProgressIndicator()
         BRepTools.breptools_Write(self._shape, self._filename, builder)
         logger.info("Wrote BREP file")
+
+    def write_to(self, stream):
+        r"""Write the BREP file content to a binary stream (e.g. a socket file or a buffer)
+
+        Parameters
+        ----------
+        stream : binary file like object
+
+        """
+        stream.write(shape_to_string(self._shape).encode("ascii"))
+
+    def to_bytes(self):
+        r"""BREP file content
+
+        Returns
+        -------
+        bytes
+
+        """
+        return written_bytes(self.write_to)
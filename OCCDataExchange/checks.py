@@ -7,13 +7,13 @@ import logging
 import os.path
 import warnings
 
-from OCC import TopoDS
-from OCCDataExchange.utils import extract_file_extension
+from OCCDataExchange.compression import split_extension
+from OCCDataExchange.utils import extract_file_extension, is_filename
 
 logger = logging.getLogger(__name__)
 
 
-def check_importer_filename(filename, allowed_extensions="*"):
+def check_importer_filename(filename, allowed_extensions="*", compressed=False):
     r"""Check the filename is ok for importing.
 
     Checks that:
@@ -26,6 +26,9 @@ def check_importer_filename(filename, allowed_extensions="*"):
         Full / absolute path to the file
     allowed_extensions : list[str]
         List of allowed extensions
+    compressed : bool (optional)
+        True if the importer reads compressed files : the extension of part.stp.gz is then stp
+        (see OCCDataExchange.compression). The default is False
 
     Raises
     ------
@@ -45,12 +48,40 @@ def check_importer_filename(filename, allowed_extensions="*"):
 
     # Check the extension
     if allowed_extensions != "*":
-        _check_extension(filename, allowed_extensions)
+        _check_extension(filename, allowed_extensions, compressed)
 
     logger.info("Filename passed checks")
 
 
-def check_exporter_filename(filename, allowed_extensions="*", create_directory=False):
+def check_importer_source(source, allowed_extensions="*", compressed=False):
+    r"""Check the source is ok for importing
+
+    A filename is checked by check_importer_filename(), in memory data must be bytes like or readable.
+
+    Parameters
+    ----------
+    source : str, bytes, bytearray, memoryview or binary file object
+    allowed_extensions : list[str]
+        List of allowed extensions, for a filename
+    compressed : bool
+        True if the importer reads compressed files, see check_importer_filename()
+
+    Raises
+    ------
+    AssertionError
+        if the file does not exist, its extension is not allowed or source is not a supported type
+
+    """
+    if is_filename(source):
+        check_importer_filename(source, allowed_extensions, compressed)
+    elif not isinstance(source, (bytes, bytearray, memoryview)) and not hasattr(source, "read"):
+        msg = "Importer error : expecting a filename, bytes, memoryview or binary file object, got a %s" % \
+              source.__class__
+        logger.error(msg)
+        raise AssertionError(msg)
+
+
+def check_exporter_filename(filename, allowed_extensions="*", create_directory=False, compressed=False):
     r"""Check the filename is ok for exporting
 
     Checks that:
@@ -67,6 +98,9 @@ def check_exporter_filename(filename, allowed_extensions="*", create_directory=F
     create_directory : bool (optional)
         Should the directory be created if it does not exist
         The default is False (no attempt made to create an inexistent directory)
+    compressed : bool (optional)
+        True if the exporter writes compressed files : the extension of part.stp.gz is then stp
+        (see OCCDataExchange.compression). The default is False
 
     Raises
     ------
@@ -91,14 +125,34 @@ def check_exporter_filename(filename, allowed_extensions="*", create_directory=F
 
     # check the extension
     if allowed_extensions != "*":
-        _check_extension(filename, allowed_extensions)
+        _check_extension(filename, allowed_extensions, compressed)
 
     logger.info("Filename passed checks")
 
 
-def _check_extension(filename, allowed_extensions):
-    r"""Check that the extension extracted from filename is in allowed extensions"""
-    if extract_file_extension(filename).lower() not in allowed_extensions:
+def check_exporter_has_filename(filename):
+    r"""Check an exporter was given a filename before writing a file
+
+    Raises
+    ------
+    AssertionError
+        if filename is None : the exporter can only write to a stream (write_to()) or to bytes (to_bytes())
+
+    """
+    if filename is None:
+        msg = "Exporter error : no filename, use write_to() or to_bytes()"
+        logger.error(msg)
+        raise AssertionError(msg)
+
+
+def _check_extension(filename, allowed_extensions, compressed=False):
+    r"""Check that the extension extracted from filename is in allowed extensions
+
+    If compressed is True, a compression extension is skipped : part.stp.gz has the stp extension
+    (see OCCDataExchange.compression). Otherwise its extension is gz.
+    """
+    extension = split_extension(filename)[0] if compressed else extract_file_extension(filename).lower()
+    if extension not in allowed_extensions:
         msg = "Accepted extensions are %s" % str(allowed_extensions)
         logger.error(msg)
         raise AssertionError(msg)
@@ -141,6 +195,8 @@ def check_shape(a_shape):
     bool
         True if all tests passed, raises an exception otherwise
     """
+    from OCC import TopoDS
+
     if not isinstance(a_shape, TopoDS.TopoDS_Shape) and not issubclass(a_shape.__class__, TopoDS.TopoDS_Shape):
         msg = "Expecting a TopoDS_Shape or subclass, got a %s" % a_shape.__class__
         logger.error(msg)
@@ -0,0 +1,364 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Command line interface of OCCDataExchange
+
+Summary
+-------
+
+occdx convert : batch conversion between the formats of the registry.
+occdx daemon : conversion daemon with warm workers (see OCCDataExchange.daemon).
+
+    occdx convert models/ "parts/*.stp" --to stl -o out/ --workers 8 --timeout 300 --max-memory 4096
+
+Every file is converted in its own child process (see OCCDataExchange.isolation) with a wall clock
+and a memory limit, at most --workers at a time. Each result is appended to a JSON lines manifest
+(out/occdx-manifest.jsonl by default) : a later run skips the files already converted to the same
+output file, unless the input file has changed since.
+
+"""
+
+from __future__ import print_function
+
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import time
+
+from OCCDataExchange.compression import split_extension, strip_extensions
+from OCCDataExchange.isolation import IsolatedCall, run_many
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "occdx-manifest.jsonl"
+
+
+def convert_file(input_filename, output_filename, output_format=None):
+    r"""Convert a file to another format
+
+    Parameters
+    ----------
+    input_filename : str
+    output_filename : str
+    output_format : str or None
+        format name, None to use the extension of output_filename
+
+    Returns
+    -------
+    str
+        output_filename
+
+    """
+    from OCCDataExchange.registry import read_shape, write_shape
+
+    write_shape(read_shape(input_filename), output_filename, output_format)
+    return output_filename
+
+
+def _readable_extensions():
+    r"""Extensions of the formats that have an importer"""
+    from OCCDataExchange.registry import formats
+
+    extensions = set()
+    for a_format in formats():
+        if a_format.importer is not None:
+            extensions.update(a_format.extensions)
+    return extensions
+
+
+def _glob_root(pattern):
+    r"""Leading directories of a glob pattern, up to the first one with a wildcard
+
+    Examples
+    --------
+    >>> _glob_root("models/*/*.stp")
+    'models'
+
+    """
+    root = os.path.dirname(pattern)
+    while glob.has_magic(root):
+        root = os.path.dirname(root)
+    return root
+
+
+def collect_inputs(patterns):
+    r"""Files designated by paths, directories (searched recursively) and glob patterns
+
+    The output path keeps the directories of the input below the directory (or the leading directories
+    of the glob pattern) it was found in, e.g. x/part for x/part.stp matched by "*/*.stp".
+    Inputs found under different arguments that would have the same output path are prefixed with the name
+    of the directory they were found in, e.g. a/part and b/part for a/part.stp and b/part.stp
+    found in the directories a and b.
+    Inputs that would still have the same output path keep their extension in it, e.g. part.stp and part.igs
+    give part.stp and part.igs (converted to part.stp.stl and part.igs.stl).
+
+    Parameters
+    ----------
+    patterns : list[str]
+
+    Returns
+    -------
+    list[tuple(str, str)]
+        (input file, path of the output relative to the output directory, without extension)
+
+    Raises
+    ------
+    ValueError
+        if inputs would still have the same output path, e.g. found in directories with the same name
+
+    """
+    extensions = _readable_extensions()
+    found = list()  # (input file, directory it was found in, relative path of the input)
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for directory, _, filenames in os.walk(pattern):
+                for filename in sorted(filenames):
+                    if split_extension(filename)[0] in extensions:
+                        path = os.path.join(directory, filename)
+                        found.append((path, pattern, os.path.relpath(path, pattern)))
+        else:
+            root = _glob_root(pattern) or os.curdir
+            for path in sorted(glob.glob(pattern)):
+                if os.path.isfile(path):
+                    found.append((path, root, os.path.relpath(path, root)))
+
+    inputs, seen = list(), set()
+    for path, root, relative in found:
+        if os.path.abspath(path) not in seen:  # the same file may be matched by several patterns
+            seen.add(os.path.abspath(path))
+            inputs.append([path, os.path.abspath(root), relative])
+
+    def key(relative):
+        return os.path.normcase(strip_extensions(relative))
+
+    roots_by_output = dict()
+    for _, root, relative in inputs:
+        roots_by_output.setdefault(key(relative), set()).add(root)
+    for an_input in inputs:
+        path, root, relative = an_input
+        if len(roots_by_output[key(relative)]) > 1:
+            an_input[2] = os.path.join(os.path.basename(root), relative)
+
+    files_by_output = dict()
+    for path, _, relative in inputs:
+        files_by_output.setdefault(key(relative), list()).append(path)
+    outputs = [(path, relative if len(files_by_output[key(relative)]) > 1 else strip_extensions(relative))
+               for path, _, relative in inputs]
+
+    files_by_output = dict()
+    for path, output in outputs:
+        files_by_output.setdefault(os.path.normcase(output), list()).append(path)
+    collisions = [files for files in files_by_output.values() if len(files) > 1]
+    if collisions:
+        msg = "Inputs with the same output path : %s" % "; ".join(", ".join(files) for files in collisions)
+        logger.error(msg)
+        raise ValueError(msg)
+    return outputs
+
+
+def _signature(filename):
+    r"""Size and modification time of a file, to detect changes between runs"""
+    return os.path.getsize(filename), os.path.getmtime(filename)
+
+
+def read_manifest(manifest_filename):
+    r"""Last record of each conversion in a manifest
+
+    The same input converted to different outputs (e.g. to STL, then to GLB in the same directory)
+    has a record for each output.
+
+    Returns
+    -------
+    dict
+        (input file, output file) -> record
+
+    """
+    records = dict()
+    if not os.path.isfile(manifest_filename):
+        return records
+    with open(manifest_filename) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:  # a line truncated by an interrupted run
+                continue
+            records[(record["input"], record["output"])] = record
+    return records
+
+
+def _is_done(record, input_filename, output_filename):
+    r"""True if record is a successful conversion of the current version of input_filename to output_filename"""
+    return (record is not None and record["status"] == "ok" and record["output"] == output_filename and
+            os.path.isfile(output_filename) and [record["size"], record["mtime"]] == list(_signature(input_filename)))
+
+
+def convert(patterns, output_format, output_directory, workers=None, timeout=None, max_memory=None,
+            manifest_filename=None, force=False, out=sys.stdout, max_cpu=None):
+    r"""Convert files, in parallel isolated processes, recording the results in a manifest
+
+    Parameters
+    ----------
+    patterns : list[str]
+        files, directories and glob patterns
+    output_format : str
+        format name or extension, followed by a compression extension to compress the files (e.g. stl.gz)
+    output_directory : str
+    workers : int or None
+        number of conversions running at the same time, None for the number of CPUs
+    timeout : float or None
+        wall clock limit per file, in seconds
+    max_memory : int or None
+        memory limit per file, in bytes
+    manifest_filename : str or None
+        None for occdx-manifest.jsonl in output_directory
+    force : bool
+        if True, files already converted are converted again
+    out : file like object
+        where the progress and the statistics are printed
+    max_cpu : float or None
+        CPU time limit per file, in seconds
+
+    Returns
+    -------
+    dict
+        statistics : ok, failed, skipped, seconds, input_bytes
+
+    """
+    from OCCDataExchange.registry import get_format
+
+    # e.g. stl, or stl.gz for compressed files
+    extension, codec = split_extension("output.%s" % output_format.lower().lstrip("."))
+    a_format = get_format(extension)
+    if a_format.exporter is None:
+        msg = "The %s format cannot be written" % a_format.name
+        logger.error(msg)
+        raise ValueError(msg)
+    if extension not in a_format.extensions:
+        extension = a_format.extensions[0]
+    if codec is not None:
+        extension += os.path.splitext(output_format)[1].lower()
+
+    manifest_filename = manifest_filename or os.path.join(output_directory, MANIFEST_NAME)
+    records = dict() if force else read_manifest(manifest_filename)
+
+    jobs, skipped = list(), 0
+    for input_filename, relative in collect_inputs(patterns):
+        output_filename = os.path.abspath(os.path.join(output_directory, "%s.%s" % (relative, extension)))
+        if _is_done(records.get((input_filename, output_filename)), input_filename, output_filename):
+            skipped += 1
+            continue
+        if not os.path.isdir(os.path.dirname(output_filename)):
+            os.makedirs(os.path.dirname(output_filename))
+        jobs.append((input_filename, output_filename))
+    print("%i file(s) to convert, %i already done" % (len(jobs), skipped), file=out)
+
+    # import the formats once in the parent, the forked children inherit them
+    a_format.preload()
+    for input_extension in set(split_extension(input_filename)[0] for input_filename, _ in jobs):
+        try:
+            get_format(input_extension).preload()
+        except ValueError:  # unknown extension, the format is detected from the content in the child
+            pass
+
+    def calls():
+        for input_filename, output_filename in jobs:
+            call = IsolatedCall(convert_file, (input_filename, output_filename, a_format.name),
+                                timeout=timeout, max_memory=max_memory, max_cpu=max_cpu)
+            call.input_filename, call.output_filename = input_filename, output_filename
+            yield call
+
+    statistics = {"ok": 0, "failed": 0, "skipped": skipped, "seconds": 0., "input_bytes": 0}
+    start = time.time()
+    if not os.path.isdir(os.path.dirname(os.path.abspath(manifest_filename))):
+        os.makedirs(os.path.dirname(os.path.abspath(manifest_filename)))
+    with open(manifest_filename, "a") as manifest:
+        for call in run_many(calls(), workers):
+            outcome = call.outcome
+            size, mtime = _signature(call.input_filename)
+            record = {"input": call.input_filename, "output": call.output_filename,
+                      "status": "ok" if outcome.ok else "failed", "error": outcome.error,
+                      "reason": outcome.reason, "seconds": round(outcome.seconds, 3), "size": size, "mtime": mtime}
+            manifest.write(json.dumps(record) + "\n")
+            manifest.flush()  # a killed run keeps the results so far
+            statistics["ok" if outcome.ok else "failed"] += 1
+            statistics["input_bytes"] += size
+            if outcome.ok:
+                print("ok     %.2f s %s" % (outcome.seconds, call.input_filename), file=out)
+            else:
+                print("FAILED %.2f s %s : %s" % (outcome.seconds, call.input_filename, outcome.error), file=out)
+    statistics["seconds"] = time.time() - start
+
+    converted = statistics["ok"] + statistics["failed"]
+    seconds = max(statistics["seconds"], 1e-9)
+    print("%i converted, %i failed, %i skipped in %.1f s : %.2f files/s, %.2f MB/s" %
+          (statistics["ok"], statistics["failed"], statistics["skipped"], statistics["seconds"],
+           converted / seconds, statistics["input_bytes"] / 1e6 / seconds), file=out)
+    return statistics
+
+
+def _parser():
+    r"""Command line parser"""
+    parser = argparse.ArgumentParser(prog="occdx", description="OCCDataExchange command line tools")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log at the INFO level")
+    subparsers = parser.add_subparsers(dest="command")
+
+    convert_parser = subparsers.add_parser("convert", help="convert files between formats")
+    convert_parser.add_argument("inputs", nargs="+", help="files, directories or glob patterns")
+    convert_parser.add_argument("--to", required=True, dest="output_format",
+                                help="output format, e.g. stl, glb, stp.gz")
+    convert_parser.add_argument("-o", "--output-directory", required=True)
+    convert_parser.add_argument("-j", "--workers", type=int, default=None,
+                                help="parallel conversions (default : number of CPUs)")
+    convert_parser.add_argument("--timeout", type=float, default=None, help="wall clock limit per file, in seconds")
+    convert_parser.add_argument("--max-memory", type=int, default=None, help="memory limit per file, in MB")
+    convert_parser.add_argument("--max-cpu", type=float, default=None, help="CPU time limit per file, in seconds")
+    convert_parser.add_argument("--manifest", default=None,
+                                help="manifest file (default : %s in the output directory)" % MANIFEST_NAME)
+    convert_parser.add_argument("--force", action="store_true", help="convert the files already converted again")
+
+    daemon_parser = subparsers.add_parser("daemon", help="serve conversions over a Unix domain socket")
+    daemon_parser.add_argument("--socket", required=True, dest="socket_path", help="Unix domain socket path")
+    daemon_parser.add_argument("-j", "--workers", type=int, default=None,
+                               help="worker processes (default : number of CPUs)")
+    daemon_parser.add_argument("--max-jobs", type=int, default=100, help="jobs before a worker is replaced")
+    daemon_parser.add_argument("--max-rss", type=int, default=None,
+                               help="resident memory in MB above which a worker is replaced")
+    return parser
+
+
+def main(argv=None):
+    r"""occdx entry point
+
+    Returns
+    -------
+    int
+        exit status : 0 if all the conversions succeeded
+
+    """
+    parser = _parser()
+    arguments = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if arguments.verbose else logging.WARNING)
+
+    if arguments.command == "convert":
+        statistics = convert(arguments.inputs, arguments.output_format, arguments.output_directory,
+                             workers=arguments.workers, timeout=arguments.timeout,
+                             max_memory=None if arguments.max_memory is None else arguments.max_memory * 1024 ** 2,
+                             manifest_filename=arguments.manifest, force=arguments.force, max_cpu=arguments.max_cpu)
+        return 0 if statistics["failed"] == 0 else 1
+
+    if arguments.command == "daemon":
+        from OCCDataExchange.daemon import ConversionDaemon
+
+        ConversionDaemon(arguments.socket_path, arguments.workers, arguments.max_jobs,
+                         None if arguments.max_rss is None else arguments.max_rss * 1024 ** 2).serve_forever()
+        return 0
+
+    parser.print_help()
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,340 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""compression module of OCCDataExchange
+
+Summary
+-------
+
+Transparent compression of the files read and written : gzip, bzip2, xz and zstd
+(zstd requires the zstandard package).
+
+A compressed file is recognized by a compound extension (e.g. part.stp.gz, mesh.stl.zst)
+or, when reading, by the magic bytes of the compression format. Decompression and compression
+are streamed : the uncompressed content is never held in memory as a whole by this module.
+
+"""
+
+from __future__ import print_function
+
+import contextlib
+import io
+import logging
+import os
+import sys
+
+logger = logging.getLogger(__name__)
+
+# codec name -> (extensions, magic bytes)
+_CODECS = {"gzip": (["gz"], b"\x1f\x8b"),
+           "bz2": (["bz2"], b"BZh"),
+           "xz": (["xz"], b"\xfd7zXZ\x00"),
+           "zstd": (["zst", "zstd"], b"\x28\xb5\x2f\xfd")}
+
+compression_extensions = sorted(extension for extensions, _ in _CODECS.values() for extension in extensions)
+
+MAGIC_SIZE = max(len(magic) for _, magic in _CODECS.values())
+
+
+def codec_from_extension(filename):
+    r"""Compression codec designated by the last extension of filename
+
+    Returns
+    -------
+    str or None
+        codec name, None if the extension is not a compression extension
+
+    """
+    extension = os.path.splitext(str(filename))[1].lower().lstrip(".")
+    for codec, (extensions, _) in _CODECS.items():
+        if extension in extensions:
+            return codec
+    return None
+
+
+def codec_from_magic(head):
+    r"""Compression codec recognized from the first bytes of a file
+
+    Parameters
+    ----------
+    head : bytes
+        at least MAGIC_SIZE bytes, unless the file is shorter
+
+    Returns
+    -------
+    str or None
+
+    """
+    for codec, (_, magic) in _CODECS.items():
+        if head.startswith(magic):
+            return codec
+    return None
+
+
+def split_extension(filename):
+    r"""Extension of the content and compression codec of a filename
+
+    Examples
+    --------
+    >>> split_extension("part.STP.gz")
+    ('stp', 'gzip')
+    >>> split_extension("part.stp")
+    ('stp', None)
+
+    Returns
+    -------
+    tuple(str, str or None)
+        lower case extension without the dot ("" if there is none), codec name or None
+
+    """
+    root, extension = os.path.splitext(str(filename))
+    codec = codec_from_extension(filename)
+    if codec is not None:
+        extension = os.path.splitext(root)[1]
+    return extension.lower().lstrip("."), codec
+
+
+def strip_extensions(filename):
+    r"""filename without its extension, and without its compression extension if any
+
+    Examples
+    --------
+    >>> strip_extensions("parts/part.stp.gz")
+    'parts/part'
+
+    """
+    root = os.path.splitext(str(filename))[0]
+    if codec_from_extension(filename) is not None:
+        root = os.path.splitext(root)[0]
+    return root
+
+
+def file_codec(filename):
+    r"""Compression codec of an existing file, from its extension or else from its magic bytes"""
+    codec = codec_from_extension(filename)
+    if codec is None:
+        with open(filename, "rb") as f:
+            codec = codec_from_magic(f.read(MAGIC_SIZE))
+    return codec
+
+
+def _zstandard():
+    r"""The zstandard module
+
+    Raises
+    ------
+    ValueError
+        if the zstandard package is not installed
+
+    """
+    try:
+        import zstandard
+    except ImportError:
+        msg = "zstd compression requires the zstandard package"
+        logger.error(msg)
+        raise ValueError(msg)
+    return zstandard
+
+
+def _lzma():
+    r"""The lzma module (backports.lzma on Python 2)
+
+    Raises
+    ------
+    ValueError
+        if lzma is not available
+
+    """
+    try:
+        import lzma
+    except ImportError:
+        try:
+            from backports import lzma
+        except ImportError:
+            msg = "xz compression requires the lzma module"
+            logger.error(msg)
+            raise ValueError(msg)
+    return lzma
+
+
+class _BZ2Reader(io.RawIOBase):
+    r"""Decompresses a bzip2 file object (bz2.BZ2File only opens file names before Python 3.3)"""
+
+    def __init__(self, fileobj):
+        import bz2
+
+        self._fileobj = fileobj
+        self._decompressor = bz2.BZ2Decompressor()
+        self._buffer = b""
+        self._eof = False
+
+    def readable(self):
+        return True
+
+    def _decompress(self, data):
+        r"""Decompressed data, data may end a stream and start the next one (e.g. written by pbzip2)"""
+        import bz2
+
+        decompressed = list()
+        while data:
+            try:
+                decompressed.append(self._decompressor.decompress(data))
+            except EOFError:  # the previous stream ended with the previous data
+                self._decompressor = bz2.BZ2Decompressor()
+                continue
+            data = self._decompressor.unused_data
+            if data:
+                self._decompressor = bz2.BZ2Decompressor()
+        return b"".join(decompressed)
+
+    def readinto(self, b):
+        while not self._buffer and not self._eof:
+            data = self._fileobj.read(io.DEFAULT_BUFFER_SIZE)
+            if data:
+                self._buffer = self._decompress(data)
+            else:
+                self._eof = True
+        size = min(len(b), len(self._buffer))
+        b[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+class _BZ2Writer(io.RawIOBase):
+    r"""Compresses to a bzip2 file object (bz2.BZ2File only opens file names before Python 3.3)"""
+
+    def __init__(self, fileobj):
+        import bz2
+
+        self._fileobj = fileobj
+        self._compressor = bz2.BZ2Compressor()
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        data = memoryview(b).tobytes()
+        self._fileobj.write(self._compressor.compress(data))
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._fileobj.write(self._compressor.flush())
+        io.RawIOBase.close(self)
+
+
+def decompressing_reader(fileobj, codec):
+    r"""Binary file object decompressing fileobj on the fly
+
+    fileobj is not closed when the reader is closed.
+
+    Parameters
+    ----------
+    fileobj : binary file object
+    codec : str
+        one of gzip, bz2, xz, zstd
+
+    """
+    if codec == "gzip":
+        import gzip
+        return gzip.GzipFile(fileobj=fileobj, mode="rb")
+    if codec == "bz2":
+        if sys.version_info < (3, 3):
+            return io.BufferedReader(_BZ2Reader(fileobj))
+        import bz2
+        return bz2.BZ2File(fileobj, "rb")
+    if codec == "xz":
+        return _lzma().LZMAFile(fileobj, "rb")
+    if codec == "zstd":
+        return _zstandard().ZstdDecompressor().stream_reader(fileobj, closefd=False)
+    msg = "Unknown compression codec %s" % codec
+    logger.error(msg)
+    raise ValueError(msg)
+
+
+def compressing_writer(fileobj, codec):
+    r"""Binary file object compressing on the fly what is written to it into fileobj
+
+    The writer must be closed to write the end of the compressed stream, fileobj is not closed.
+
+    Parameters
+    ----------
+    fileobj : binary file object
+    codec : str
+        one of gzip, bz2, xz, zstd
+
+    """
+    if codec == "gzip":
+        import gzip
+        return gzip.GzipFile(fileobj=fileobj, mode="wb")
+    if codec == "bz2":
+        if sys.version_info < (3, 3):
+            return io.BufferedWriter(_BZ2Writer(fileobj))
+        import bz2
+        return bz2.BZ2File(fileobj, "wb")
+    if codec == "xz":
+        return _lzma().LZMAFile(fileobj, "wb")
+    if codec == "zstd":
+        return _zstandard().ZstdCompressor().stream_writer(fileobj, closefd=False)
+    msg = "Unknown compression codec %s" % codec
+    logger.error(msg)
+    raise ValueError(msg)
+
+
+def decompress(data):
+    r"""Decompress data if it starts with the magic bytes of a compression format
+
+    Parameters
+    ----------
+    data : bytes
+
+    Returns
+    -------
+    bytes
+        data as is if it is not compressed
+
+    """
+    codec = codec_from_magic(data[:MAGIC_SIZE])
+    if codec is None:
+        return data
+    reader = decompressing_reader(io.BytesIO(data), codec)
+    try:
+        return reader.read()
+    finally:
+        reader.close()
+
+
+@contextlib.contextmanager
+def open_output(filename):
+    r"""Binary file object writing to filename, compressed if its extension is a compression extension
+
+    Parameters
+    ----------
+    filename : str
+        e.g. part.stl or part.stl.gz
+
+    """
+    codec = codec_from_extension(filename)
+    with open(filename, "wb") as f:
+        if codec is None:
+            yield f
+        else:
+            with contextlib.closing(compressing_writer(f, codec)) as stream:
+                yield stream
+            logger.info("Wrote %s compressed file %s" % (codec, filename))
+
+
+def write_compressed(write_to, filename):
+    r"""Write a file compressed with the codec of its extension
+
+    Parameters
+    ----------
+    write_to : callable
+        write_to(stream) writes the uncompressed content to a binary stream,
+        e.g. the write_to() method of an exporter
+    filename : str
+        e.g. part.stp.gz
+
+    """
+    with open_output(filename) as stream:
+        write_to(stream)
@@ -0,0 +1,569 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""daemon module of OCCDataExchange
+
+Summary
+-------
+
+Local conversion daemon : a long running process keeping warm workers, with OpenCascade and the
+format modules imported and the STEP and IGES controllers initialized, and accepting conversion
+jobs over a Unix domain socket.
+
+    occdx daemon --socket /tmp/occdx.sock --workers 4 --max-jobs 200 --max-rss 2048
+
+Protocol : one JSON object per line in each direction.
+
+    -> {"command": "convert", "input": "part.stp", "output": "part.stl", "format": null, "timeout": 60}
+    <- {"ok": true, "output": "part.stl", "error": null, "seconds": 0.012, "worker": 4242}
+    -> {"command": "ping"}
+    <- {"ok": true, "workers": 4}
+    -> {"command": "shutdown"}
+    <- {"ok": true}
+
+The workers are forked from a warm, single threaded template process, itself forked from the daemon
+before it starts serving, so a new worker is ready immediately.
+A worker is replaced after max_jobs jobs, when its resident memory exceeds max_rss,
+when a job runs over its timeout (the worker is killed) or when it dies.
+
+"""
+
+from __future__ import print_function
+
+import json
+import logging
+import numbers
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+try:
+    import socketserver
+except ImportError:  # Python 2
+    import SocketServer as socketserver
+
+try:
+    import queue
+except ImportError:  # Python 2
+    import Queue as queue
+
+from OCCDataExchange.isolation import _context
+
+logger = logging.getLogger(__name__)
+
+
+def _rss():
+    r"""Resident memory of the current process, in bytes"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (IOError, OSError, ValueError):
+        import resource
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # peak, the best available
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def warm_up():
+    r"""Preload every registered format : import its modules and initialize the STEP and IGES controllers
+
+    Formats whose dependencies cannot be imported are skipped with a warning : their jobs fail.
+    """
+    from OCCDataExchange.registry import formats
+
+    for a_format in formats():
+        try:
+            a_format.preload()
+        except ImportError as e:
+            logger.warning("Format %s not preloaded : %s" % (a_format.name, str(e)))
+
+
+def _worker_main(connection, max_jobs, max_rss):
+    r"""Worker process body : run the conversion jobs received on connection until it is time to retire"""
+    from OCCDataExchange.cli import convert_file
+
+    jobs = 0
+    while True:
+        try:
+            job = connection.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        start = time.time()
+        try:
+            reply = {"ok": True, "output": convert_file(job["input"], job["output"], job.get("format")),
+                     "error": None}
+        except MemoryError:
+            reply = {"ok": False, "output": None, "error": "memory exhausted"}
+        except Exception as e:
+            logger.debug(traceback.format_exc())
+            reply = {"ok": False, "output": None, "error": "%s: %s" % (e.__class__.__name__, str(e))}
+        reply["seconds"] = round(time.time() - start, 6)
+        reply["worker"] = os.getpid()
+        jobs += 1
+        retire = jobs >= max_jobs or (max_rss is not None and _rss() > max_rss)
+        connection.send((reply, retire))
+        if retire:
+            break
+    connection.close()
+
+
+def _template_main(connection, address, authkey, max_jobs, max_rss):
+    r"""Template process body : fork a worker for each request received on connection
+
+    The template process is single threaded, so the workers never inherit a lock held by another thread.
+    Each worker connects back to the pool at address and runs _worker_main().
+    """
+    from multiprocessing.connection import Client
+
+    children = set()
+    while True:
+        try:
+            ready = connection.poll(1.)
+            message = connection.recv() if ready else False
+        except (EOFError, KeyboardInterrupt):
+            break
+        if message is None:
+            break
+        if message:
+            pid = os.fork()
+            if pid == 0:  # worker
+                code = 0
+                try:
+                    connection.close()
+                    worker_connection = Client(address, authkey=authkey)
+                    worker_connection.send(os.getpid())
+                    _worker_main(worker_connection, max_jobs, max_rss)
+                except BaseException:
+                    logger.debug(traceback.format_exc())
+                    code = 1
+                finally:
+                    os._exit(code)
+            children.add(pid)
+        for pid in list(children):  # reap the workers that retired, died or were killed
+            try:
+                if os.waitpid(pid, os.WNOHANG)[0] != 0:
+                    children.discard(pid)
+            except OSError:
+                children.discard(pid)
+    connection.close()
+
+
+class _Worker(object):
+    r"""A worker process and the connection to it
+
+    Parameters
+    ----------
+    connection : multiprocessing.connection.Connection
+    pid : int
+
+    """
+
+    def __init__(self, connection, pid):
+        self.connection = connection
+        self.pid = pid
+        self.alive = True
+
+    def run(self, job, timeout=None):
+        r"""Run a job, the worker is not alive afterwards if it retired, died or timed out
+
+        Returns
+        -------
+        dict
+            reply
+
+        """
+        start = time.time()
+        try:
+            self.connection.send(job)
+            if not self.connection.poll(timeout):
+                self.kill()
+                return {"ok": False, "output": None, "error": "timeout after %g s" % timeout,
+                        "seconds": round(time.time() - start, 6), "worker": self.pid}
+            reply, retire = self.connection.recv()
+        except (EOFError, IOError, OSError):
+            self.kill()
+            return {"ok": False, "output": None, "error": "worker %i died" % self.pid,
+                    "seconds": round(time.time() - start, 6), "worker": self.pid}
+        except Exception as e:  # the reply, if any, is unread : the worker cannot run another job
+            self.kill()
+            return {"ok": False, "output": None, "error": "worker %i killed : %s" % (self.pid, str(e)),
+                    "seconds": round(time.time() - start, 6), "worker": self.pid}
+        except BaseException:
+            self.kill()
+            raise
+        if retire:
+            self.close()
+        return reply
+
+    def kill(self):
+        r"""Kill the worker process"""
+        if self.alive:  # once closed, the worker exits and its pid may be reused
+            try:
+                os.kill(self.pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+            except OSError:  # already gone
+                pass
+        self.close()
+
+    def close(self):
+        r"""Close the connection, the worker exits (the template process reaps it)"""
+        self.alive = False
+        self.connection.close()
+
+
+class WorkerPool(object):
+    r"""Warm worker processes
+
+    The workers, including the ones replacing retired workers, are forked by a single threaded template
+    process, itself forked when the pool is created : create the pool before starting other threads
+    (e.g. the server threads), after warming up the current process.
+
+    Parameters
+    ----------
+    workers : int
+        number of worker processes
+    max_jobs : int
+        a worker is replaced after max_jobs jobs
+    max_rss : int or None
+        a worker is replaced when its resident memory exceeds max_rss bytes after a job, None for no limit
+    start_timeout : float
+        wall clock limit in seconds for a new worker to connect to the pool
+
+    """
+
+    def __init__(self, workers, max_jobs=100, max_rss=None, start_timeout=60.):
+        self.workers = workers
+        self.max_jobs = max_jobs
+        self.max_rss = max_rss
+        self.start_timeout = start_timeout
+        self._idle = queue.Queue()
+        self._fork_lock = threading.Lock()
+
+        self._directory = tempfile.mkdtemp(prefix="occdx-")
+        self._authkey = os.urandom(16)
+        address = os.path.join(self._directory, "workers.sock")
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._listener.bind(address)
+        self._listener.listen(workers)
+        self._listener.settimeout(1.)  # check the template process is alive while waiting for a worker
+        context = _context()
+        self._template_connection, template_connection = context.Pipe()
+        self._template = context.Process(target=_template_main,
+                                         args=(template_connection, address, self._authkey, max_jobs, max_rss))
+        self._template.daemon = True
+        self._template.start()
+        template_connection.close()
+
+        for _ in range(workers):
+            self._idle.put(self._new_worker())
+
+    def _check_template(self):
+        r"""Raise a ValueError if the template process died"""
+        if not self._template.is_alive():
+            msg = "The template process died (exit code %s)" % str(self._template.exitcode)
+            logger.error(msg)
+            raise ValueError(msg)
+
+    def _accept(self, deadline):
+        r"""Wait for a worker to connect, authenticate it and return its connection
+
+        Raises
+        ------
+        ValueError
+            if the template process died or no worker connected before deadline
+
+        """
+        from multiprocessing.connection import answer_challenge, deliver_challenge
+
+        while True:
+            self._check_template()
+            try:
+                client, _ = self._listener.accept()
+                break
+            except socket.timeout:
+                if time.time() > deadline:
+                    msg = "No worker started within %g s" % self.start_timeout
+                    logger.error(msg)
+                    raise ValueError(msg)
+        try:
+            client.setblocking(True)
+            if hasattr(client, "detach"):
+                from multiprocessing.connection import Connection
+                connection = Connection(client.detach())
+            else:  # Python 2
+                from _multiprocessing import Connection
+                connection = Connection(os.dup(client.fileno()))
+        finally:
+            client.close()
+        deliver_challenge(connection, self._authkey)
+        answer_challenge(connection, self._authkey)
+        return connection
+
+    def _new_worker(self):
+        r"""Have the template process fork a worker and wait for it to connect
+
+        Raises
+        ------
+        ValueError
+            if the worker did not start within start_timeout seconds
+
+        """
+        from multiprocessing import AuthenticationError
+
+        with self._fork_lock:
+            deadline = time.time() + self.start_timeout
+            self._check_template()
+            try:
+                self._template_connection.send(True)
+                connection = self._accept(deadline)
+                ready = connection.poll(max(deadline - time.time(), 0.))
+                pid = connection.recv() if ready else None
+            except (AuthenticationError, EOFError, IOError, OSError) as e:
+                msg = "Worker start failed : %s" % str(e)
+                logger.error(msg)
+                raise ValueError(msg)
+            if pid is None:
+                connection.close()
+                msg = "No worker started within %g s" % self.start_timeout
+                logger.error(msg)
+                raise ValueError(msg)
+            return _Worker(connection, pid)
+
+    def run(self, job, timeout=None):
+        r"""Run a job on the next idle worker, waiting for one if they are all busy
+
+        Parameters
+        ----------
+        job : dict
+            input, output and format (optional) of the conversion
+        timeout : float or None
+            wall clock limit in seconds, None for no limit
+
+        Returns
+        -------
+        dict
+            reply : ok, output, error, seconds, worker
+
+        Raises
+        ------
+        ValueError
+            if a worker could not be started to run the job
+
+        """
+        worker = self._idle.get()
+        if not worker.alive:  # its replacement failed after the previous job
+            try:
+                worker = self._replace(worker)
+            except ValueError:
+                self._idle.put(worker)
+                raise
+        try:
+            return worker.run(job, timeout)
+        finally:
+            if not worker.alive:
+                try:
+                    worker = self._replace(worker)
+                except ValueError:  # retried before the next job
+                    pass
+            self._idle.put(worker)
+
+    def _replace(self, worker):
+        r"""New worker replacing a worker that is not alive"""
+        logger.info("Replacing worker %i" % worker.pid)
+        return self._new_worker()
+
+    def close(self):
+        r"""Stop the idle workers and the template process (the busy workers are stopped when their job ends)"""
+        for _ in range(self.workers):
+            try:
+                worker = self._idle.get(timeout=1.)
+            except queue.Empty:
+                break
+            worker.kill()
+        with self._fork_lock:
+            try:
+                self._template_connection.send(None)
+            except (IOError, OSError):  # the template process died
+                pass
+            self._template_connection.close()
+            self._template.join()
+            self._listener.close()
+            shutil.rmtree(self._directory, ignore_errors=True)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    r"""Reads JSON requests, one per line, and writes the JSON replies"""
+
+    def handle(self):
+        for line in iter(self.rfile.readline, b""):
+            if not line.strip():
+                continue
+            try:
+                message = json.loads(line.decode("utf-8"))
+            except ValueError as e:
+                reply = {"ok": False, "error": "invalid JSON : %s" % str(e)}
+            else:
+                reply = self.server.conversion_daemon.handle(message)
+            self.wfile.write((json.dumps(reply) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class ConversionDaemon(object):
+    r"""Conversion daemon listening on a Unix domain socket
+
+    Parameters
+    ----------
+    socket_path : str
+    workers : int or None
+        number of worker processes, None for the number of CPUs
+    max_jobs : int
+        a worker is replaced after max_jobs jobs
+    max_rss : int or None
+        a worker is replaced when its resident memory exceeds max_rss bytes, None for no limit
+
+    """
+
+    def __init__(self, socket_path, workers=None, max_jobs=100, max_rss=None):
+        self.socket_path = socket_path
+        self.workers = workers or _context().cpu_count()
+        self.max_jobs = max_jobs
+        self.max_rss = max_rss
+        self.ready = threading.Event()  # set when the daemon accepts connections
+        self._pool = None
+        self._server = None
+
+    def handle(self, message):
+        r"""Reply to a request
+
+        Parameters
+        ----------
+        message : dict
+
+        Returns
+        -------
+        dict
+
+        """
+        if not isinstance(message, dict):
+            return {"ok": False, "error": "a request is a JSON object"}
+        command = message.get("command")
+        if command == "convert":
+            if "input" not in message or "output" not in message:
+                return {"ok": False, "error": "convert requires input and output"}
+            timeout = message.get("timeout")
+            if timeout is not None and (isinstance(timeout, bool) or not isinstance(timeout, numbers.Real) or
+                                        not timeout >= 0):
+                return {"ok": False, "error": "timeout must be a non-negative number or null, not %s" %
+                        json.dumps(timeout)}
+            job = {"input": message["input"], "output": message["output"], "format": message.get("format")}
+            try:
+                return self._pool.run(job, timeout)
+            except ValueError as e:  # no worker could be started
+                return {"ok": False, "error": str(e)}
+        if command == "ping":
+            return {"ok": True, "workers": self.workers}
+        if command == "shutdown":
+            threading.Thread(target=self.shutdown).start()  # shutdown() waits for this request to end
+            return {"ok": True}
+        return {"ok": False, "error": "unknown command %s" % str(command)}
+
+    def serve_forever(self):
+        r"""Warm up, start the workers and serve until shutdown()"""
+        warm_up()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)  # left by a daemon that did not stop cleanly
+        self._pool = WorkerPool(self.workers, self.max_jobs, self.max_rss)
+        self._server = _Server(self.socket_path, _Handler)
+        self._server.conversion_daemon = self
+        logger.info("Conversion daemon listening on %s with %i workers" % (self.socket_path, self.workers))
+        self.ready.set()
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            self._pool.close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+            self.ready.clear()
+
+    def shutdown(self):
+        r"""Stop serving, from another thread than the one in serve_forever()"""
+        if self._server is not None:
+            self._server.shutdown()
+
+
+def request(socket_path, message, timeout=None):
+    r"""Send a request to a conversion daemon
+
+    Parameters
+    ----------
+    socket_path : str
+    message : dict
+    timeout : float or None
+        socket timeout in seconds, None to wait as long as needed
+
+    Returns
+    -------
+    dict
+        reply
+
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(timeout)
+    try:
+        client.connect(socket_path)
+        client.sendall((json.dumps(message) + "\n").encode("utf-8"))
+        f = client.makefile("rb")
+        try:
+            line = f.readline()
+        finally:
+            f.close()
+    finally:
+        client.close()
+    if not line:
+        msg = "The conversion daemon at %s closed the connection" % socket_path
+        logger.error(msg)
+        raise ValueError(msg)
+    return json.loads(line.decode("utf-8"))
+
+
+def convert(socket_path, input_filename, output_filename, output_format=None, timeout=None):
+    r"""Convert a file with a conversion daemon
+
+    Parameters
+    ----------
+    socket_path : str
+    input_filename : str
+    output_filename : str
+    output_format : str or None
+        format name, None to use the extension of output_filename
+    timeout : float or None
+        wall clock limit of the conversion in seconds, None for no limit
+
+    Returns
+    -------
+    str
+        output_filename
+
+    Raises
+    ------
+    ValueError
+        if the conversion failed
+
+    """
+    reply = request(socket_path, {"command": "convert", "input": os.path.abspath(input_filename),
+                                  "output": os.path.abspath(output_filename), "format": output_format,
+                                  "timeout": timeout})
+    if not reply["ok"]:
+        msg = "Conversion of %s failed : %s" % (input_filename, reply["error"])
+        logger.error(msg)
+        raise ValueError(msg)
+    return output_filename
@@ -12,8 +12,9 @@ Deals with .dat files, mostly used to define 2D foil sections
 
 import logging
 
-from OCCDataExchange.checks import check_importer_filename
+from OCCDataExchange.checks import check_importer_source
 from OCCDataExchange.extensions import dat_extensions
+from OCCDataExchange.utils import read_source
 
 logger = logging.getLogger(__name__)
 
@@ -23,8 +24,8 @@ class DatImporter(object):
 
     Parameters
     ----------
-    filename : str
-        Absolute filepath
+    filename : str, bytes, bytearray, memoryview or binary file object
+        Absolute filepath, or the content of the file
     as_3d : bool
         If True, each point has 3 elements (x, y, z=0.), if False, each point has 2 elements (x, y)
     skip_first_line : bool
@@ -34,8 +35,8 @@ class DatImporter(object):
 
     def __init__(self, filename, as_3d=False, skip_first_line=False):
 
-        check_importer_filename(filename, dat_extensions)
-        self._filename = filename
+        check_importer_source(filename, dat_extensions, compressed=True)
+        self._source = filename
         self._as_3d = as_3d
         self._skip_first_line = skip_first_line
 
@@ -48,8 +49,7 @@ class DatImporter(object):
         r"""Read the .dat file"""
 
         points = list()
-        with open(self._filename) as f:
-            lines = f.readlines()
+        lines = read_source(self._source).decode("utf-8", "replace").splitlines()
 
         if self._skip_first_line:
             lines = lines[1:]
@@ -8,3 +8,9 @@ step_extensions = ["step", "stp"]
 stl_extensions = ["stl"]
 brep_extensions = ["brep"]
 dat_extensions = ["dat"]
+ply_extensions = ["ply"]
+obj_extensions = ["obj"]
+threemf_extensions = ["3mf"]
+xbf_extensions = ["xbf"]
+gltf_extensions = ["glb"]
+archive_extensions = ["zip"]
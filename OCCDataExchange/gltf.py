@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""glTF module of OCCDataExchange
+
+Summary
+-------
+
+Export of shapes and assemblies to glTF 2.0 binary files (GLB).
+
+Each distinct part (prototype) is triangulated and stored once in the binary buffer, its instances are
+glTF nodes referencing the mesh with their own transformation. Colors become PBR materials.
+
+"""
+
+from __future__ import print_function
+
+import json
+import logging
+import struct
+
+import numpy as np
+
+from OCCDataExchange.checks import check_exporter_filename, check_overwrite, check_shape
+from OCCDataExchange.compression import open_output
+from OCCDataExchange.extensions import gltf_extensions
+from OCCDataExchange.mesh import Prototypes, mesh_shape, triangulation_arrays, trsf_to_matrix
+
+logger = logging.getLogger(__name__)
+
+
+def preload():
+    r"""Import the OpenCascade modules used by this module (see OCCDataExchange.registry.Format.preload())"""
+    from OCCDataExchange import mesh
+
+    mesh.preload()
+
+
+_GLB_MAGIC = 0x46546C67  # "glTF"
+_CHUNK_JSON = 0x4E4F534A
+_CHUNK_BIN = 0x004E4942
+_ARRAY_BUFFER = 34962
+_ELEMENT_ARRAY_BUFFER = 34963
+_FLOAT = 5126
+_UNSIGNED_SHORT = 5123
+_UNSIGNED_INT = 5125
+
+
+def _srgb_to_linear(rgb):
+    r"""Convert sRGB components (the color as displayed) to linear components (glTF color factors)"""
+    rgb = np.asarray(rgb, dtype=np.float64)
+    return np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+
+
+def _pad(data, pad_byte):
+    r"""Pad data to a multiple of 4 bytes"""
+    return data + pad_byte * (-len(data) % 4)
+
+
+class GltfExporter(object):
+    r"""glTF 2.0 binary (GLB) exporter
+
+    Parameters
+    ----------
+    filename : str
+    line_deflection : float
+        linear deflection for meshing the shapes
+    is_relative : bool
+        if True the deflection used for each edge is line_deflection * size of the edge
+    angular_deflection : float
+    in_parallel : bool
+        if True the faces are triangulated in parallel
+    scale : float
+        scale from the model unit to the meter, the unit of glTF. The default (0.001) is for models in millimeters.
+
+    """
+
+    def __init__(self, filename, line_deflection=0.9, is_relative=False, angular_deflection=0.5, in_parallel=False,
+                 scale=0.001):
+        logger.info("GltfExporter instantiated with filename : %s" % filename)
+
+        check_exporter_filename(filename, gltf_extensions, compressed=True)
+        check_overwrite(filename)
+
+        self._filename = filename
+        self._mesh_parameters = (line_deflection, is_relative, angular_deflection, in_parallel)
+        self._scale = scale
+
+        self._prototypes = Prototypes()  # shapes meshed once
+        self._nodes = list()  # (name, parent node, prototype index or None, rgb or None, gp_Trsf or None)
+
+    def add_shape(self, a_shape, rgb=None, name=None):
+        r"""Add a shape to export
+
+        Shapes sharing the same topology with different locations (instances) are meshed and stored once.
+
+        Parameters
+        ----------
+        a_shape : TopoDS.TopoDS_Shape
+        rgb : tuple(float, float, float) or None
+            color, in [0, 1]
+        name : str or None
+
+        """
+        check_shape(a_shape)  # raises an exception if the shape is not valid
+        location = a_shape.Location()
+        trsf = None if location.IsIdentity() else location.Transformation()
+        self._nodes.append((name, None, self._prototypes.add(a_shape), rgb, trsf))
+
+    def add_assembly(self, assembly):
+        r"""Add an assembly tree
+
+        The glTF node hierarchy follows the assembly tree. Parts without a color use the color of their
+        closest colored ancestor.
+
+        Parameters
+        ----------
+        assembly : OCCDataExchange.step_ocaf.AssemblyTable or OCCDataExchange.step_ocaf.StepOcafImporter
+
+        """
+        table = getattr(assembly, "table", assembly)
+        prototypes = [self._prototypes.add(prototype) for prototype in table.prototypes]
+        first_node = len(self._nodes)
+        colors = list()
+        for i in range(len(table)):
+            parent = table.parent(i)
+            rgb = table.rgb(i)
+            if rgb is None and parent != -1:
+                rgb = colors[parent]
+            colors.append(rgb)
+            location = table.locations[i]
+            self._nodes.append((table.names[i] or None,
+                                None if parent == -1 else first_node + parent,
+                                None if table.is_assembly(i) else prototypes[table.prototype(i)],
+                                rgb,
+                                None if location.IsIdentity() else location.Transformation()))
+
+    def _build(self):
+        r"""glTF JSON document and binary buffer"""
+        line_deflection, is_relative, angular_deflection, in_parallel = self._mesh_parameters
+        buffer_chunks, buffer_views, accessors = list(), list(), list()
+        offset = 0
+
+        def add_view(data, target):
+            r"""Append data to the buffer as a new buffer view, returns the view index"""
+            buffer_chunks.append(_pad(data, b"\x00"))
+            buffer_views.append({"buffer": 0, "byteOffset": offset, "byteLength": len(data), "target": target})
+            return len(buffer_views) - 1, offset + len(buffer_chunks[-1])
+
+        # one POSITION and one indices accessor per prototype
+        primitives = list()
+        for prototype in self._prototypes:
+            mesh_shape(prototype, line_deflection, is_relative, angular_deflection, in_parallel)
+            vertices, triangles = triangulation_arrays(prototype)
+            if len(triangles) == 0:
+                primitives.append(None)
+                continue
+            vertices = vertices.astype(np.float32)
+            if len(vertices) < 2 ** 16:
+                indices, component_type = triangles.astype(np.uint16), _UNSIGNED_SHORT
+            else:
+                indices, component_type = triangles.astype(np.uint32), _UNSIGNED_INT
+
+            view, offset = add_view(vertices.astype("<f4").tobytes(), _ARRAY_BUFFER)
+            accessors.append({"bufferView": view, "componentType": _FLOAT, "count": len(vertices), "type": "VEC3",
+                              "min": vertices.min(axis=0).tolist(), "max": vertices.max(axis=0).tolist()})
+            view, offset = add_view(indices.astype(indices.dtype.newbyteorder("<")).tobytes(), _ELEMENT_ARRAY_BUFFER)
+            accessors.append({"bufferView": view, "componentType": component_type, "count": indices.size,
+                              "type": "SCALAR"})
+            primitives.append({"attributes": {"POSITION": len(accessors) - 2}, "indices": len(accessors) - 1})
+
+        # one glTF mesh per (prototype, color) pair, sharing the prototype accessors
+        materials, material_indices = list(), dict()
+        meshes, mesh_indices = list(), dict()
+        nodes, root_children = list(), list()
+        for name, parent, prototype, rgb, trsf in self._nodes:
+            node = dict()
+            if name:
+                node["name"] = name
+            if trsf is not None:
+                node["matrix"] = trsf_to_matrix(trsf).T.ravel().tolist()  # column major
+            if prototype is not None and primitives[prototype] is not None:
+                rgb = None if rgb is None else tuple(rgb)
+                if (prototype, rgb) not in mesh_indices:
+                    primitive = dict(primitives[prototype])
+                    if rgb is not None:
+                        if rgb not in material_indices:
+                            material_indices[rgb] = len(materials)
+                            materials.append({"pbrMetallicRoughness": {
+                                "baseColorFactor": _srgb_to_linear(rgb).tolist() + [1.],
+                                "metallicFactor": 0.,
+                                "roughnessFactor": 0.5}})
+                        primitive["material"] = material_indices[rgb]
+                    mesh_indices[(prototype, rgb)] = len(meshes)
+                    meshes.append({"primitives": [primitive]})
+                node["mesh"] = mesh_indices[(prototype, rgb)]
+            if parent is None:
+                root_children.append(len(nodes))
+            else:
+                nodes[parent].setdefault("children", list()).append(len(nodes))
+            nodes.append(node)
+
+        # the root node converts the model unit to meters
+        nodes.append({"name": "root", "scale": [self._scale] * 3, "children": root_children})
+
+        document = {"asset": {"version": "2.0", "generator": "OCCDataExchange"},
+                    "scene": 0,
+                    "scenes": [{"nodes": [len(nodes) - 1]}],
+                    "nodes": nodes}
+        if meshes:
+            document["meshes"] = meshes
+            document["accessors"] = accessors
+            document["bufferViews"] = buffer_views
+            document["buffers"] = [{"byteLength": offset}]
+        if materials:
+            document["materials"] = materials
+        return document, b"".join(buffer_chunks)
+
+    def write_file(self):
+        r"""Write file"""
+        document, binary = self._build()
+        json_chunk = _pad(json.dumps(document, separators=(",", ":")).encode("utf-8"), b" ")
+        length = 12 + 8 + len(json_chunk) + (8 + len(binary) if binary else 0)
+        with open_output(self._filename) as f:
+            f.write(struct.pack("<III", _GLB_MAGIC, 2, length))
+            f.write(struct.pack("<II", len(json_chunk), _CHUNK_JSON))
+            f.write(json_chunk)
+            if binary:
+                f.write(struct.pack("<II", len(binary), _CHUNK_BIN))
+                f.write(binary)
+        logger.info("Wrote GLB file : %i mesh(es), %i node(s)" % (len(document.get("meshes", [])),
+                                                                 len(document["nodes"])))
@@ -5,81 +5,277 @@ r"""IGES module of OCCDataExchange"""
 
 from __future__ import print_function
 
+import collections
+import importlib
 import logging
+import multiprocessing
+import time
 
-from OCC import BRep
-from OCC import IFSelect
-from OCC import IGESControl
-from OCC import TopoDS
-from OCCUtils.types_lut import topo_lut
-
-from OCCDataExchange.checks import check_importer_filename, check_exporter_filename, check_overwrite, check_shape
+from OCCDataExchange.checks import check_importer_source, check_exporter_filename, check_exporter_has_filename, \
+    check_overwrite, check_shape
+from OCCDataExchange.compression import codec_from_extension, write_compressed
 from OCCDataExchange.extensions import iges_extensions
+from OCCDataExchange.sessions import release_transfer_results, static_parameters
+from OCCDataExchange.utils import CachedCompound, ShapeList, is_filename, read_source, source_filename, source_name, \
+    write_through_file, written_bytes
 
 logger = logging.getLogger(__name__)
 
+_controller_initialized = False
+
+
+def init_controller():
+    r"""Initialize the IGES controller
+
+    The IGES controller registration is process wide : it is done once per process
+    instead of once per written file.
+
+    """
+    from OCC import IGESControl
+
+    global _controller_initialized
+    if not _controller_initialized:
+        IGESControl.IGESControl_Controller().Init()
+        _controller_initialized = True
+        logger.info("IGES controller initialized")
+
+
+def preload():
+    r"""Import the OpenCascade modules used by this module and initialize the IGES controller
+
+    See OCCDataExchange.registry.Format.preload().
+    """
+    from OCCDataExchange import brep, sessions, sewing, utils
+
+    for module_name in ["OCC.IFSelect", "OCC.IGESControl", "OCC.IGESData", "OCCUtils.types_lut"]:
+        importlib.import_module(module_name)
+    brep.preload()
+    sessions.preload()
+    sewing.preload()
+    utils.preload()
+    init_controller()
+
+
+def _entity_levels(entity):
+    r"""Levels of an IGES entity
+
+    Parameters
+    ----------
+    entity : IGESData.IGESData_IGESEntity
+
+    Returns
+    -------
+    set[int]
+
+    """
+    from OCC import IGESData
+
+    if entity.DefLevel() == IGESData.IGESData_DefSeveral:
+        level_list = entity.LevelList().GetObject()
+        return set(level_list.LevelNumber(i) for i in range(1, level_list.NbLevelNumbers() + 1))
+    return {entity.Level()}
+
 
 class IgesImporter(object):
     r"""IGES importer
 
     Parameters
     ----------
-    filename : str
-        Absolute filepath
+    filename : str, bytes, bytearray, memoryview or binary file object
+        Absolute filepath, or the content of the file. The IGESControl reader only reads files :
+        in memory data and compressed files (e.g. part.igs.gz, see OCCDataExchange.compression)
+        are written to a temporary file while it is loaded.
+    transfer : bool
+        If True (default), all the roots are transferred when the importer is instantiated.
+        If False, nothing is read until read_file() or iter_shapes() is called.
+    levels : list[int] or None
+        Only transfer the roots on one of these levels. None (default) for all levels.
+    entity_types : list[int] or None
+        Only transfer the roots of these IGES entity types (e.g. [128, 144] for
+        B-spline surfaces and trimmed surfaces). None (default) for all types.
+    only_visible : bool
+        If True, blanked (hidden) entities are not transferred
 
     """
 
-    def __init__(self, filename=None):
-        logger.info("IgesImporter instantiated with filename : %s" % filename)
+    def __init__(self, filename=None, transfer=True, levels=None, entity_types=None, only_visible=False):
+        logger.info("IgesImporter instantiated with filename : %s" % source_name(filename))
 
-        check_importer_filename(filename, iges_extensions)
+        check_importer_source(filename, iges_extensions, compressed=True)
 
-        self._shapes = list()
+        self._shapes = ShapeList()
+        self._compound = CachedCompound(self._shapes)
         self.nb_shapes = 0
-        self._filename = filename
+        # a file object is read once, the data may be loaded again by iter_shapes()
+        self._source = filename if is_filename(filename) else read_source(filename)
+        self._levels = None if levels is None else set(levels)
+        self._entity_types = None if entity_types is None else set(entity_types)
+        self._only_visible = only_visible
 
-        logger.info("Reading file ....")
-        self.read_file()
+        if transfer:
+            logger.info("Reading file ....")
+            self.read_file()
 
-    def read_file(self):
-        """
-        Read the IGES file and stores the result in a list of TopoDS.TopoDS_Shape
+    def _load(self):
+        r"""Load the IGES file in an IGESControl_Reader, ready for transfer
+
+        Returns
+        -------
+        tuple(IGESControl.IGESControl_Reader, int)
+            The reader and the number of roots for transfer
 
         """
+        from OCC import IFSelect
+        from OCC import IGESControl
+
         igescontrol_reader = IGESControl.IGESControl_Reader()
-        status = igescontrol_reader.ReadFile(self._filename)
+        # reader level equivalent of read.iges.onlyvisible, used by NbRootsForTransfer()
+        igescontrol_reader.SetReadVisible(self._only_visible)
+        with source_filename(self._source, iges_extensions[0]) as path:
+            status = igescontrol_reader.ReadFile(path)
         igescontrol_reader.PrintCheckLoad(False, IFSelect.IFSelect_ItemsByEntity)
         nb_roots = igescontrol_reader.NbRootsForTransfer()
         logger.info("Nb roots for transfer : %i" % nb_roots)
 
         if status == IFSelect.IFSelect_RetDone and nb_roots != 0:
-
             igescontrol_reader.PrintCheckTransfer(False, IFSelect.IFSelect_ItemsByEntity)
+            return igescontrol_reader, nb_roots
+        else:
+            msg = "Status is not IFSelect.IFSelect_RetDone or No root for transfer"
+            logger.error(msg)
+            raise ValueError(msg)
+
+    def _selected_roots(self, igescontrol_reader, nb_roots):
+        r"""Numbers of the roots matching the levels and entity types filters
+
+        Returns
+        -------
+        list[int]
+
+        """
+        if self._levels is None and self._entity_types is None:
+            return list(range(1, nb_roots + 1))
+
+        from OCC import IGESData
+
+        roots = list()
+        for n in range(1, nb_roots + 1):
+            entity = IGESData.Handle_IGESData_IGESEntity.DownCast(igescontrol_reader.RootForTransfer(n))
+            if entity.IsNull():
+                continue
+            entity = entity.GetObject()
+            if self._entity_types is not None and entity.TypeNumber() not in self._entity_types:
+                continue
+            if self._levels is not None and self._levels.isdisjoint(_entity_levels(entity)):
+                continue
+            roots.append(n)
+        logger.info("%i root(s) selected out of %i" % (len(roots), nb_roots))
+        return roots
+
+    def read_file(self):
+        """
+        Read the IGES file and stores the result in a list of TopoDS.TopoDS_Shape
+
+        """
+        from OCCUtils.types_lut import topo_lut
+
+        igescontrol_reader, nb_roots = self._load()
+        roots = self._selected_roots(igescontrol_reader, nb_roots)
+
+        if len(roots) == nb_roots:
             ok = igescontrol_reader.TransferRoots()
             logger.info("TransferRoots status : %i" % ok)
-            self.nb_shapes = igescontrol_reader.NbShapes()
+        else:
+            for n in roots:
+                if not igescontrol_reader.TransferOneRoot(n):
+                    logger.warning("Root %i could not be transferred" % n)
+            nb_roots = igescontrol_reader.NbShapes()
+        self.nb_shapes = igescontrol_reader.NbShapes()
 
-            for n in range(1, nb_roots + 1):
+        for n in range(1, nb_roots + 1):
 
-                logger.debug("Root index %i" % n)
+            logger.debug("Root index %i" % n)
 
-                # for i in range(1, self.nb_shapes + 1):
-                a_shape = igescontrol_reader.Shape(n)
-                if a_shape.IsNull():
-                    msg = "At least one shape in IGES cannot be transferred"
-                    logger.warning(msg)
-                else:
-                    self._shapes.append(a_shape)
-                    logger.debug("Appending a %s to list of shapes" %
-                                 topo_lut[a_shape.ShapeType()])
-        else:
-            msg = "Status is not IFSelect.IFSelect_RetDone or No root for transfer"
-            logger.error(msg)
-            raise ValueError(msg)
+            # for i in range(1, self.nb_shapes + 1):
+            a_shape = igescontrol_reader.Shape(n)
+            if a_shape.IsNull():
+                msg = "At least one shape in IGES cannot be transferred"
+                logger.warning(msg)
+            else:
+                self._shapes.append(a_shape)
+                logger.debug("Appending a %s to list of shapes" %
+                             topo_lut[a_shape.ShapeType()])
+
+    def iter_shapes(self):
+        r"""Transfer the roots one by one and yield their shapes
+
+        Nothing is stored by the importer : once the caller drops a shape, its memory can be
+        reclaimed before the next root is transferred. The shapes property is not populated.
+
+        Yields
+        ------
+        TopoDS.TopoDS_Shape
+
+        """
+        from OCCUtils.types_lut import topo_lut
+
+        igescontrol_reader, nb_roots = self._load()
+
+        for n in self._selected_roots(igescontrol_reader, nb_roots):
+            logger.debug("Root index %i" % n)
+            if not igescontrol_reader.TransferOneRoot(n):
+                logger.warning("Root %i could not be transferred" % n)
+                continue
+            a_shape = igescontrol_reader.Shape(igescontrol_reader.NbShapes())
+            release_transfer_results(igescontrol_reader)
+            if a_shape.IsNull():
+                msg = "At least one shape in IGES cannot be transferred"
+                logger.warning(msg)
+            else:
+                logger.debug("Transferred a %s" % topo_lut[a_shape.ShapeType()])
+                yield a_shape
+
+    def sew(self, tolerance=1e-6, processes=1):
+        r"""Sew the imported faces into shells, and into solids where the shells are closed
+
+        The faces are grouped into connected components that are sewn independently,
+        see OCCDataExchange.sewing. The shapes list is replaced by the result.
+
+        Parameters
+        ----------
+        tolerance : float
+        processes : int or None
+            number of processes sewing components in parallel.
+            1 (default) sews in the current process, None uses as many processes as CPUs.
+
+        Returns
+        -------
+        list[TopoDS.TopoDS_Shape]
+            solids, shells that are not closed and faces that could not be sewn
+
+        """
+        from OCCDataExchange.sewing import sew
+        self._shapes[:] = sew(self._shapes, tolerance, processes)
+        return self._shapes
+
+    @property
+    def version(self):
+        r"""IGES version of the file, read from its Global section
+
+        Returns
+        -------
+        str or None
+            e.g. "5.3", None if the version flag is missing or unknown
+
+        """
+        from OCCDataExchange.iges_index import read_global_section, version_from_global_section
+        return version_from_global_section(read_global_section(self._source))
 
     @property
     def compound(self):
-        """ Create and returns a compound from the _shapes list
+        r"""Compound of the shapes
+
+        The compound is built on first access and cached until the shapes list is modified.
 
         Returns
         -------
@@ -94,19 +290,14 @@ class IgesImporter(object):
         24 edges
 
         """
-        # Create a compound
-        compound = TopoDS.TopoDS_Compound()
-        brep_builder = BRep.BRep_Builder()
-        brep_builder.MakeCompound(compound)
-        # Populate the compound
-        for shape in self._shapes:
-            brep_builder.Add(compound, shape)
-        return compound
+        return self._compound.get()
 
     @property
     def shapes(self):
         r"""Shapes getter
 
+        The list is returned as is, not copied : modifying it invalidates the cached compound.
+
         Returns
         -------
         list[TopoDS.TopoDS_Shape]
@@ -120,25 +311,36 @@ class IgesExporter(object):
 
     Parameters
     ----------
-    filename : str
+    filename : str or None
+        None for an exporter that only writes to streams (write_to()) or bytes (to_bytes())
     format : ["5.1", "5.3"]
+    unit : str
+        unit of the written file (e.g. "MM", "M", "IN")
+
+    Notes
+    -----
+    The unit and brep mode are given to the IGESControl_Writer and scoped while writing,
+    they do not depend on (nor change) the process wide write.iges.* parameters.
 
     """
 
-    def __init__(self, filename, format="5.1"):
+    def __init__(self, filename=None, format="5.1", unit="MM"):
         logger.info("IgesExporter instantiated with filename : %s" % filename)
         logger.info("IgesExporter format : %s" % format)
+        logger.info("IgesExporter unit : %s" % unit)
 
         if format not in ["5.1", "5.3"]:
             msg = "Unsupported IGES format"
             logger.error(msg)
             raise ValueError(msg)
 
-        check_exporter_filename(filename, iges_extensions)
-        check_overwrite(filename)
+        if filename is not None:
+            check_exporter_filename(filename, iges_extensions, compressed=True)
+            check_overwrite(filename)
 
         self._shapes = list()
         self._filename = filename
+        self._unit = unit
 
         if format == "5.3":
             self._brepmode = True
@@ -157,20 +359,49 @@ class IgesExporter(object):
         self._shapes.append(a_shape)
 
     def write_file(self):
-        r"""Write file
+        r"""Write file"""
+        check_exporter_has_filename(self._filename)
+        if codec_from_extension(self._filename) is not None:
+            write_compressed(self.write_to, self._filename)
+        else:
+            self._write(self._filename)
+
+    def write_to(self, stream):
+        r"""Write the IGES file content to a binary stream (e.g. a socket file or a buffer)
+
+        The IGESControl writer only writes files : the content goes through a temporary file.
+
+        Parameters
+        ----------
+        stream : binary file like object
+
+        """
+        write_through_file(self._write, iges_extensions[0], stream)
+
+    def to_bytes(self):
+        r"""IGES file content
 
         Returns
         -------
-        bool
+        bytes
 
         """
-        IGESControl.IGESControl_Controller().Init()
-        iges_writer = IGESControl.IGESControl_Writer("write.iges.unit", self._brepmode)
-        for shape in self._shapes:
-            iges_writer.AddShape(shape)
-        iges_writer.ComputeModel()
+        return written_bytes(self.write_to)
+
+    def _write(self, filename):
+        r"""Write the IGES file to filename"""
+        from OCC import IFSelect
+        from OCC import IGESControl
+
+        init_controller()
+        with static_parameters({"write.iges.unit": self._unit,
+                                "write.iges.brep.mode": int(self._brepmode)}):
+            iges_writer = IGESControl.IGESControl_Writer(self._unit, self._brepmode)
+            for shape in self._shapes:
+                iges_writer.AddShape(shape)
+            iges_writer.ComputeModel()
 
-        write_status = iges_writer.Write(self._filename)
+            write_status = iges_writer.Write(filename)
 
         if write_status == IFSelect.IFSelect_RetDone:
             logger.info("IGES file write successful.")
@@ -178,3 +409,87 @@ class IgesExporter(object):
             msg = "An error occurred while writing the IGES file"
             logger.error(msg)
             raise ValueError(msg)
+
+
+BatchResult = collections.namedtuple("BatchResult", ["filename", "ok", "error", "seconds"])
+BatchResult.__doc__ = r"""Outcome of the export of one file of a batch (error is None when ok is True)"""
+
+
+def _serialize_jobs(jobs, format, unit):
+    r"""Serialize the shapes of the jobs in the BREP format, one at a time
+
+    Yields
+    ------
+    tuple(str, str, str, str) or BatchResult
+        the job for _export_brep_string(), or the failed result of a shape that could not be serialized
+
+    """
+    from OCCDataExchange.brep import shape_to_string
+
+    for shape, filename in jobs:
+        try:
+            brep_string = shape_to_string(shape)
+        except Exception as e:
+            logger.error("Export to %s failed : %s" % (filename, str(e)))
+            yield BatchResult(filename, False, "%s: %s" % (e.__class__.__name__, str(e)), 0.)
+        else:
+            yield brep_string, filename, format, unit
+
+
+def _export_brep_string(job):
+    r"""Export one shape, serialized in the BREP format, to an IGES file (process pool worker)"""
+    from OCCDataExchange.brep import shape_from_string
+
+    if isinstance(job, BatchResult):  # the shape could not be serialized
+        return job
+    brep_string, filename, format, unit = job
+    start = time.time()
+    try:
+        exporter = IgesExporter(filename, format, unit)
+        exporter.add_shape(shape_from_string(brep_string))
+        exporter.write_file()
+    except Exception as e:
+        logger.error("Export to %s failed : %s" % (filename, str(e)))
+        return BatchResult(filename, False, "%s: %s" % (e.__class__.__name__, str(e)), time.time() - start)
+    return BatchResult(filename, True, None, time.time() - start)
+
+
+def export_batch(jobs, format="5.1", unit="MM", processes=None, chunksize=8):
+    r"""Export many shapes to individual IGES files
+
+    The IGES controller is initialized once per worker process, not once per file.
+
+    Parameters
+    ----------
+    jobs : iterable of tuple(TopoDS_Shape, str)
+        (shape, filename) pairs
+    format : ["5.1", "5.3"]
+    unit : str
+    processes : int or None
+        number of worker processes, None for as many as CPUs, 1 to export in the current process
+    chunksize : int
+        number of jobs sent to a worker at once
+
+    Returns
+    -------
+    list[BatchResult]
+        one result per job, in the order of jobs, a failed one for an invalid shape
+
+    """
+    # Shapes cannot be pickled, they are sent to the workers in the BREP format
+    tasks = _serialize_jobs(jobs, format, unit)
+
+    if processes == 1:
+        init_controller()
+        results = [_export_brep_string(task) for task in tasks]
+    else:
+        pool = multiprocessing.Pool(processes, initializer=init_controller)
+        try:
+            results = list(pool.imap(_export_brep_string, tasks, chunksize))
+        finally:
+            pool.close()
+            pool.join()
+
+    nb_failed = len([result for result in results if not result.ok])
+    logger.info("%i IGES file(s) exported, %i failure(s)" % (len(results) - nb_failed, nb_failed))
+    return results
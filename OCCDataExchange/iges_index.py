@@ -0,0 +1,508 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""iges_index module of OCCDataExchange
+
+Summary
+-------
+
+Reads the Start, Global and Directory Entry sections of an IGES file without OpenCascade.
+
+An IGES file is made of 80 columns records, column 73 holds the section letter (S, G, D, P or T).
+Each entity has 2 Directory Entry (DE) records made of 8 columns fields. The DE records of the
+whole file are parsed at once with NumPy from a memory-mapped file, which gives the entity types,
+forms, levels, visibility ... of very large files in seconds.
+
+"""
+
+from __future__ import print_function
+
+import logging
+import mmap
+import re
+
+import numpy as np
+
+from OCCDataExchange.checks import check_importer_filename, check_importer_source
+from OCCDataExchange.extensions import iges_extensions
+from OCCDataExchange.utils import open_source, source_name
+
+logger = logging.getLogger(__name__)
+
+# Global section parameters, in the order of the IGES specification
+GLOBAL_FIELDS = ["parameter_delimiter",
+                 "record_delimiter",
+                 "sender_product_id",
+                 "file_name",
+                 "native_system_id",
+                 "preprocessor_version",
+                 "integer_bits",
+                 "single_precision_magnitude",
+                 "single_precision_significance",
+                 "double_precision_magnitude",
+                 "double_precision_significance",
+                 "receiver_product_id",
+                 "model_space_scale",
+                 "unit_flag",
+                 "unit_name",
+                 "max_line_weight_gradations",
+                 "max_line_weight",
+                 "file_date",
+                 "min_resolution",
+                 "max_coordinate",
+                 "author",
+                 "organization",
+                 "version_flag",
+                 "drafting_standard_flag",
+                 "model_date",
+                 "application_protocol"]
+
+# Global section version flag -> IGES version
+IGES_VERSIONS = {1: "1.0",
+                 2: "ANSI Y14.26M-1981",
+                 3: "2.0",
+                 4: "3.0",
+                 5: "ANSI Y14.26M-1987",
+                 6: "4.0",
+                 7: "ANSI Y14.26M-1989",
+                 8: "5.0",
+                 9: "5.1",
+                 10: "5.2",
+                 11: "5.3"}
+
+# One row per entity
+ENTITY_DTYPE = np.dtype([("de", np.int32),  # sequence number of the first DE record
+                         ("type", np.int16),
+                         ("form", np.int16),
+                         ("pointer", np.int32),  # sequence number of the first parameter data record
+                         ("param_lines", np.int32),
+                         ("structure", np.int32),
+                         ("line_font", np.int32),
+                         ("level", np.int32),  # negative : pointer to a definition levels property
+                         ("view", np.int32),
+                         ("transform", np.int32),
+                         ("label_display", np.int32),
+                         ("blank", np.int8),  # 0 : visible, 1 : blanked
+                         ("subordinate", np.int8),
+                         ("use", np.int8),
+                         ("hierarchy", np.int8),
+                         ("line_weight", np.int32),
+                         ("color", np.int32),
+                         ("label", "S8"),
+                         ("subscript", np.int32)])
+
+_SECTION_COLUMN = 72
+_SEQUENCE_COLUMNS = slice(73, 80)
+_HOLLERITH = re.compile(r" *(\d+)H")
+
+
+def _parse_integers(fields):
+    r"""Parse right justified integer fields
+
+    Parameters
+    ----------
+    fields : numpy.ndarray
+        uint8 array whose last axis holds the characters of the fields
+
+    Returns
+    -------
+    numpy.ndarray
+        int64 array with the shape of fields minus its last axis. Blank fields are 0.
+
+    """
+    values = np.zeros(fields.shape[:-1], dtype=np.int64)
+    for c in range(fields.shape[-1]):
+        column = fields[..., c]
+        is_digit = (column >= 48) & (column <= 57)
+        values = np.where(is_digit, values * 10 + column - 48, values)
+    values[(fields == ord("-")).any(axis=-1)] *= -1
+    return values
+
+
+def _entities_table(de_records):
+    r"""Build the entities table from the DE records
+
+    Parameters
+    ----------
+    de_records : numpy.ndarray
+        (2 * number of entities, >= 80) uint8 array of the DE records, in file order
+
+    Returns
+    -------
+    numpy.ndarray
+        array of ENTITY_DTYPE
+
+    """
+    if len(de_records) % 2 != 0:
+        msg = "Odd number of Directory Entry records"
+        logger.error(msg)
+        raise ValueError(msg)
+
+    first = de_records[0::2]
+    second = de_records[1::2]
+    first_fields = _parse_integers(first[:, :72].reshape(-1, 9, 8))
+    second_fields = _parse_integers(second[:, :72].reshape(-1, 9, 8))
+    status = first_fields[:, 8]
+
+    entities = np.zeros(len(first), dtype=ENTITY_DTYPE)
+    entities["de"] = _parse_integers(first[:, _SEQUENCE_COLUMNS])
+    entities["type"] = first_fields[:, 0]
+    entities["pointer"] = first_fields[:, 1]
+    entities["structure"] = first_fields[:, 2]
+    entities["line_font"] = first_fields[:, 3]
+    entities["level"] = first_fields[:, 4]
+    entities["view"] = first_fields[:, 5]
+    entities["transform"] = first_fields[:, 6]
+    entities["label_display"] = first_fields[:, 7]
+    entities["blank"] = status // 1000000
+    entities["subordinate"] = (status // 10000) % 100
+    entities["use"] = (status // 100) % 100
+    entities["hierarchy"] = status % 100
+    entities["line_weight"] = second_fields[:, 1]
+    entities["color"] = second_fields[:, 2]
+    entities["param_lines"] = second_fields[:, 3]
+    entities["form"] = second_fields[:, 4]
+    entities["label"] = np.ascontiguousarray(second[:, 56:64]).view("S8").ravel()
+    entities["subscript"] = second_fields[:, 8]
+
+    if (entities["type"] != second_fields[:, 0]).any():
+        msg = "Directory Entry records are not paired"
+        logger.error(msg)
+        raise ValueError(msg)
+    return entities
+
+
+def parse_global_section(text):
+    r"""Parse the Global section
+
+    Parameters
+    ----------
+    text : str
+        Concatenation of columns 1-72 of the Global section records
+
+    Returns
+    -------
+    dict
+        GLOBAL_FIELDS name -> str. Hollerith strings are decoded, other values are left as written.
+
+    """
+    parameter_delimiter, record_delimiter = ",", ";"
+
+    # The 2 first parameters define the delimiters, they are empty when the defaults are used
+    i = 0
+    if text.startswith("1H"):
+        parameter_delimiter = text[2]
+        i = 3
+    i += 1
+    if text.startswith("1H", i):
+        record_delimiter = text[i + 2]
+        i += 3
+    values = [parameter_delimiter, record_delimiter]
+    if text[i:i + 1] == record_delimiter:
+        i = len(text)
+    i += 1
+
+    while i < len(text):
+        hollerith = _HOLLERITH.match(text, i)
+        if hollerith is not None:
+            start = hollerith.end()
+            value = text[start:start + int(hollerith.group(1))]
+            i = start + len(value)
+            ends = [text.find(d, i) for d in (parameter_delimiter, record_delimiter)]
+            i = min([e for e in ends if e >= 0] or [len(text)])
+        else:
+            ends = [text.find(d, i) for d in (parameter_delimiter, record_delimiter)]
+            end = min([e for e in ends if e >= 0] or [len(text)])
+            value = text[i:end].strip()
+            i = end
+        values.append(value)
+        if i >= len(text) or text[i] == record_delimiter:
+            break
+        i += 1
+
+    values += [""] * (len(GLOBAL_FIELDS) - len(values))
+    return dict(zip(GLOBAL_FIELDS, values))
+
+
+def _section_text(records):
+    r"""Concatenate columns 1-72 of a sequence of records (bytes)"""
+    return b"".join(record[:_SECTION_COLUMN].ljust(_SECTION_COLUMN) for record in records).decode("latin-1")
+
+
+def _iter_records(buf, start=0):
+    r"""Yield the records of buf (a bytes like object) without their line terminators"""
+    size = len(buf)
+    while start < size:
+        end = buf.find(b"\n", start)
+        if end == -1:
+            end = size
+        yield buf[start:end].rstrip(b"\r")
+        start = end + 1
+
+
+def read_global_section(filename):
+    r"""Read the Global section of an IGES file
+
+    Only the Start and Global sections are read, this is cheap whatever the size of the file.
+
+    Parameters
+    ----------
+    filename : str, bytes, bytearray, memoryview or binary file object
+
+    Returns
+    -------
+    dict
+        See parse_global_section()
+
+    """
+    check_importer_source(filename, iges_extensions, compressed=True)
+    records = list()
+    with open_source(filename) as f:
+        for record in f:
+            section = record[_SECTION_COLUMN:_SECTION_COLUMN + 1]
+            if section == b"G":
+                records.append(record)
+            elif section != b"S":
+                break
+    if len(records) == 0:
+        msg = "No Global section in %s" % source_name(filename)
+        logger.error(msg)
+        raise ValueError(msg)
+    return parse_global_section(_section_text(records))
+
+
+def version_from_global_section(global_section):
+    r"""IGES version from a parsed Global section
+
+    Parameters
+    ----------
+    global_section : dict
+
+    Returns
+    -------
+    str or None
+        e.g. "5.3", None if the version flag is missing or unknown
+
+    """
+    try:
+        return IGES_VERSIONS.get(int(global_section["version_flag"]))
+    except ValueError:
+        return None
+
+
+class IgesIndex(object):
+    r"""Index of the entities of an IGES file
+
+    Parameters
+    ----------
+    filename : str
+        Absolute filepath
+
+    Examples
+    --------
+    >>> index = IgesIndex("hull.igs")
+    >>> index.version
+    '5.3'
+    >>> index.count_by_type()
+    {110: 1234, 126: 9876, 128: 2048, 144: 2048}
+    >>> visible_surfaces = index.select(types=[128], visible_only=True)
+
+    """
+
+    def __init__(self, filename):
+        logger.info("IgesIndex instantiated with filename : %s" % filename)
+        check_importer_filename(filename, iges_extensions)
+        self._filename = filename
+        self._start = ""
+        self._global_section = dict()
+        self._entities = np.zeros(0, dtype=ENTITY_DTYPE)
+
+        self.read_file()
+
+    def read_file(self):
+        r"""Index the Start, Global and Directory Entry sections"""
+        with open(self._filename, "rb") as f:
+            try:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                msg = "Empty IGES file"
+                logger.error(msg)
+                raise ValueError(msg)
+            try:
+                self._index(buf)
+            finally:
+                try:
+                    buf.close()
+                except BufferError:
+                    pass  # arrays viewing the map are still referenced (by a traceback), released with them
+
+        if len(self._global_section) == 0:
+            msg = "No Global section in %s" % self._filename
+            logger.error(msg)
+            raise ValueError(msg)
+        logger.info("%i entities indexed" % len(self._entities))
+
+    def _index(self, buf):
+        r"""Index the memory-mapped file"""
+        records = self._fixed_length_records(buf)
+        if records is None:
+            logger.info("Records do not have a fixed length, falling back to line by line parsing")
+            self._read_records(buf)
+        else:
+            self._read_fixed_length_records(records)
+
+    @staticmethod
+    def _fixed_length_records(buf):
+        r"""View buf as a 2D uint8 array of records, or None if the records do not have a fixed length"""
+        end_of_first = buf.find(b"\n")
+        if end_of_first <= _SECTION_COLUMN:
+            return None
+        record_length = end_of_first + 1
+        line_terminator = 2 if buf[end_of_first - 1:end_of_first] == b"\r" else 1
+        size = len(buf)
+        if size % record_length not in (0, record_length - line_terminator):
+            return None
+        # A last record without line terminator is ignored : it belongs to the Terminate section
+        records = np.frombuffer(buf, dtype=np.uint8, count=(size // record_length) * record_length)
+        records = records.reshape(-1, record_length)
+        if not np.isin(records[:, _SECTION_COLUMN], np.frombuffer(b"SGDPT", dtype=np.uint8)).all():
+            return None
+        return records
+
+    def _read_fixed_length_records(self, records):
+        r"""Index records given as a 2D uint8 array"""
+        sections = records[:, _SECTION_COLUMN]
+        start = np.flatnonzero(sections == ord("S"))
+        glob = np.flatnonzero(sections == ord("G"))
+        de = np.flatnonzero(sections == ord("D"))
+
+        self._start = _section_text([records[i].tobytes() for i in start])
+        if len(glob) > 0:
+            self._global_section = parse_global_section(_section_text([records[i].tobytes() for i in glob]))
+        self._entities = _entities_table(records[de])
+
+    def _read_records(self, buf):
+        r"""Index records of any length, one at a time"""
+        start, glob, de = list(), list(), list()
+        for record in _iter_records(buf):
+            section = record[_SECTION_COLUMN:_SECTION_COLUMN + 1]
+            if section == b"D":
+                de.append(record[:80].ljust(80))
+            elif section == b"P":
+                continue
+            elif section == b"G":
+                glob.append(record)
+            elif section == b"S":
+                start.append(record)
+        self._start = _section_text(start)
+        if len(glob) > 0:
+            self._global_section = parse_global_section(_section_text(glob))
+        if len(de) > 0:
+            self._entities = _entities_table(np.frombuffer(b"".join(de), dtype=np.uint8).reshape(-1, 80))
+
+    @property
+    def start(self):
+        r"""Start section (human readable prologue)
+
+        Returns
+        -------
+        str
+
+        """
+        return self._start.rstrip()
+
+    @property
+    def global_section(self):
+        r"""Global section
+
+        Returns
+        -------
+        dict
+            See parse_global_section()
+
+        """
+        return self._global_section
+
+    @property
+    def version(self):
+        r"""IGES version (e.g. "5.3") or None if unknown
+
+        Returns
+        -------
+        str
+
+        """
+        return version_from_global_section(self._global_section)
+
+    @property
+    def entities(self):
+        r"""Entities table, one row per entity, in file order
+
+        Returns
+        -------
+        numpy.ndarray
+            array of ENTITY_DTYPE
+
+        """
+        return self._entities
+
+    @property
+    def nb_entities(self):
+        r"""Number of entities
+
+        Returns
+        -------
+        int
+
+        """
+        return len(self._entities)
+
+    def count_by_type(self):
+        r"""Number of entities of each type
+
+        Returns
+        -------
+        dict
+            entity type -> number of entities
+
+        """
+        types, counts = np.unique(self._entities["type"], return_counts=True)
+        return dict(zip(types.tolist(), counts.tolist()))
+
+    def levels(self):
+        r"""Levels used by the entities
+
+        Returns
+        -------
+        numpy.ndarray
+            sorted unique levels. Negative values are pointers to definition levels properties.
+
+        """
+        return np.unique(self._entities["level"])
+
+    def select(self, types=None, levels=None, visible_only=False):
+        r"""Entities matching all the criteria
+
+        Parameters
+        ----------
+        types : list[int] or None
+            entity types, None for all types
+        levels : list[int] or None
+            levels, None for all levels
+        visible_only : bool
+            If True, blanked entities are excluded
+
+        Returns
+        -------
+        numpy.ndarray
+            array of ENTITY_DTYPE
+
+        """
+        mask = np.ones(len(self._entities), dtype=bool)
+        if types is not None:
+            mask &= np.isin(self._entities["type"], types)
+        if levels is not None:
+            mask &= np.isin(self._entities["level"], levels)
+        if visible_only:
+            mask &= self._entities["blank"] == 0
+        return self._entities[mask]
@@ -0,0 +1,358 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""isolation module of OCCDataExchange
+
+Summary
+-------
+
+Runs a function in a child process with a wall clock, a memory and a CPU time limit.
+
+OpenCascade translators can loop forever, exhaust the memory or crash the interpreter on a bad file.
+Running each translation in its own child process turns those failures into an Outcome
+with an error message, instead of a hung, killed or crashed caller.
+
+On POSIX systems the child is forked : modules already imported by the parent (e.g. OCC)
+are not imported again.
+
+import_isolated() reads a file this way and returns its shape serialized in the BREP format,
+import_many() reads many files, in parallel, past the ones that fail.
+
+"""
+
+from __future__ import print_function
+
+import collections
+import logging
+import math
+import multiprocessing
+import os
+import signal
+import sys
+import time
+import traceback
+
+logger = logging.getLogger(__name__)
+
+_CPU_LIMIT_SIGNAL = getattr(signal, "SIGXCPU", None)  # received by a process at its CPU time limit
+
+Outcome = collections.namedtuple("Outcome", ["ok", "value", "error", "seconds", "reason"])
+Outcome.__doc__ = r"""Result of an isolated call : the value returned when ok is True, an error message otherwise
+
+reason is None when ok is True, otherwise the kind of failure : "error" (an exception), "timeout",
+"memory", "cpu" (CPU time limit) or "crash" (the process died without a result).
+"""
+
+
+def _context():
+    r"""multiprocessing context forking the children where available"""
+    if hasattr(multiprocessing, "get_context") and sys.platform != "win32":
+        return multiprocessing.get_context("fork")
+    return multiprocessing
+
+
+def _limit_memory(max_memory):
+    r"""Limit the address space of the current process to max_memory bytes (POSIX only)"""
+    try:
+        import resource
+    except ImportError:
+        logger.warning("Memory limits are not supported on this platform")
+        return
+    resource.setrlimit(resource.RLIMIT_AS, (max_memory, max_memory))
+
+
+def _limit_cpu(max_cpu):
+    r"""Limit the CPU time of the current process to max_cpu seconds (POSIX only)
+
+    The process receives SIGXCPU at the limit, and SIGKILL one second later if it survives.
+    """
+    try:
+        import resource
+    except ImportError:
+        logger.warning("CPU time limits are not supported on this platform")
+        return
+    seconds = int(math.ceil(max_cpu))
+    resource.setrlimit(resource.RLIMIT_CPU, (seconds, seconds + 1))
+
+
+def _child(connection, func, args, kwargs, max_memory, max_cpu=None):
+    r"""Child process body : call func and send (ok, value, error, reason) to the parent"""
+    if max_memory is not None:
+        _limit_memory(max_memory)
+    if max_cpu is not None:
+        _limit_cpu(max_cpu)
+    try:
+        message = (True, func(*args, **kwargs), None, None)
+    except MemoryError:
+        message = (False, None, "memory limit exceeded", "memory")
+    except BaseException as e:
+        logger.debug(traceback.format_exc())
+        error = "%s: %s" % (e.__class__.__name__, str(e))
+        message = (False, None, error, "memory" if "OutOfMemory" in error else "error")
+    try:
+        connection.send(message)
+    except Exception as e:  # e.g. a value that cannot be pickled
+        connection.send((False, None, "cannot send the result to the parent : %s" % str(e), "error"))
+    connection.close()
+
+
+class IsolatedCall(object):
+    r"""A function call running in a child process
+
+    Parameters
+    ----------
+    func : callable
+    args : tuple
+    kwargs : dict or None
+    timeout : float or None
+        wall clock limit in seconds, None for no limit
+    max_memory : int or None
+        address space limit of the child process in bytes, None for no limit
+    max_cpu : float or None
+        CPU time limit of the child process in seconds, None for no limit
+
+    """
+
+    def __init__(self, func, args=(), kwargs=None, timeout=None, max_memory=None, max_cpu=None):
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs or dict()
+        self.timeout = timeout
+        self.max_memory = max_memory
+        self.max_cpu = max_cpu
+        self._process = None
+        self._connection = None
+        self._start = None
+        self.outcome = None
+
+    def start(self):
+        r"""Start the child process"""
+        context = _context()
+        self._connection, child_connection = context.Pipe(duplex=False)
+        self._process = context.Process(target=_child,
+                                        args=(child_connection, self._func, self._args, self._kwargs, self.max_memory,
+                                              self.max_cpu))
+        self._process.daemon = True
+        self._start = time.time()
+        self._process.start()
+        child_connection.close()
+        return self
+
+    @property
+    def connection(self):
+        r"""Connection the result arrives on, for multiprocessing.connection.wait()"""
+        return self._connection
+
+    @property
+    def deadline(self):
+        r"""Time at which the call times out, None if there is no time limit"""
+        return None if self.timeout is None else self._start + self.timeout
+
+    def _finish(self, ok, value, error, reason):
+        self._connection.close()
+        self._process.join()
+        self.outcome = Outcome(ok, value, error, time.time() - self._start, reason)
+        return self.outcome
+
+    def poll(self):
+        r"""Outcome of the call if it is finished (or timed out, the child is then killed), None otherwise
+
+        Returns
+        -------
+        Outcome or None
+
+        """
+        if self.outcome is not None:
+            return self.outcome
+        if self._connection.poll():
+            try:
+                ok, value, error, reason = self._connection.recv()
+            except EOFError:  # the child died without sending anything
+                self._process.join()
+                exitcode = self._process.exitcode
+                reason = "crash"
+                if exitcode is not None and exitcode < 0:
+                    error = "process killed by signal %i" % -exitcode
+                    if self.max_cpu is not None and -exitcode == _CPU_LIMIT_SIGNAL:
+                        error, reason = "CPU time limit of %g s exceeded" % self.max_cpu, "cpu"
+                else:
+                    error = "process exited with code %s" % str(exitcode)
+                return self._finish(False, None, error, reason)
+            return self._finish(ok, value, error, reason)
+        if self.deadline is not None and time.time() >= self.deadline:
+            self.kill()
+            return self._finish(False, None, "timeout after %g s" % self.timeout, "timeout")
+        return None
+
+    def kill(self):
+        r"""Kill the child process"""
+        if self._process is not None and self._process.is_alive():
+            try:
+                os.kill(self._process.pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+            except OSError:
+                pass
+
+    def wait(self):
+        r"""Wait for the outcome of the call
+
+        Returns
+        -------
+        Outcome
+
+        """
+        while self.poll() is None:
+            remaining = None if self.deadline is None else max(0., self.deadline - time.time())
+            self._connection.poll(remaining)
+        return self.outcome
+
+
+def run_isolated(func, args=(), kwargs=None, timeout=None, max_memory=None, max_cpu=None):
+    r"""Call func(*args, **kwargs) in a child process
+
+    func, args, kwargs and the returned value must be picklable where the child is not forked.
+
+    Parameters
+    ----------
+    func : callable
+    args : tuple
+    kwargs : dict or None
+    timeout : float or None
+        wall clock limit in seconds, None for no limit
+    max_memory : int or None
+        address space limit of the child process in bytes, None for no limit
+    max_cpu : float or None
+        CPU time limit of the child process in seconds, None for no limit
+
+    Returns
+    -------
+    Outcome
+
+    """
+    return IsolatedCall(func, args, kwargs, timeout, max_memory, max_cpu).start().wait()
+
+
+def run_many(calls, workers=None):
+    r"""Run isolated calls, at most workers at the same time, and yield them as they finish
+
+    Parameters
+    ----------
+    calls : iterable of IsolatedCall
+        not started yet, consumed lazily
+    workers : int or None
+        None for the number of CPUs
+
+    Yields
+    ------
+    IsolatedCall
+        finished calls (see the outcome attribute), in the order they finish
+
+    """
+    try:
+        from multiprocessing.connection import wait
+    except ImportError:  # Python 2
+        def wait(connections, timeout):
+            r"""Poll the connections until one is ready or timeout expires"""
+            end = None if timeout is None else time.time() + timeout
+            while not any(connection.poll() for connection in connections):
+                if end is not None and time.time() >= end:
+                    return
+                time.sleep(0.01)
+
+    workers = workers or multiprocessing.cpu_count()
+    calls = iter(calls)
+    running = list()
+    exhausted = False
+    while running or not exhausted:
+        while not exhausted and len(running) < workers:
+            try:
+                running.append(next(calls).start())
+            except StopIteration:
+                exhausted = True
+        if not running:
+            break
+        deadlines = [call.deadline for call in running if call.deadline is not None]
+        timeout = max(0., min(deadlines) - time.time()) if deadlines else None
+        wait([call.connection for call in running], timeout)
+        still_running = list()
+        for call in running:
+            if call.poll() is None:
+                still_running.append(call)
+            else:
+                yield call
+        running = still_running
+
+
+def read_brep_string(filename, format=None):
+    r"""Read the shape of a file and serialize it in the BREP format
+
+    Parameters
+    ----------
+    filename : str
+    format : str or None
+        format name or extension, None to detect it (see OCCDataExchange.registry)
+
+    Returns
+    -------
+    str
+
+    """
+    from OCCDataExchange.brep import shape_to_string
+    from OCCDataExchange.registry import read_shape
+
+    return shape_to_string(read_shape(filename, format))
+
+
+def import_isolated(filename, format=None, timeout=None, max_memory=None, max_cpu=None):
+    r"""Read the shape of a file in a child process
+
+    A file that makes the translator loop, exhaust the memory or crash gives a failed Outcome
+    instead of hanging or killing the caller.
+
+    Parameters
+    ----------
+    filename : str
+    format : str or None
+        format name or extension, None to detect it (see OCCDataExchange.registry)
+    timeout : float or None
+        wall clock limit in seconds, None for no limit
+    max_memory : int or None
+        address space limit of the child process in bytes, None for no limit
+    max_cpu : float or None
+        CPU time limit of the child process in seconds, None for no limit
+
+    Returns
+    -------
+    Outcome
+        the value is the shape serialized in the BREP format (see OCCDataExchange.brep.shape_from_string())
+
+    """
+    return run_isolated(read_brep_string, (filename, format), timeout=timeout, max_memory=max_memory,
+                        max_cpu=max_cpu)
+
+
+def import_many(filenames, workers=None, format=None, timeout=None, max_memory=None, max_cpu=None):
+    r"""Read the shapes of files in parallel child processes, at most workers at the same time
+
+    Parameters
+    ----------
+    filenames : iterable of str
+    workers : int or None
+        None for the number of CPUs
+    format, timeout, max_memory, max_cpu
+        see import_isolated()
+
+    Yields
+    ------
+    tuple(str, Outcome)
+        filename and outcome (see import_isolated()), in the order the reads finish
+
+    """
+    def calls():
+        for filename in filenames:
+            call = IsolatedCall(read_brep_string, (filename, format), timeout=timeout, max_memory=max_memory,
+                                max_cpu=max_cpu)
+            call.filename = filename
+            yield call
+
+    for call in run_many(calls(), workers):
+        yield call.filename, call.outcome
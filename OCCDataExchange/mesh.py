@@ -0,0 +1,292 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""mesh module of OCCDataExchange
+
+Summary
+-------
+
+Triangulation of shapes and extraction of the face triangulations (Poly_Triangulation) to NumPy arrays,
+the common ground of the mesh exporters (STL aside, which OpenCascade writes itself).
+
+"""
+
+from __future__ import print_function
+
+import importlib
+import itertools
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def preload():
+    r"""Import the OpenCascade modules used by this module (see OCCDataExchange.registry.Format.preload())"""
+    for module_name in ["OCC.BRep", "OCC.BRepBuilderAPI", "OCC.BRepMesh", "OCC.TopAbs", "OCC.TopExp", "OCC.TopLoc",
+                        "OCC.TopoDS", "OCC.gp"]:
+        importlib.import_module(module_name)
+
+
+def mesh_shape(a_shape, line_deflection=0.9, is_relative=False, angular_deflection=0.5, in_parallel=False):
+    r"""Triangulate the faces of a shape
+
+    The triangulations are stored in the faces : shapes sharing their faces (instances of a same part)
+    are triangulated once.
+
+    Parameters
+    ----------
+    a_shape : TopoDS.TopoDS_Shape
+    line_deflection : float
+        linear deflection for meshing the shape
+    is_relative : bool
+        if True the deflection used for each edge is line_deflection * size of the edge
+    angular_deflection : float
+    in_parallel : bool
+        if True the faces are triangulated in parallel
+
+    """
+    from OCC.BRepMesh import BRepMesh_IncrementalMesh
+
+    mesh = BRepMesh_IncrementalMesh(a_shape, line_deflection, is_relative, angular_deflection, in_parallel)
+    mesh.Perform()
+
+
+def trsf_to_matrix(trsf):
+    r"""4x4 matrix of a gp_Trsf
+
+    Parameters
+    ----------
+    trsf : gp.gp_Trsf
+
+    Returns
+    -------
+    numpy.ndarray
+        (4, 4) float64 array
+
+    """
+    matrix = np.eye(4)
+    for row in range(3):
+        for column in range(4):
+            matrix[row, column] = trsf.Value(row + 1, column + 1)
+    return matrix
+
+
+class Prototypes(object):
+    r"""Shapes meshed once by the exporters that write instances : the shapes sharing their topology (TShape)
+    with different locations share their prototype, the shape without location
+
+    Examples
+    --------
+    >>> prototypes = Prototypes()
+    >>> prototypes.add(a_shape) == prototypes.add(a_shape.Moved(a_location))
+    True
+
+    """
+
+    def __init__(self):
+        self._shapes = list()
+        self._buckets = dict()  # hash code -> prototype indices
+
+    def add(self, a_shape):
+        r"""Index of the prototype of a shape, added if the shape shares its topology with no prototype yet
+
+        Parameters
+        ----------
+        a_shape : TopoDS.TopoDS_Shape
+
+        Returns
+        -------
+        int
+
+        """
+        from OCC import TopLoc
+
+        unlocated = a_shape.Located(TopLoc.TopLoc_Location())
+        bucket = self._buckets.setdefault(unlocated.HashCode(2 ** 31 - 1), list())
+        for index in bucket:
+            if self._shapes[index].IsPartner(unlocated):
+                return index
+        self._shapes.append(unlocated)
+        bucket.append(len(self._shapes) - 1)
+        return len(self._shapes) - 1
+
+    def __len__(self):
+        return len(self._shapes)
+
+    def __getitem__(self, index):
+        return self._shapes[index]
+
+    def __iter__(self):
+        return iter(self._shapes)
+
+
+def _face_arrays(face):
+    r"""Vertices and triangles of the triangulation of a face, None if the face is not triangulated
+
+    pythonocc 0.16 has no array accessor for the nodes (TColgp_Array1OfPnt) and the triangles
+    (Poly_Array1OfTriangle) of a Poly_Triangulation : they are read once per node and once per triangle
+    (two wrapper calls each), straight into preallocated NumPy arrays. The transformation, the orientation,
+    the welding and the writing are vectorized.
+    """
+    from OCC import BRep
+    from OCC import TopAbs
+    from OCC import TopLoc
+
+    location = TopLoc.TopLoc_Location()
+    h_triangulation = BRep.BRep_Tool().Triangulation(face, location)
+    if h_triangulation.IsNull():
+        return None
+    triangulation = h_triangulation.GetObject()
+
+    nodes = triangulation.Nodes()
+    vertices = np.fromiter(itertools.chain.from_iterable(nodes.Value(i).Coord()
+                                                         for i in range(nodes.Lower(), nodes.Upper() + 1)),
+                           dtype=np.float64, count=3 * nodes.Length()).reshape(-1, 3)
+    triangles = triangulation.Triangles()
+    indices = np.fromiter(itertools.chain.from_iterable(triangles.Value(i).Get()
+                                                        for i in range(triangles.Lower(), triangles.Upper() + 1)),
+                          dtype=np.int64, count=3 * triangles.Length()).reshape(-1, 3) - nodes.Lower()
+
+    if not location.IsIdentity():
+        matrix = trsf_to_matrix(location.Transformation())
+        vertices = vertices.dot(matrix[:3, :3].T) + matrix[:3, 3]
+    if face.Orientation() == TopAbs.TopAbs_REVERSED:
+        indices = indices[:, ::-1]
+    return vertices, indices
+
+
+def triangulation_arrays(a_shape):
+    r"""Vertices and triangles of the triangulations of the faces of a shape
+
+    The shape must have been triangulated (see mesh_shape()). Faces without triangulation are skipped.
+    The vertices are not shared between faces, see weld_vertices().
+
+    Parameters
+    ----------
+    a_shape : TopoDS.TopoDS_Shape
+
+    Returns
+    -------
+    tuple(numpy.ndarray, numpy.ndarray)
+        (n, 3) float64 array of vertices, (m, 3) int64 array of triangles (0 based vertex indices,
+        counterclockwise when seen from outside the material)
+
+    """
+    from OCC import TopAbs
+    from OCC import TopExp
+    from OCC import TopoDS
+
+    all_vertices, all_triangles = list(), list()
+    offset = 0
+    explorer = TopExp.TopExp_Explorer(a_shape, TopAbs.TopAbs_FACE)
+    while explorer.More():
+        arrays = _face_arrays(TopoDS.topods_Face(explorer.Current()))
+        if arrays is not None:
+            vertices, triangles = arrays
+            all_vertices.append(vertices)
+            all_triangles.append(triangles + offset)
+            offset += len(vertices)
+        explorer.Next()
+
+    if len(all_vertices) == 0:
+        return np.zeros((0, 3), dtype=np.float64), np.zeros((0, 3), dtype=np.int64)
+    return np.concatenate(all_vertices), np.concatenate(all_triangles)
+
+
+def weld_vertices(vertices, triangles, tolerance=0.):
+    r"""Merge coincident vertices and drop the triangles that become degenerate
+
+    Parameters
+    ----------
+    vertices : numpy.ndarray
+        (n, 3) float array
+    triangles : numpy.ndarray
+        (m, 3) int array
+    tolerance : float
+        vertices are merged if they fall in the same cell of a grid of this size.
+        0 (default) merges identical vertices only, which is enough for triangulations of faces
+        sharing their edges.
+
+    Returns
+    -------
+    tuple(numpy.ndarray, numpy.ndarray)
+        (p, 3) float64 array of vertices, (q, 3) int64 array of triangles
+
+    """
+    vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    triangles = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+    if len(vertices) == 0:
+        return vertices, triangles
+
+    keys = vertices if tolerance == 0. else np.round(vertices / tolerance).astype(np.int64)
+    _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    triangles = inverse.ravel()[triangles]
+    degenerate = ((triangles[:, 0] == triangles[:, 1]) | (triangles[:, 1] == triangles[:, 2]) |
+                  (triangles[:, 2] == triangles[:, 0]))
+    return vertices[first], triangles[~degenerate]
+
+
+def shape_to_arrays(a_shape, line_deflection=0.9, is_relative=False, angular_deflection=0.5, in_parallel=False,
+                    tolerance=0.):
+    r"""Indexed (welded) triangle mesh of a shape
+
+    Parameters
+    ----------
+    a_shape : TopoDS.TopoDS_Shape
+    line_deflection, is_relative, angular_deflection, in_parallel
+        see mesh_shape()
+    tolerance : float
+        see weld_vertices()
+
+    Returns
+    -------
+    tuple(numpy.ndarray, numpy.ndarray)
+        (n, 3) float64 array of vertices, (m, 3) int64 array of triangles
+
+    """
+    mesh_shape(a_shape, line_deflection, is_relative, angular_deflection, in_parallel)
+    vertices, triangles = triangulation_arrays(a_shape)
+    return weld_vertices(vertices, triangles, tolerance)
+
+
+def arrays_to_shape(vertices, triangles):
+    r"""Shell of planar triangular faces sharing their vertices and edges
+
+    Parameters
+    ----------
+    vertices : numpy.ndarray
+        (n, 3) float array
+    triangles : numpy.ndarray
+        (m, 3) int array
+
+    Returns
+    -------
+    TopoDS.TopoDS_Shell
+
+    """
+    from OCC import BRep
+    from OCC import BRepBuilderAPI
+    from OCC import TopoDS
+    from OCC import gp
+
+    vertices, triangles = weld_vertices(vertices, triangles)
+    topo_vertices = [BRepBuilderAPI.BRepBuilderAPI_MakeVertex(gp.gp_Pnt(x, y, z)).Vertex()
+                     for x, y, z in vertices.tolist()]
+    edges = dict()
+
+    def edge(i, j):
+        r"""Edge between vertices i and j, built once"""
+        key = (i, j) if i < j else (j, i)
+        if key not in edges:
+            edges[key] = BRepBuilderAPI.BRepBuilderAPI_MakeEdge(topo_vertices[key[0]], topo_vertices[key[1]]).Edge()
+        return edges[key]
+
+    builder = BRep.BRep_Builder()
+    shell = TopoDS.TopoDS_Shell()
+    builder.MakeShell(shell)
+    for a, b, c in triangles.tolist():
+        wire = BRepBuilderAPI.BRepBuilderAPI_MakeWire(edge(a, b), edge(b, c), edge(c, a)).Wire()
+        builder.Add(shell, BRepBuilderAPI.BRepBuilderAPI_MakeFace(wire, True).Face())
+    return shell
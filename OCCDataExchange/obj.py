@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""OBJ module of OCCDataExchange
+
+Summary
+-------
+
+Indexed triangle meshes in the Wavefront OBJ format (geometry only : v and f statements).
+
+"""
+
+from __future__ import print_function
+
+import codecs
+import logging
+
+import numpy as np
+
+from OCCDataExchange.checks import check_importer_source, check_exporter_filename, check_overwrite, check_shape
+from OCCDataExchange.compression import open_output
+from OCCDataExchange.extensions import obj_extensions
+from OCCDataExchange.mesh import arrays_to_shape, shape_to_arrays
+from OCCDataExchange.utils import open_source, source_name
+
+logger = logging.getLogger(__name__)
+
+
+def preload():
+    r"""Import the OpenCascade modules used by this module (see OCCDataExchange.registry.Format.preload())"""
+    from OCCDataExchange import mesh
+
+    mesh.preload()
+
+
+def write_obj(filename, vertices, triangles):
+    r"""Write an indexed triangle mesh to an OBJ file
+
+    Parameters
+    ----------
+    filename : str
+    vertices : numpy.ndarray
+        (n, 3) float array
+    triangles : numpy.ndarray
+        (m, 3) int array of 0 based vertex indices
+
+    """
+    with open_output(filename) as f:
+        f.write(b"# OCCDataExchange\n")
+        np.savetxt(f, np.asarray(vertices, dtype=np.float64).reshape(-1, 3), fmt="v %.9g %.9g %.9g")
+        np.savetxt(f, np.asarray(triangles, dtype=np.int64).reshape(-1, 3) + 1, fmt="f %d %d %d")
+
+
+def read_obj(filename):
+    r"""Read the vertices and faces of an OBJ file
+
+    Faces with more than 3 vertices are triangulated as fans, negative (relative) indices are resolved.
+    Texture coordinates and normals indices (f v/vt/vn) are ignored.
+
+    Parameters
+    ----------
+    filename : str, bytes, bytearray, memoryview or binary file object
+
+    Returns
+    -------
+    tuple(numpy.ndarray, numpy.ndarray)
+        (n, 3) float64 array of vertices, (m, 3) int64 array of triangles
+
+    """
+    vertices, triangles = list(), list()
+    with open_source(filename) as f:
+        for line in codecs.getreader("utf-8")(f, errors="replace"):
+            if line.startswith("v "):
+                vertices.append(line.split()[1:4])
+            elif line.startswith("f "):
+                polygon = [int(word.split("/")[0]) for word in line.split()[1:]]
+                # OBJ indices are 1 based, negative indices are relative to the last vertex
+                polygon = [i - 1 if i > 0 else len(vertices) + i for i in polygon]
+                triangles.extend((polygon[0], polygon[k], polygon[k + 1]) for k in range(1, len(polygon) - 1))
+    return (np.array(vertices, dtype=np.float64).reshape(-1, 3),
+            np.array(triangles, dtype=np.int64).reshape(-1, 3))
+
+
+class ObjImporter(object):
+    r"""OBJ importer
+
+    Parameters
+    ----------
+    filename : str, bytes, bytearray, memoryview or binary file object
+
+    """
+
+    def __init__(self, filename):
+        logger.info("ObjImporter instantiated with filename : %s" % source_name(filename))
+
+        check_importer_source(filename, obj_extensions, compressed=True)
+        self._source = filename
+        self._vertices = None
+        self._triangles = None
+        self._shape = None
+
+        self.read_file()
+
+    def read_file(self):
+        r"""Read the OBJ file"""
+        self._vertices, self._triangles = read_obj(self._source)
+        self._shape = None
+        logger.info("%i vertices, %i triangles" % (len(self._vertices), len(self._triangles)))
+
+    @property
+    def vertices(self):
+        r"""(n, 3) float64 array of vertices"""
+        return self._vertices
+
+    @property
+    def triangles(self):
+        r"""(m, 3) int64 array of triangles"""
+        return self._triangles
+
+    @property
+    def shape(self):
+        r"""Shell of the triangles, built on first access"""
+        if self._shape is None:
+            self._shape = arrays_to_shape(self._vertices, self._triangles)
+        return self._shape
+
+
+class ObjExporter(object):
+    r"""A TopoDS_Shape to OBJ exporter
+
+    The shape is triangulated and the vertices shared by the faces are welded.
+
+    Parameters
+    ----------
+    filename : str
+    line_deflection : float
+        linear deflection for meshing the shape (default is 0.9)
+    is_relative : bool
+        if True the deflection used for each edge is line_deflection * size of the edge
+    angular_deflection : float
+    in_parallel : bool
+        if True the shape is meshed in parallel
+    tolerance : float
+        vertex welding tolerance, 0 (default) welds identical vertices only
+
+    """
+
+    def __init__(self, filename, line_deflection=0.9, is_relative=False, angular_deflection=0.5, in_parallel=False,
+                 tolerance=0.):
+        logger.info("ObjExporter instantiated with filename : %s" % filename)
+
+        check_exporter_filename(filename, obj_extensions, compressed=True)
+        check_overwrite(filename)
+
+        self._shape = None  # only one shape can be exported
+        self._filename = filename
+        self._mesh_parameters = (line_deflection, is_relative, angular_deflection, in_parallel, tolerance)
+
+    def set_shape(self, a_shape):
+        r"""Set the shape to export (only a single shape can be exported)
+
+        Parameters
+        ----------
+        a_shape : TopoDS.TopoDS_Shape
+
+        """
+        check_shape(a_shape)  # raises an exception if the shape is not valid
+        self._shape = a_shape
+
+    def write_file(self):
+        r"""Write file"""
+        vertices, triangles = shape_to_arrays(self._shape, *self._mesh_parameters)
+        write_obj(self._filename, vertices, triangles)
+        logger.info("Wrote OBJ file : %i vertices, %i triangles" % (len(vertices), len(triangles)))
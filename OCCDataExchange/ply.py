@@ -0,0 +1,323 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""PLY module of OCCDataExchange
+
+Summary
+-------
+
+Indexed triangle meshes in the PLY (Stanford polygon) format.
+Files are written in binary little endian, ascii and binary files are read.
+
+"""
+
+from __future__ import print_function
+
+import logging
+
+import numpy as np
+
+from OCCDataExchange.checks import check_importer_source, check_exporter_filename, check_overwrite, check_shape
+from OCCDataExchange.compression import open_output
+from OCCDataExchange.extensions import ply_extensions
+from OCCDataExchange.mesh import arrays_to_shape, shape_to_arrays
+from OCCDataExchange.utils import read_source, source_name
+
+logger = logging.getLogger(__name__)
+
+
+def preload():
+    r"""Import the OpenCascade modules used by this module (see OCCDataExchange.registry.Format.preload())"""
+    from OCCDataExchange import mesh
+
+    mesh.preload()
+
+
+_PLY_TYPES = {"char": "i1", "int8": "i1",
+              "uchar": "u1", "uint8": "u1",
+              "short": "i2", "int16": "i2",
+              "ushort": "u2", "uint16": "u2",
+              "int": "i4", "int32": "i4",
+              "uint": "u4", "uint32": "u4",
+              "float": "f4", "float32": "f4",
+              "double": "f8", "float64": "f8"}
+
+_BYTE_ORDERS = {"binary_little_endian": "<", "binary_big_endian": ">", "ascii": "="}
+
+
+def write_ply(filename, vertices, triangles):
+    r"""Write an indexed triangle mesh to a binary little endian PLY file
+
+    Parameters
+    ----------
+    filename : str
+    vertices : numpy.ndarray
+        (n, 3) float array
+    triangles : numpy.ndarray
+        (m, 3) int array of 0 based vertex indices
+
+    """
+    vertices = np.ascontiguousarray(vertices, dtype="<f4").reshape(-1, 3)
+    faces = np.empty(len(triangles), dtype=[("count", "u1"), ("indices", "<i4", (3,))])
+    faces["count"] = 3
+    faces["indices"] = triangles
+    header = ("ply\n"
+              "format binary_little_endian 1.0\n"
+              "comment OCCDataExchange\n"
+              "element vertex %i\n"
+              "property float x\n"
+              "property float y\n"
+              "property float z\n"
+              "element face %i\n"
+              "property list uchar int vertex_indices\n"
+              "end_header\n" % (len(vertices), len(faces)))
+    with open_output(filename) as f:
+        f.write(header.encode("ascii"))
+        f.write(vertices.tobytes())
+        f.write(faces.tobytes())
+
+
+def _parse_header(data):
+    r"""Format, elements and offset of the body of a PLY file
+
+    Returns
+    -------
+    tuple(str, list, int)
+        format, [(element name, count, [(property name, type or (count type, item type))])], body offset
+
+    """
+    end = data.find(b"end_header")
+    if not data.startswith(b"ply") or end == -1:
+        msg = "Not a PLY file"
+        logger.error(msg)
+        raise ValueError(msg)
+    body = data.find(b"\n", end) + 1
+    file_format, elements = None, list()
+    for line in data[:end].decode("ascii").splitlines():
+        words = line.split()
+        if len(words) == 0:
+            continue
+        if words[0] == "format":
+            file_format = words[1]
+        elif words[0] == "element":
+            elements.append((words[1], int(words[2]), list()))
+        elif words[0] == "property":
+            if words[1] == "list":
+                elements[-1][2].append((words[4], (_PLY_TYPES[words[2]], _PLY_TYPES[words[3]])))
+            else:
+                elements[-1][2].append((words[2], _PLY_TYPES[words[1]]))
+    if file_format not in _BYTE_ORDERS:
+        msg = "Unsupported PLY format %s" % file_format
+        logger.error(msg)
+        raise ValueError(msg)
+    return file_format, elements, body
+
+
+def _fan(polygons):
+    r"""Triangulate polygons (lists of vertex indices) as fans"""
+    return [(polygon[0], polygon[k], polygon[k + 1]) for polygon in polygons for k in range(1, len(polygon) - 1)]
+
+
+def _read_binary_element(data, offset, count, properties, byte_order):
+    r"""Read a binary element
+
+    Returns
+    -------
+    tuple(dict, int)
+        property name -> array (or list of polygons for a list property), offset after the element
+
+    """
+    list_properties = [name for name, dtype in properties if isinstance(dtype, tuple)]
+    if len(list_properties) == 0:
+        dtype = np.dtype([(name, byte_order + dtype) for name, dtype in properties])
+        values = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+        return {name: values[name] for name, _ in properties}, offset + count * dtype.itemsize
+
+    # fast path : a single list property of triangles
+    if len(properties) == 1:
+        name, (count_type, item_type) = properties[0]
+        dtype = np.dtype([("count", byte_order + count_type), ("items", byte_order + item_type, (3,))])
+        if offset + count * dtype.itemsize <= len(data):
+            values = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+            if (values["count"] == 3).all():
+                return {name: values["items"]}, offset + count * dtype.itemsize
+
+    # general case, one row at a time
+    result = dict((name, list()) for name, _ in properties)
+    for _ in range(count):
+        for name, dtype in properties:
+            if isinstance(dtype, tuple):
+                count_dtype, item_dtype = np.dtype(byte_order + dtype[0]), np.dtype(byte_order + dtype[1])
+                nb_items = int(np.frombuffer(data, dtype=count_dtype, count=1, offset=offset)[0])
+                offset += count_dtype.itemsize
+                result[name].append(np.frombuffer(data, dtype=item_dtype, count=nb_items, offset=offset).tolist())
+                offset += nb_items * item_dtype.itemsize
+            else:
+                scalar_dtype = np.dtype(byte_order + dtype)
+                result[name].append(np.frombuffer(data, dtype=scalar_dtype, count=1, offset=offset)[0])
+                offset += scalar_dtype.itemsize
+    return result, offset
+
+
+def _read_ascii_elements(text, elements):
+    r"""Read the elements of an ascii body"""
+    lines = iter(text.splitlines())
+    result = dict()
+    for element, count, properties in elements:
+        values = dict((name, list()) for name, _ in properties)
+        for _ in range(count):
+            words = next(lines).split()
+            position = 0
+            for name, dtype in properties:
+                if isinstance(dtype, tuple):
+                    nb_items = int(words[position])
+                    values[name].append([int(word) for word in words[position + 1:position + 1 + nb_items]])
+                    position += 1 + nb_items
+                else:
+                    values[name].append(float(words[position]))
+                    position += 1
+        result[element] = values
+    return result
+
+
+def read_ply(filename):
+    r"""Read the triangles of a PLY file
+
+    Polygons with more than 3 vertices are triangulated as fans.
+
+    Parameters
+    ----------
+    filename : str, bytes, bytearray, memoryview or binary file object
+
+    Returns
+    -------
+    tuple(numpy.ndarray, numpy.ndarray)
+        (n, 3) float64 array of vertices, (m, 3) int64 array of triangles
+
+    Raises
+    ------
+    ValueError
+        if the file is not a PLY file or has no vertex element
+
+    """
+    data = read_source(filename)
+    file_format, elements, offset = _parse_header(data)
+
+    if file_format == "ascii":
+        values = _read_ascii_elements(data[offset:].decode("ascii"), elements)
+    else:
+        values = dict()
+        for element, count, properties in elements:
+            values[element], offset = _read_binary_element(data, offset, count, properties,
+                                                           _BYTE_ORDERS[file_format])
+
+    if "vertex" not in values:
+        msg = "No vertex element in %s" % source_name(filename)
+        logger.error(msg)
+        raise ValueError(msg)
+    vertex = values["vertex"]
+    vertices = np.column_stack([np.asarray(vertex[axis], dtype=np.float64) for axis in "xyz"])
+
+    triangles = np.zeros((0, 3), dtype=np.int64)
+    face = values.get("face", dict())
+    for name in ("vertex_indices", "vertex_index"):
+        if name in face:
+            polygons = face[name]
+            if isinstance(polygons, np.ndarray):
+                triangles = polygons.astype(np.int64)
+            elif len(polygons) > 0:
+                triangles = np.array(_fan(polygons), dtype=np.int64).reshape(-1, 3)
+    return vertices, triangles
+
+
+class PlyImporter(object):
+    r"""PLY importer
+
+    Parameters
+    ----------
+    filename : str, bytes, bytearray, memoryview or binary file object
+
+    """
+
+    def __init__(self, filename):
+        logger.info("PlyImporter instantiated with filename : %s" % source_name(filename))
+
+        check_importer_source(filename, ply_extensions, compressed=True)
+        self._source = filename
+        self._vertices = None
+        self._triangles = None
+        self._shape = None
+
+        self.read_file()
+
+    def read_file(self):
+        r"""Read the PLY file"""
+        self._vertices, self._triangles = read_ply(self._source)
+        self._shape = None
+        logger.info("%i vertices, %i triangles" % (len(self._vertices), len(self._triangles)))
+
+    @property
+    def vertices(self):
+        r"""(n, 3) float64 array of vertices"""
+        return self._vertices
+
+    @property
+    def triangles(self):
+        r"""(m, 3) int64 array of triangles"""
+        return self._triangles
+
+    @property
+    def shape(self):
+        r"""Shell of the triangles, built on first access"""
+        if self._shape is None:
+            self._shape = arrays_to_shape(self._vertices, self._triangles)
+        return self._shape
+
+
+class PlyExporter(object):
+    r"""A TopoDS_Shape to binary PLY exporter
+
+    The shape is triangulated and the vertices shared by the faces are welded.
+
+    Parameters
+    ----------
+    filename : str
+    line_deflection : float
+        linear deflection for meshing the shape (default is 0.9)
+    is_relative : bool
+        if True the deflection used for each edge is line_deflection * size of the edge
+    angular_deflection : float
+    in_parallel : bool
+        if True the shape is meshed in parallel
+    tolerance : float
+        vertex welding tolerance, 0 (default) welds identical vertices only
+
+    """
+
+    def __init__(self, filename, line_deflection=0.9, is_relative=False, angular_deflection=0.5, in_parallel=False,
+                 tolerance=0.):
+        logger.info("PlyExporter instantiated with filename : %s" % filename)
+
+        check_exporter_filename(filename, ply_extensions, compressed=True)
+        check_overwrite(filename)
+
+        self._shape = None  # only one shape can be exported
+        self._filename = filename
+        self._mesh_parameters = (line_deflection, is_relative, angular_deflection, in_parallel, tolerance)
+
+    def set_shape(self, a_shape):
+        r"""Set the shape to export (only a single shape can be exported)
+
+        Parameters
+        ----------
+        a_shape : TopoDS.TopoDS_Shape
+
+        """
+        check_shape(a_shape)  # raises an exception if the shape is not valid
+        self._shape = a_shape
+
+    def write_file(self):
+        r"""Write file"""
+        vertices, triangles = shape_to_arrays(self._shape, *self._mesh_parameters)
+        write_ply(self._filename, vertices, triangles)
+        logger.info("Wrote PLY file : %i vertices, %i triangles" % (len(vertices), len(triangles)))
@@ -0,0 +1,430 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""registry module of OCCDataExchange
+
+Summary
+-------
+
+Registry of the file formats : which importer reads a format, which exporter writes it,
+and how to recognize a file of that format from its first bytes.
+
+Importers and exporters are registered as "module:Class" strings and only imported when the format
+is first used, so that looking up a format does not import every format module (and OpenCascade).
+
+Third party packages can register formats with an entry point in the "OCCDataExchange.formats" group
+pointing to a Format instance, e.g. in their setup.py :
+
+    entry_points={"OCCDataExchange.formats": ["3dxml = my_package.formats:threedxml_format"]}
+
+"""
+
+from __future__ import print_function
+
+import contextlib
+import importlib
+import logging
+import os
+import shutil
+import struct
+import tempfile
+
+from OCCDataExchange import extensions
+from OCCDataExchange.compression import decompress, file_codec, split_extension
+from OCCDataExchange.utils import is_filename, open_source, read_source
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "OCCDataExchange.formats"
+
+SNIFF_SIZE = 4096
+
+
+class Format(object):
+    r"""A file format
+
+    Parameters
+    ----------
+    name : str
+    extensions : list[str]
+        lower case extensions, without the dot
+    importer : str or None
+        "module:Class" of the importer, None if the format cannot be read.
+        The importer is called with the filename.
+    exporter : str or None
+        "module:Class" of the exporter, None if the format cannot be written.
+        The exporter is called with the filename.
+    sniffer : callable or None
+        sniffer(head, size) -> bool, True if a file of size bytes (None if unknown) starting with the bytes head
+        is in this format
+    shape_attribute : str
+        importer attribute holding the imported shape
+    add_method : str
+        exporter method adding a shape to export
+
+    """
+
+    def __init__(self, name, extensions, importer=None, exporter=None, sniffer=None, shape_attribute="shape",
+                 add_method="set_shape"):
+        self.name = name
+        self.extensions = extensions
+        self.importer = importer
+        self.exporter = exporter
+        self.sniffer = sniffer
+        self.shape_attribute = shape_attribute
+        self.add_method = add_method
+
+    def __repr__(self):
+        return "Format(%s)" % self.name
+
+    @staticmethod
+    def _load(spec):
+        r"""Import the object designated by a "module:Class" spec"""
+        module_name, _, class_name = spec.partition(":")
+        return getattr(importlib.import_module(module_name), class_name)
+
+    @property
+    def importer_class(self):
+        r"""Importer class, imported on first use
+
+        Raises
+        ------
+        ValueError
+            if the format cannot be read
+
+        """
+        if self.importer is None:
+            msg = "No importer for the %s format" % self.name
+            logger.error(msg)
+            raise ValueError(msg)
+        return self._load(self.importer)
+
+    @property
+    def exporter_class(self):
+        r"""Exporter class, imported on first use
+
+        Raises
+        ------
+        ValueError
+            if the format cannot be written
+
+        """
+        if self.exporter is None:
+            msg = "No exporter for the %s format" % self.name
+            logger.error(msg)
+            raise ValueError(msg)
+        return self._load(self.exporter)
+
+    def preload(self):
+        r"""Import the importer, the exporter and the modules they use on first use
+
+        The module of the importer and the module of the exporter know which modules they import on first use :
+        their preload() function, if they have one, is called.
+
+        A process that forks workers (see OCCDataExchange.isolation) preloads the formats they use,
+        so that each worker does not import OpenCascade again.
+        """
+        module_names = list()
+        for spec in (self.importer, self.exporter):
+            if spec is not None:
+                self._load(spec)
+                module_name = spec.partition(":")[0]
+                if module_name not in module_names:
+                    module_names.append(module_name)
+        for module_name in module_names:
+            preload = getattr(importlib.import_module(module_name), "preload", None)
+            if preload is not None:
+                preload()
+
+
+def _sniff_step(head, size):
+    r"""STEP physical files start with the ISO-10303-21 keyword"""
+    return head.lstrip().startswith(b"ISO-10303-21")
+
+
+def _sniff_iges(head, size):
+    r"""IGES files are made of 80 columns records, with the section letter in column 73"""
+    line = head.split(b"\n", 1)[0].rstrip(b"\r")
+    return len(line) == 80 and line[72:73] in (b"S", b"G") and line[73:].strip().isdigit()
+
+
+def _sniff_stl(head, size):
+    r"""Binary STL : 80 bytes header, triangle count, 50 bytes per triangle. ASCII STL : solid ... facet"""
+    if len(head) >= 84 and size == 84 + 50 * struct.unpack("<I", head[80:84])[0]:
+        return True
+    return head.lstrip().startswith(b"solid") and (b"facet" in head or b"endsolid" in head)
+
+
+def _sniff_brep(head, size):
+    r"""BREP files written by BRepTools"""
+    return head.startswith(b"DBRep_DrawableShape") or head.startswith(b"CASCADE Topology")
+
+
+def _sniff_ply(head, size):
+    r"""PLY files start with the ply magic line"""
+    return head.startswith(b"ply\n") or head.startswith(b"ply\r\n")
+
+
+def _sniff_glb(head, size):
+    r"""Binary glTF magic"""
+    return head.startswith(b"glTF")
+
+
+_formats = list()
+_entry_points_loaded = False
+
+
+def register(a_format):
+    r"""Register a format, a format registered later takes precedence for its extensions
+
+    Parameters
+    ----------
+    a_format : Format
+
+    """
+    _formats.insert(0, a_format)
+    logger.debug("Registered format %s" % a_format.name)
+
+
+def _load_entry_points():
+    r"""Register the formats declared by installed packages, once"""
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    _entry_points_loaded = True
+    try:
+        from importlib.metadata import entry_points
+        found = entry_points()
+        if hasattr(found, "select"):  # Python >= 3.10
+            found = found.select(group=ENTRY_POINT_GROUP)
+        else:
+            found = found.get(ENTRY_POINT_GROUP, [])
+    except ImportError:
+        try:
+            import pkg_resources
+        except ImportError:
+            return
+        found = pkg_resources.iter_entry_points(ENTRY_POINT_GROUP)
+    for entry_point in found:
+        try:
+            register(entry_point.load())
+        except Exception as e:  # a broken plugin must not break the built-in formats
+            logger.warning("Could not load the format entry point %s : %s" % (entry_point.name, str(e)))
+
+
+def formats():
+    r"""Registered formats, the most recently registered first
+
+    Returns
+    -------
+    list[Format]
+
+    """
+    _load_entry_points()
+    return list(_formats)
+
+
+def get_format(name):
+    r"""Format from its name or one of its extensions
+
+    Parameters
+    ----------
+    name : str
+        e.g. "step", "stp", ".stp"
+
+    Returns
+    -------
+    Format
+
+    Raises
+    ------
+    ValueError
+        if no registered format has this name or extension
+
+    """
+    name = name.lower().lstrip(".")
+    for a_format in formats():
+        if a_format.name == name or name in a_format.extensions:
+            return a_format
+    msg = "Unknown format %s" % name
+    logger.error(msg)
+    raise ValueError(msg)
+
+
+def sniff(filename):
+    r"""Format of a file, from its first bytes
+
+    Parameters
+    ----------
+    filename : str, bytes, bytearray or memoryview
+        path to the file, or its content. A compressed file is recognized from its decompressed content.
+
+    Returns
+    -------
+    Format or None
+        None if no format recognizes the content
+
+    """
+    if is_filename(filename):
+        with open_source(filename) as f:
+            head = f.read(SNIFF_SIZE)
+        # the uncompressed size of a compressed file is not known without decompressing it
+        size = os.path.getsize(filename) if file_codec(filename) is None else None
+    else:
+        data = decompress(bytes(filename))
+        head, size = data[:SNIFF_SIZE], len(data)
+    return sniff_head(head, size)
+
+
+def sniff_head(head, size=None):
+    r"""Format of a file, from its first bytes and its size
+
+    Parameters
+    ----------
+    head : bytes
+        the first bytes of the (uncompressed) file, SNIFF_SIZE bytes unless the file is shorter
+    size : int or None
+        size of the file, None if it is not known
+
+    Returns
+    -------
+    Format or None
+        None if no format recognizes the content
+
+    """
+    for a_format in formats():
+        if a_format.sniffer is not None and a_format.sniffer(head, size):
+            return a_format
+    return None
+
+
+def detect_format(filename):
+    r"""Format of an existing file, from its content and otherwise from its extension
+
+    Parameters
+    ----------
+    filename : str
+        the extension of a compressed file is the one before the compression extension (e.g. stp for part.stp.gz)
+
+    Returns
+    -------
+    Format
+
+    Raises
+    ------
+    ValueError
+        if neither the content nor the extension is recognized
+
+    """
+    extension = split_extension(filename)[0]
+    sniffed = sniff(filename)
+    if sniffed is not None:
+        if extension and extension not in sniffed.extensions:
+            logger.info("%s content is %s, its extension is ignored" % (filename, sniffed.name))
+        return sniffed
+    if not extension:
+        msg = "Cannot detect the format of %s" % filename
+        logger.error(msg)
+        raise ValueError(msg)
+    return get_format(extension)
+
+
+def read_shape(filename, format=None):
+    r"""Read the shape of a file
+
+    Parameters
+    ----------
+    filename : str, bytes, bytearray, memoryview or binary file object
+        path to the file, or its content
+    format : str or None
+        format name or extension, None (default) to detect it from the file content or extension
+
+    Returns
+    -------
+    TopoDS.TopoDS_Shape
+
+    Raises
+    ------
+    ValueError
+        if the format of in memory data is not given and cannot be detected from the content
+
+    """
+    if not is_filename(filename):
+        data = read_source(filename)
+        a_format = sniff(data) if format is None else get_format(format)
+        if a_format is None:
+            msg = "Cannot detect the format of the data, pass the format"
+            logger.error(msg)
+            raise ValueError(msg)
+        return getattr(a_format.importer_class(data), a_format.shape_attribute)
+
+    a_format = detect_format(filename) if format is None else get_format(format)
+    with _with_extension(filename, a_format.extensions) as path:
+        importer = a_format.importer_class(path)
+        return getattr(importer, a_format.shape_attribute)
+
+
+@contextlib.contextmanager
+def _with_extension(filename, allowed_extensions):
+    r"""Path to the file with one of the allowed extensions
+
+    The importers check the extension : a file whose content does not match its extension is
+    linked (or copied) to a temporary file with the right extension, and its compression extension if any.
+    """
+    extension, codec = split_extension(filename)
+    if extension in allowed_extensions:
+        yield filename
+        return
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "%s.%s" % (os.path.basename(filename), allowed_extensions[0]))
+    if codec is not None:
+        path += os.path.splitext(filename)[1]
+    try:
+        try:
+            os.link(filename, path)
+        except (AttributeError, OSError):
+            shutil.copyfile(filename, path)
+        yield path
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def write_shape(a_shape, filename, format=None):
+    r"""Write a shape to a file
+
+    Parameters
+    ----------
+    a_shape : TopoDS.TopoDS_Shape
+    filename : str
+    format : str or None
+        format name or extension, None (default) to use the extension of filename.
+        A compression extension (e.g. part.stl.gz) compresses the file, see OCCDataExchange.compression.
+
+    """
+    a_format = get_format(split_extension(filename)[0] if format is None else format)
+    exporter = a_format.exporter_class(filename)
+    getattr(exporter, a_format.add_method)(a_shape)
+    exporter.write_file()
+
+
+for _format in [Format("dat", extensions.dat_extensions),
+                Format("xbf", extensions.xbf_extensions),
+                Format("3mf", extensions.threemf_extensions, exporter="OCCDataExchange.threemf:ThreeMfExporter",
+                       add_method="add_shape"),
+                Format("glb", extensions.gltf_extensions, exporter="OCCDataExchange.gltf:GltfExporter",
+                       sniffer=_sniff_glb, add_method="add_shape"),
+                Format("obj", extensions.obj_extensions,
+                       importer="OCCDataExchange.obj:ObjImporter", exporter="OCCDataExchange.obj:ObjExporter"),
+                Format("ply", extensions.ply_extensions, importer="OCCDataExchange.ply:PlyImporter",
+                       exporter="OCCDataExchange.ply:PlyExporter", sniffer=_sniff_ply),
+                Format("brep", extensions.brep_extensions, importer="OCCDataExchange.brep:BrepImporter",
+                       exporter="OCCDataExchange.brep:BrepExporter", sniffer=_sniff_brep),
+                Format("stl", extensions.stl_extensions, importer="OCCDataExchange.stl:StlImporter",
+                       exporter="OCCDataExchange.stl:StlExporter", sniffer=_sniff_stl),
+                Format("iges", extensions.iges_extensions, importer="OCCDataExchange.iges:IgesImporter",
+                       exporter="OCCDataExchange.iges:IgesExporter", sniffer=_sniff_iges,
+                       shape_attribute="compound", add_method="add_shape"),
+                Format("step", extensions.step_extensions, importer="OCCDataExchange.step:StepImporter",
+                       exporter="OCCDataExchange.step:StepExporter", sniffer=_sniff_step,
+                       shape_attribute="compound", add_method="add_shape")]:
+    register(_format)
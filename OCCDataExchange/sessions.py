@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""sessions module of OCCDataExchange
+
+Summary
+-------
+
+OpenCascade reads most of its data exchange settings (STEP schema, IGES unit, precision ...)
+from the process wide Interface_Static parameter table.
+
+static_parameters() applies a set of parameters for the duration of a with block and restores the previous
+values on exit. A module level lock serializes the scopes so that exporters with different settings can be
+interleaved (or used from several threads) in the same process without seeing each other's settings.
+
+release_transfer_results() empties the transfer results of a reader's work session, so that roots
+can be transferred one at a time without the reader keeping all the shapes alive.
+
+"""
+
+from __future__ import print_function
+
+import contextlib
+import importlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def preload():
+    r"""Import the OpenCascade modules used by this module (see OCCDataExchange.registry.Format.preload())"""
+    for module_name in ["OCC.Interface"]:
+        importlib.import_module(module_name)
+
+
+_lock = threading.RLock()
+
+
+def _get_static(name, value):
+    r"""Read the current value of the static parameter 'name', using the type of 'value' to pick the accessor"""
+    from OCC import Interface
+    if isinstance(value, bool) or isinstance(value, int):
+        return Interface.Interface_Static_IVal(name)
+    elif isinstance(value, float):
+        return Interface.Interface_Static_RVal(name)
+    else:
+        return Interface.Interface_Static_CVal(name)
+
+
+def _set_static(name, value):
+    r"""Set the static parameter 'name' to 'value' using the accessor matching the type of 'value'"""
+    from OCC import Interface
+    if isinstance(value, bool) or isinstance(value, int):
+        ok = Interface.Interface_Static_SetIVal(name, int(value))
+    elif isinstance(value, float):
+        ok = Interface.Interface_Static_SetRVal(name, value)
+    else:
+        ok = Interface.Interface_Static_SetCVal(name, str(value))
+    if not ok:
+        msg = "Could not set static parameter %s to %s" % (name, str(value))
+        logger.error(msg)
+        raise ValueError(msg)
+
+
+@contextlib.contextmanager
+def static_parameters(parameters):
+    r"""Scope a set of Interface_Static parameters
+
+    The parameters are set on entry and the previous values are restored on exit,
+    even if an exception is raised inside the with block.
+
+    Parameters
+    ----------
+    parameters : dict
+        Parameter name -> value. The value type selects the accessor :
+        int or bool -> IVal, float -> RVal, str -> CVal
+
+    Raises
+    ------
+    ValueError
+        if a parameter is unknown to OpenCascade or cannot be set
+
+    Examples
+    --------
+    >>> with static_parameters({"write.step.schema": "AP203"}):
+    ...     writer.Write(filename)
+
+    """
+    from OCC import Interface
+    with _lock:
+        previous = list()
+        try:
+            for name, value in parameters.items():
+                if not Interface.Interface_Static_IsPresent(name):
+                    msg = "Unknown static parameter %s" % name
+                    logger.error(msg)
+                    raise ValueError(msg)
+                previous.append((name, _get_static(name, value)))
+                _set_static(name, value)
+                logger.debug("Static parameter %s set to %s" % (name, str(value)))
+            yield
+        finally:
+            for name, value in reversed(previous):
+                _set_static(name, value)
+
+
+def release_transfer_results(xscontrol_reader):
+    r"""Make a STEP or IGES reader forget the shapes it has transferred so far
+
+    The shapes list and the transfer results recorded by the work session are cleared,
+    the loaded model is kept so that further roots can still be transferred.
+
+    Parameters
+    ----------
+    xscontrol_reader : STEPControl.STEPControl_Reader or IGESControl.IGESControl_Reader
+
+    """
+    xscontrol_reader.ClearShapes()
+    transfer_reader = xscontrol_reader.WS().GetObject().TransferReader().GetObject()
+    transfer_reader.Clear(1)  # final results
+    transfer_reader.TransientProcess().GetObject().Clear()
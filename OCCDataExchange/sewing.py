@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""sewing module of OCCDataExchange
+
+Summary
+-------
+
+Builds shells and solids from loose faces (typically the result of an IGES import).
+
+Sewing all the faces of a large model at once scales badly. The faces are first grouped into
+connected components (faces sharing edge end points, found with a grid based spatial index of the
+vertices), then each component is sewn on its own, optionally in a pool of processes.
+Solids are built from the shells that are closed.
+
+"""
+
+from __future__ import print_function
+
+import importlib
+import logging
+import multiprocessing
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def preload():
+    r"""Import the OpenCascade modules used by this module (see OCCDataExchange.registry.Format.preload())"""
+    for module_name in ["OCC.BRep", "OCC.BRepBuilderAPI", "OCC.BRepCheck", "OCC.ShapeFix", "OCC.TopAbs", "OCC.TopExp",
+                        "OCC.TopoDS"]:
+        importlib.import_module(module_name)
+
+
+def _faces(a_shape):
+    r"""Faces of a shape
+
+    Parameters
+    ----------
+    a_shape : TopoDS.TopoDS_Shape
+
+    Returns
+    -------
+    list[TopoDS.TopoDS_Face]
+
+    """
+    from OCC import TopAbs
+    from OCC import TopExp
+    from OCC import TopoDS
+
+    faces = list()
+    explorer = TopExp.TopExp_Explorer(a_shape, TopAbs.TopAbs_FACE)
+    while explorer.More():
+        faces.append(TopoDS.topods_Face(explorer.Current()))
+        explorer.Next()
+    return faces
+
+
+def _vertices_points(faces):
+    r"""Coordinates of the vertices of each face
+
+    Returns
+    -------
+    tuple(numpy.ndarray, numpy.ndarray)
+        (n, 3) float64 array of points and (n,) int64 array of the index of the face of each point
+
+    """
+    from OCC import BRep
+    from OCC import TopAbs
+    from OCC import TopExp
+    from OCC import TopoDS
+
+    brep_tool = BRep.BRep_Tool()
+    points, face_indices = list(), list()
+    for i, face in enumerate(faces):
+        explorer = TopExp.TopExp_Explorer(face, TopAbs.TopAbs_VERTEX)
+        while explorer.More():
+            points.append(brep_tool.Pnt(TopoDS.topods_Vertex(explorer.Current())).Coord())
+            face_indices.append(i)
+            explorer.Next()
+    return np.array(points, dtype=np.float64).reshape(-1, 3), np.array(face_indices, dtype=np.int64)
+
+
+def connected_components(points, owners, nb_owners, tolerance):
+    r"""Group owners (e.g. faces) that have points closer than tolerance
+
+    Points are binned in a grid of cells of 4 * tolerance. Points within tolerance of each other
+    fall in the same cell of at least one of the 8 grids obtained by shifting the grid by half a cell
+    along each axis, so those 8 binnings find all the pairs of close points (and some pairs a bit
+    further apart, which only makes components larger). Components are then labelled with a
+    vectorized union-find, the whole process is close to linear in the number of points.
+
+    Parameters
+    ----------
+    points : numpy.ndarray
+        (n, 3) float array
+    owners : numpy.ndarray
+        (n,) int array, index of the owner of each point, in [0, nb_owners)
+    nb_owners : int
+    tolerance : float
+
+    Returns
+    -------
+    numpy.ndarray
+        (nb_owners,) int array of component labels, numbered from 0
+
+    """
+    cell_size = 4. * tolerance
+    links_from, links_to = list(), list()
+    for shift in np.ndindex(2, 2, 2):
+        cells = np.floor(points / cell_size + 0.5 * np.array(shift)).astype(np.int64)
+        _, cell_indices = np.unique(cells, axis=0, return_inverse=True)
+        cell_indices = cell_indices.ravel()
+        # link the owner of each point to the owner of the first point of the same cell
+        first_owner = np.full(cell_indices.max() + 1 if len(cell_indices) else 0, -1, dtype=np.int64)
+        first_owner[cell_indices[::-1]] = owners[::-1]
+        links_from.append(owners)
+        links_to.append(first_owner[cell_indices])
+
+    links_from = np.concatenate(links_from) if links_from else np.zeros(0, dtype=np.int64)
+    links_to = np.concatenate(links_to) if links_to else np.zeros(0, dtype=np.int64)
+
+    labels = np.arange(nb_owners)
+    while True:
+        minimum = np.minimum(labels[links_from], labels[links_to])
+        new_labels = labels.copy()
+        np.minimum.at(new_labels, links_from, minimum)
+        np.minimum.at(new_labels, links_to, minimum)
+        new_labels = new_labels[new_labels]  # pointer jumping
+        if (new_labels == labels).all():
+            break
+        labels = new_labels
+    return np.unique(labels, return_inverse=True)[1].ravel()
+
+
+def sew_faces(faces, tolerance=1e-6):
+    r"""Sew faces and build solids from the closed shells
+
+    Parameters
+    ----------
+    faces : list[TopoDS.TopoDS_Face]
+    tolerance : float
+
+    Returns
+    -------
+    list[TopoDS.TopoDS_Shape]
+        solids, shells that are not closed and faces that could not be sewn
+
+    """
+    from OCC import BRepBuilderAPI
+    from OCC import BRepCheck
+    from OCC import ShapeFix
+    from OCC import TopAbs
+    from OCC import TopExp
+    from OCC import TopoDS
+
+    sewing = BRepBuilderAPI.BRepBuilderAPI_Sewing(tolerance)
+    for face in faces:
+        sewing.Add(face)
+    sewing.Perform()
+    sewed_shape = sewing.SewedShape()
+
+    shapes = list()
+    explorer = TopExp.TopExp_Explorer(sewed_shape, TopAbs.TopAbs_SHELL)
+    while explorer.More():
+        shell = TopoDS.topods_Shell(explorer.Current())
+        if BRepCheck.BRepCheck_Shell(shell).Closed() == BRepCheck.BRepCheck_NoError:
+            shapes.append(ShapeFix.ShapeFix_Solid().SolidFromShell(shell))
+        else:
+            shapes.append(shell)
+        explorer.Next()
+    # faces that are not part of any shell
+    explorer = TopExp.TopExp_Explorer(sewed_shape, TopAbs.TopAbs_FACE, TopAbs.TopAbs_SHELL)
+    while explorer.More():
+        shapes.append(explorer.Current())
+        explorer.Next()
+    return shapes
+
+
+def _sew_brep_string(args):
+    r"""Sew the faces of a compound serialized in the BREP format (process pool worker)"""
+    from OCCDataExchange.brep import shape_from_string, shape_to_string
+    from OCCDataExchange.utils import build_compound
+
+    brep_string, tolerance = args
+    shapes = sew_faces(_faces(shape_from_string(brep_string)), tolerance)
+    return shape_to_string(build_compound(shapes))
+
+
+def sew(shapes, tolerance=1e-6, processes=1):
+    r"""Sew the faces of shapes, component by component
+
+    Parameters
+    ----------
+    shapes : list[TopoDS.TopoDS_Shape]
+        shapes whose faces are to be sewn
+    tolerance : float
+        sewing tolerance, also used to find the faces that are connected
+    processes : int or None
+        number of processes sewing components in parallel.
+        1 (default) sews in the current process, None uses as many processes as CPUs.
+
+    Returns
+    -------
+    list[TopoDS.TopoDS_Shape]
+        solids, shells that are not closed and faces that could not be sewn
+
+    """
+    from OCC import TopoDS
+    from OCCDataExchange.brep import shape_from_string, shape_to_string
+    from OCCDataExchange.utils import build_compound
+
+    faces = list()
+    for a_shape in shapes:
+        faces.extend(_faces(a_shape))
+    if len(faces) == 0:
+        return list()
+
+    points, owners = _vertices_points(faces)
+    labels = connected_components(points, owners, len(faces), tolerance)
+    components = [list() for _ in range(labels.max() + 1)]
+    for face, label in zip(faces, labels):
+        components[label].append(face)
+    logger.info("%i faces in %i connected component(s)" % (len(faces), len(components)))
+
+    if processes == 1 or len(components) == 1:
+        sewed = list()
+        for component in components:
+            sewed.extend(sew_faces(component, tolerance))
+        return sewed
+
+    # Shapes cannot be pickled, they are sent to the workers in the BREP format
+    jobs = [(shape_to_string(build_compound(component)), tolerance) for component in components]
+    processes = processes or multiprocessing.cpu_count()
+    pool = multiprocessing.Pool(processes)
+    try:
+        results = pool.map(_sew_brep_string, jobs, chunksize=max(1, len(jobs) // (4 * processes)))
+    finally:
+        pool.close()
+        pool.join()
+
+    sewed = list()
+    for result in results:
+        iterator = TopoDS.TopoDS_Iterator(shape_from_string(result))
+        while iterator.More():
+            sewed.append(iterator.Value())
+            iterator.Next()
+    return sewed
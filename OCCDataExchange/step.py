@@ -5,42 +5,64 @@ r"""step module of OCCDataExchange"""
 
 from __future__ import print_function
 
+import importlib
 import logging
 import warnings
 
-from OCC import BRep
-from OCC import IFSelect
-from OCC import Interface
-from OCC import STEPControl
-from OCC import TopoDS
-from OCCUtils import types_lut
-
-from OCCDataExchange.checks import check_importer_filename, check_exporter_filename, check_overwrite, check_shape
+from OCCDataExchange.checks import check_importer_source, check_exporter_filename, check_exporter_has_filename, \
+    check_overwrite, check_shape
+from OCCDataExchange.compression import codec_from_extension, write_compressed
 from OCCDataExchange.extensions import step_extensions
+from OCCDataExchange.sessions import release_transfer_results, static_parameters
+from OCCDataExchange.utils import CachedCompound, ShapeList, is_filename, read_source, source_filename, source_name, \
+    write_through_file, written_bytes
 
 logger = logging.getLogger(__name__)
 
 
+def preload():
+    r"""Import the OpenCascade modules used by this module and initialize the STEP controller
+
+    See OCCDataExchange.registry.Format.preload().
+    """
+    from OCC import STEPControl
+    from OCCDataExchange import sessions, utils
+
+    for module_name in ["OCC.IFSelect", "OCC.STEPControl", "OCC.XSControl", "OCCUtils.types_lut"]:
+        importlib.import_module(module_name)
+    sessions.preload()
+    utils.preload()
+    STEPControl.STEPControl_Controller().Init()
+
+
 class StepImporter(object):
     r"""STEP file importer
 
     Parameters
     ----------
-    filename : str
+    filename : str, bytes, bytearray, memoryview or binary file object
+        The STEPControl reader only reads files : in memory data and compressed files (e.g. part.stp.gz,
+        see OCCDataExchange.compression) are written to a temporary file while it is loaded.
+    transfer : bool
+        If True (default), all the roots are transferred when the importer is instantiated.
+        If False, nothing is read until read_file() or iter_shapes() is called.
 
     """
 
-    def __init__(self, filename=None):
-        logger.info("StepImporter instantiated with filename : %s" % filename)
-        self._shapes = list()
+    def __init__(self, filename=None, transfer=True):
+        logger.info("StepImporter instantiated with filename : %s" % source_name(filename))
+        self._shapes = ShapeList()
+        self._compound = CachedCompound(self._shapes)
         self._number_of_shapes = 0
 
-        check_importer_filename(filename, step_extensions)
+        check_importer_source(filename, step_extensions, compressed=True)
 
-        self._filename = filename
+        # a file object is read once, the data may be loaded again by iter_shapes()
+        self._source = filename if is_filename(filename) else read_source(filename)
 
-        logger.info("Reading file ....")
-        self.read_file()
+        if transfer:
+            logger.info("Reading file ....")
+            self.read_file()
 
     # CONFUSING !! Comes from an assignment in ReadFile but looks like the len of shapes
     # @property
@@ -54,12 +76,21 @@ class StepImporter(object):
     #     """
     #     return self._number_of_shapes
 
-    def read_file(self):
-        """
-        Read the STEP file and stores the result in a _shapes list
+    def _load(self):
+        r"""Load the STEP file in a STEPControl_Reader, ready for transfer
+
+        Returns
+        -------
+        tuple(STEPControl.STEPControl_Reader, int)
+            The reader and the number of roots for transfer
+
         """
+        from OCC import IFSelect
+        from OCC import STEPControl
+
         stepcontrol_reader = STEPControl.STEPControl_Reader()
-        status = stepcontrol_reader.ReadFile(self._filename)
+        with source_filename(self._source, step_extensions[0]) as path:
+            status = stepcontrol_reader.ReadFile(path)
 
         if status == IFSelect.IFSelect_RetDone:
             stepcontrol_reader.PrintCheckLoad(False, IFSelect.IFSelect_ItemsByEntity)
@@ -71,50 +102,99 @@ class StepImporter(object):
                 raise ValueError(msg)
 
             stepcontrol_reader.PrintCheckTransfer(False, IFSelect.IFSelect_ItemsByEntity)
-
-            self._number_of_shapes = stepcontrol_reader.NbShapes()
-
-            for n in range(1, nb_roots + 1):
-                logger.info("Root index %i" % n)
-                ok = stepcontrol_reader.TransferRoot(n)
-                logger.info("TransferRoots status : %i" % ok)
-
-                if ok:
-                    # for i in range(1, self.nb_shapes + 1):
-                    a_shape = stepcontrol_reader.Shape(n)
-                    if a_shape.IsNull():
-                        msg = "At least one shape in IGES cannot be transferred"
-                        logger.warning(msg)
-                    else:
-                        self._shapes.append(a_shape)
-                        logger.info("Appending a %s to list of shapes" %
-                                    types_lut.topo_lut[a_shape.ShapeType()])
-                else:
-                    msg = "One shape could not be transferred"
-                    logger.warning(msg)
-                    warnings.warn(msg)
-            return True
+            return stepcontrol_reader, nb_roots
         else:
             msg = "Status is not IFSelect.IFSelect_RetDone"
             logger.error(msg)
             raise ValueError(msg)
 
+    @staticmethod
+    def _transfer_roots(stepcontrol_reader, nb_roots, release=False):
+        r"""Transfer the roots one at a time and yield the resulting shapes
+
+        Parameters
+        ----------
+        stepcontrol_reader : STEPControl.STEPControl_Reader
+        nb_roots : int
+        release : bool
+            If True, the reader forgets about a root (shape and transfer results)
+            before the next root is transferred
+
+        """
+        from OCCUtils import types_lut
+
+        for n in range(1, nb_roots + 1):
+            logger.info("Root index %i" % n)
+            ok = stepcontrol_reader.TransferRoot(n)
+            logger.info("TransferRoots status : %i" % ok)
+
+            if ok:
+                a_shape = stepcontrol_reader.Shape(stepcontrol_reader.NbShapes())
+                if release:
+                    release_transfer_results(stepcontrol_reader)
+                if a_shape.IsNull():
+                    msg = "At least one shape in STEP cannot be transferred"
+                    logger.warning(msg)
+                else:
+                    logger.info("Transferred a %s" % types_lut.topo_lut[a_shape.ShapeType()])
+                    yield a_shape
+            else:
+                msg = "One shape could not be transferred"
+                logger.warning(msg)
+                warnings.warn(msg)
+
+    def read_file(self):
+        """
+        Read the STEP file and stores the result in a _shapes list
+        """
+        from OCCUtils import types_lut
+
+        stepcontrol_reader, nb_roots = self._load()
+        self._number_of_shapes = stepcontrol_reader.NbShapes()
+        for a_shape in self._transfer_roots(stepcontrol_reader, nb_roots):
+            self._shapes.append(a_shape)
+            logger.info("Appending a %s to list of shapes" % types_lut.topo_lut[a_shape.ShapeType()])
+        return True
+
+    def iter_shapes(self):
+        r"""Transfer the roots one by one and yield their shapes
+
+        Nothing is stored by the importer : once the caller drops a shape, its memory can be
+        reclaimed before the next root is transferred. The shapes property is not populated.
+
+        Yields
+        ------
+        TopoDS.TopoDS_Shape
+
+        Examples
+        --------
+        >>> for shape in StepImporter(filename, transfer=False).iter_shapes():
+        ...     mesh_and_append(shape)
+
+        """
+        stepcontrol_reader, nb_roots = self._load()
+        for a_shape in self._transfer_roots(stepcontrol_reader, nb_roots, release=True):
+            yield a_shape
+
     @property
     def compound(self):
-        """ Create and returns a compound from the _shapes list"""
-        # Create a compound
-        compound = TopoDS.TopoDS_Compound()
-        brep_builder = BRep.BRep_Builder()
-        brep_builder.MakeCompound(compound)
-        # Populate the compound
-        for shape in self._shapes:
-            brep_builder.Add(compound, shape)
-        return compound
+        r"""Compound of the shapes
+
+        The compound is built on first access and cached until the shapes list is modified.
+
+        Returns
+        -------
+        TopoDS.TopoDS_Compound
+
+        """
+        return self._compound.get()
 
     @property
     def shapes(self):
         r"""Shapes
 
+        The list is returned as is, not copied : modifying it invalidates the cached compound.
+
         Returns
         -------
         list[TopoDS.TopoDS_Shape]
@@ -128,17 +208,24 @@ class StepExporter(object):
 
     Parameters
     ----------
-    filename : str
-        the file to save to eg. myshape.step
+    filename : str or None
+        the file to save to eg. myshape.step.
+        None for an exporter that only writes to streams (write_to()) or bytes (to_bytes())
     verbose : bool
         verbosity of the STEP exporter
     schema : ["AP203", "AP214CD"]
         which STEP schema to use, either AP214CD or AP203
     tolerance : float
 
+    Notes
+    -----
+    Each exporter owns its XSControl_WorkSession and only applies its schema to the process wide
+    OpenCascade parameters while writing, so exporters with different schemas can be used
+    in the same process.
+
     """
 
-    def __init__(self, filename, verbose=False, schema="AP214CD", tolerance=1e-4):
+    def __init__(self, filename=None, verbose=False, schema="AP214CD", tolerance=1e-4):
         logger.info("StepExporter instantiated with filename : %s" % filename)
         logger.info("StepExporter schema : %s" % schema)
         logger.info("StepExporter tolerance : %s" % str(tolerance))
@@ -148,18 +235,22 @@ class StepExporter(object):
             logger.error(msg)
             raise AssertionError(msg)
 
-        check_exporter_filename(filename, step_extensions)
-        check_overwrite(filename)
+        if filename is not None:
+            check_exporter_filename(filename, step_extensions, compressed=True)
+            check_overwrite(filename)
+
+        from OCC import STEPControl
+        from OCC import XSControl
 
         self._filename = filename
         self._shapes = list()
         self.verbose = verbose
+        self._schema = schema
 
-        self._stepcontrol_writer = STEPControl.STEPControl_Writer()
+        self._work_session = XSControl.XSControl_WorkSession()
+        self._stepcontrol_writer = STEPControl.STEPControl_Writer(self._work_session.GetHandle(), False)
         self._stepcontrol_writer.SetTolerance(tolerance)
 
-        Interface.Interface_Static_SetCVal("write.step.schema", schema)
-
     def add_shape(self, a_shape):
         r"""Add a shape to export
 
@@ -173,14 +264,50 @@ class StepExporter(object):
 
     def write_file(self):
         r"""Write STEP file"""
-        for shp in self._shapes:
-            transfer_status = self._stepcontrol_writer.Transfer(shp, STEPControl.STEPControl_AsIs)
-            if transfer_status != IFSelect.IFSelect_RetDone:
-                msg = "An error occurred while transferring a shape to the STEP writer"
-                logger.error(msg)
-                raise ValueError(msg)
+        check_exporter_has_filename(self._filename)
+        if codec_from_extension(self._filename) is not None:
+            write_compressed(self.write_to, self._filename)
+        else:
+            self._write(self._filename)
+
+    def write_to(self, stream):
+        r"""Write the STEP file content to a binary stream (e.g. a socket file or a buffer)
+
+        The STEPControl writer only writes files : the content goes through a temporary file.
+
+        Parameters
+        ----------
+        stream : binary file like object
+
+        """
+        write_through_file(self._write, step_extensions[0], stream)
+
+    def to_bytes(self):
+        r"""STEP file content
 
-        write_status = self._stepcontrol_writer.Write(self._filename)
+        Returns
+        -------
+        bytes
+
+        """
+        return written_bytes(self.write_to)
+
+    def _write(self, filename):
+        r"""Write the STEP file to filename"""
+        from OCC import IFSelect
+        from OCC import STEPControl
+
+        with static_parameters({"write.step.schema": self._schema}):
+            # The STEP model picks up the schema when it is created
+            self._stepcontrol_writer.Model(True)
+            for shp in self._shapes:
+                transfer_status = self._stepcontrol_writer.Transfer(shp, STEPControl.STEPControl_AsIs)
+                if transfer_status != IFSelect.IFSelect_RetDone:
+                    msg = "An error occurred while transferring a shape to the STEP writer"
+                    logger.error(msg)
+                    raise ValueError(msg)
+
+            write_status = self._stepcontrol_writer.Write(filename)
 
         if self.verbose:
             self._stepcontrol_writer.PrintStatsTransfer()
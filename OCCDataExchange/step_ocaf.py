@@ -5,58 +5,387 @@ r"""step_ocaf module of OCCDataExchange"""
 
 from __future__ import print_function
 
+import array
 import logging
+import os.path
+import tempfile
 
 from OCC import IFSelect
+from OCC import PCDM
 from OCC import Quantity
 from OCC import STEPCAFControl
 from OCC import STEPControl
 from OCC import TCollection
 from OCC import TDF
+from OCC import TDataStd
 from OCC import TDocStd
 from OCC import TopAbs
+from OCC import TopLoc
 from OCC import XCAFApp
 from OCC import XCAFDoc
 from OCC import XSControl
 from OCCUtils.Topology import Topo
 
-from OCCDataExchange.checks import check_importer_filename, check_exporter_filename, check_overwrite, check_shape
-from OCCDataExchange.extensions import step_extensions
+from OCCDataExchange.checks import check_importer_filename, check_exporter_filename, check_exporter_has_filename, \
+    check_overwrite, check_shape
+from OCCDataExchange.compression import codec_from_extension, write_compressed
+from OCCDataExchange.extensions import step_extensions, xbf_extensions
+from OCCDataExchange.utils import write_through_file, written_bytes
 
 logger = logging.getLogger(__name__)
 
 
+try:
+    _unichr = unichr  # Python 2
+except NameError:
+    _unichr = chr
+
+
+def _extended_string_to_str(extended_string):
+    r"""Convert a TCollection_ExtendedString to a str
+
+    ASCII strings (the vast majority of names) are converted in a single call through a
+    TCollection_AsciiString, the others code point by code point.
+
+    Parameters
+    ----------
+    extended_string : TCollection.TCollection_ExtendedString
+
+    Returns
+    -------
+    str
+
+    """
+    if extended_string.IsAscii():
+        return TCollection.TCollection_AsciiString(extended_string).ToCString()
+    return u"".join([_unichr(extended_string.Value(k)) for k in range(1, extended_string.Length() + 1)])
+
+
+class AssemblyTable(object):
+    r"""Columnar table of the nodes of a STEP assembly tree
+
+    One row per node of the tree : assemblies, and parts (leaves). Each part row references a
+    prototype shape, stored once in the prototypes list whatever the number of its instances,
+    and the location of the instance relative to its parent.
+    Numeric columns are stored in compact typed arrays, layer and material names are stored once
+    in string tables and referenced by id.
+
+    Columns
+    -------
+    entry : label entry (e.g. "0:1:1:3"), the component label for an instance
+    name : instance name, or product name if the instance has no name
+    parent : index of the parent row, -1 for a top level row
+    prototype : index into prototypes, -1 for an assembly
+    location : TopLoc_Location of the node relative to its parent
+    shape_type : TopAbs_ShapeEnum (TopAbs_COMPOUND for an assembly)
+    rgb : float32 color, NaN when the node has no color
+    layers : ids into layer_names (several per row)
+    material : id into material_names, -1 when the node has no material
+
+    """
+
+    def __init__(self):
+        self.entries = list()
+        self.names = list()
+        self.locations = list()
+        self.prototypes = list()
+        self._parents = array.array("i")
+        self._prototype_ids = array.array("i")
+        self._shape_types = array.array("b")
+        self._rgb = array.array("f")
+        self._layer_offsets = array.array("i", [0])
+        self._layer_ids = array.array("i")
+        self._materials = array.array("i")
+
+        self.layer_names = list()
+        self._layer_ids_by_name = dict()
+        self.material_names = list()
+        self._material_ids_by_name = dict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def _intern(name, names, ids_by_name):
+        r"""Id of name in a string table, name is added to the table if needed"""
+        if name not in ids_by_name:
+            ids_by_name[name] = len(names)
+            names.append(name)
+        return ids_by_name[name]
+
+    def add_prototype(self, shape):
+        r"""Add a prototype shape
+
+        Parameters
+        ----------
+        shape : TopoDS.TopoDS_Shape
+
+        Returns
+        -------
+        int
+            index of the prototype
+
+        """
+        self.prototypes.append(shape)
+        return len(self.prototypes) - 1
+
+    def add(self, entry, name, prototype, location, parent=-1, rgb=None, layers=(), material=None):
+        r"""Add a row
+
+        Parameters
+        ----------
+        entry : str
+        name : str
+        prototype : int
+            index of the prototype shape (see add_prototype()), -1 for an assembly
+        location : TopLoc.TopLoc_Location
+            location relative to the parent
+        parent : int
+            index of the parent row, -1 for a top level row
+        rgb : tuple(float, float, float) or None
+        layers : iterable of str
+            layer names
+        material : str or None
+            material name
+
+        Returns
+        -------
+        int
+            index of the new row
+
+        """
+        self.entries.append(entry)
+        self.names.append(name)
+        self.locations.append(location)
+        self._parents.append(parent)
+        self._prototype_ids.append(prototype)
+        if prototype == -1:
+            self._shape_types.append(TopAbs.TopAbs_COMPOUND)
+        else:
+            self._shape_types.append(self.prototypes[prototype].ShapeType())
+        self._rgb.extend(rgb if rgb is not None else (float("nan"),) * 3)
+        for layer in layers:
+            self._layer_ids.append(self._intern(layer, self.layer_names, self._layer_ids_by_name))
+        self._layer_offsets.append(len(self._layer_ids))
+        if material is None:
+            self._materials.append(-1)
+        else:
+            self._materials.append(self._intern(material, self.material_names, self._material_ids_by_name))
+        return len(self.entries) - 1
+
+    def parent(self, i):
+        r"""Index of the parent of row i, -1 for a top level row"""
+        return self._parents[i]
+
+    def prototype(self, i):
+        r"""Index of the prototype of row i, -1 for an assembly"""
+        return self._prototype_ids[i]
+
+    def is_assembly(self, i):
+        r"""True if row i is an assembly"""
+        return self._prototype_ids[i] == -1
+
+    def shape_type(self, i):
+        r"""TopAbs_ShapeEnum of the shape of row i"""
+        return self._shape_types[i]
+
+    def absolute_location(self, i):
+        r"""Location of row i in the assembly frame (composition of the locations of its ancestors)
+
+        Returns
+        -------
+        TopLoc.TopLoc_Location
+
+        """
+        location = self.locations[i]
+        parent = self._parents[i]
+        while parent != -1:
+            location = self.locations[parent].Multiplied(location)
+            parent = self._parents[parent]
+        return location
+
+    def shape(self, i):
+        r"""Shape of part row i, located in the assembly frame. None for an assembly.
+
+        The located shape shares its geometry and topology with the prototype.
+
+        Returns
+        -------
+        TopoDS.TopoDS_Shape
+
+        """
+        if self.is_assembly(i):
+            return None
+        return self.prototypes[self._prototype_ids[i]].Located(self.absolute_location(i))
+
+    def rgb(self, i):
+        r"""Color of row i as a (r, g, b) tuple, None if row i has no color"""
+        rgb = tuple(self._rgb[3 * i:3 * i + 3])
+        return None if rgb[0] != rgb[0] else rgb  # NaN
+
+    def layers(self, i):
+        r"""Layer names of row i"""
+        return [self.layer_names[j] for j in self._layer_ids[self._layer_offsets[i]:self._layer_offsets[i + 1]]]
+
+    def material(self, i):
+        r"""Material name of row i, None if row i has no material"""
+        material = self._materials[i]
+        return None if material == -1 else self.material_names[material]
+
+    def to_numpy(self):
+        r"""Columns as NumPy arrays
+
+        Returns
+        -------
+        dict
+            entry, name, layer_names, material_names : arrays of str
+            parent, prototype, material : int32 arrays
+            location : (n, 3, 4) float64 array of the location matrices relative to the parents
+            shape_type : int8 array
+            rgb : (n, 3) float32 array
+            layer_offsets, layer_ids : int32 arrays, the layer ids of row i are
+                layer_ids[layer_offsets[i]:layer_offsets[i + 1]]
+            prototypes : object array of TopoDS_Shape
+
+        """
+        import numpy as np
+
+        prototypes = np.empty(len(self.prototypes), dtype=object)
+        prototypes[:] = self.prototypes
+        locations = np.empty((len(self), 3, 4), dtype=np.float64)
+        for i, location in enumerate(self.locations):
+            trsf = location.Transformation()
+            for row in range(3):
+                for column in range(4):
+                    locations[i, row, column] = trsf.Value(row + 1, column + 1)
+        return {"entry": np.array(self.entries, dtype=str),
+                "name": np.array(self.names, dtype=str),
+                "parent": np.array(self._parents, dtype=np.int32),
+                "prototype": np.array(self._prototype_ids, dtype=np.int32),
+                "location": locations,
+                "shape_type": np.array(self._shape_types, dtype=np.int8),
+                "rgb": np.array(self._rgb, dtype=np.float32).reshape(-1, 3),
+                "layer_offsets": np.array(self._layer_offsets, dtype=np.int32),
+                "layer_ids": np.array(self._layer_ids, dtype=np.int32),
+                "layer_names": np.array(self.layer_names, dtype=str),
+                "material": np.array(self._materials, dtype=np.int32),
+                "material_names": np.array(self.material_names, dtype=str),
+                "prototypes": prototypes}
+
+    def to_pandas(self):
+        r"""Table as a pandas DataFrame (one row per node, layers as tuples of names)
+
+        Returns
+        -------
+        pandas.DataFrame
+
+        """
+        import pandas as pd
+
+        columns = self.to_numpy()
+        return pd.DataFrame({"entry": columns["entry"],
+                             "name": columns["name"],
+                             "parent": columns["parent"],
+                             "prototype": columns["prototype"],
+                             "shape_type": columns["shape_type"],
+                             "r": columns["rgb"][:, 0],
+                             "g": columns["rgb"][:, 1],
+                             "b": columns["rgb"][:, 2],
+                             "layers": [tuple(self.layers(i)) for i in range(len(self))],
+                             "material": [self.material(i) for i in range(len(self))]},
+                            columns=["entry", "name", "parent", "prototype", "shape_type", "r", "g", "b",
+                                     "layers", "material"])
+
+
 class StepOcafImporter(object):
-    r"""Imports STEP file that support layers & colors"""
+    r"""Imports STEP file that support layers & colors
+
+    The assembly tree is stored in an AssemblyTable (see the table property) : each part
+    is stored once as a prototype shape, its instances as (prototype, location) rows.
+
+    Parameters
+    ----------
+    filename : str
+        STEP file
+    cache_filename : str or None
+        OCAF binary (.xbf) cache of the translated document. If the cache is newer than the STEP file,
+        the document is loaded from the cache and the STEP file is not translated. Otherwise the STEP file is
+        translated and the cache is (re)written. None (default) : no cache.
 
-    def __init__(self, filename):
+    """
+
+    def __init__(self, filename, cache_filename=None):
 
         check_importer_filename(filename, step_extensions)
+        if cache_filename is not None:
+            check_exporter_filename(cache_filename, xbf_extensions)
 
         self.filename = filename
-
-        # The shape at index i in the following list corresponds
-        # to the color and layer at index i in their respective lists
-        self._shapes = list()
-        self._colors = list()
-        self._layers = list()
+        self.cache_filename = cache_filename
+        self._table = AssemblyTable()
+        self._solids = None
 
         self.read_file()
 
+    @property
+    def table(self):
+        r"""Assembly tree table
+
+        Returns
+        -------
+        AssemblyTable
+
+        """
+        return self._table
+
+    def _located_solids(self):
+        r"""(row, solid) pairs of the solids of all the parts, located in the assembly frame"""
+        if self._solids is None:
+            self._solids = list()
+            for i in range(len(self._table)):
+                shape_type = self._table.shape_type(i)
+                if self._table.is_assembly(i) or shape_type not in (TopAbs.TopAbs_SOLID, TopAbs.TopAbs_COMPOUND):
+                    continue
+                shape = self._table.shape(i)
+                if shape_type == TopAbs.TopAbs_SOLID:
+                    self._solids.append((i, shape))
+                else:
+                    self._solids.extend((i, solid) for solid in Topo(shape).solids())
+        return self._solids
+
     @property
     def shapes(self):
-        r"""Shapes"""
-        return self._shapes
+        r"""Solids of all the parts instances, located in the assembly frame"""
+        return [solid for _, solid in self._located_solids()]
 
     @property
     def colors(self):
-        r"""Colors"""
-        return self._colors
+        r"""Colors in the same order as self.shapes
+
+        Returns
+        -------
+        list[Quantity.Quantity_Color]
+
+        """
+        colors = list()
+        for i, _ in self._located_solids():
+            rgb = self._table.rgb(i)
+            if rgb is None:
+                colors.append(Quantity.Quantity_Color())
+            else:
+                colors.append(Quantity.Quantity_Color(rgb[0], rgb[1], rgb[2], Quantity.Quantity_TOC_RGB))
+        return colors
 
     @property
     def layers(self):
-        r"""Layers"""
-        return self._layers
+        r"""Layer names in the same order as self.shapes
+
+        Returns
+        -------
+        list[list[str]]
+
+        """
+        return [self._table.layers(i) for i, _ in self._located_solids()]
 
     @property
     def layers_str(self):
@@ -70,21 +399,22 @@ class StepOcafImporter(object):
         examples/export_multi_to_step_colors_layers_ocaf.py
 
         """
-        layer_string_list = list()
-        for i, layer in enumerate(self._layers):
-            string = ""
-            for j in range(1, layer.GetObject().Length() + 1):
-                extended_string = layer.GetObject().Value(j)
+        return ["".join(layers) for layers in self.layers]
 
-                for k in range(1, extended_string.Length() + 1):
-                    ascii_code = extended_string.Value(k)
-                    string += (chr(ascii_code))
+    @property
+    def cache_is_fresh(self):
+        r"""True if the cache file exists and is at least as recent as the STEP file"""
+        return (self.cache_filename is not None and os.path.isfile(self.cache_filename) and
+                os.path.getmtime(self.cache_filename) >= os.path.getmtime(self.filename))
 
-            layer_string_list.append(string)
-        return layer_string_list
+    def _translate(self):
+        r"""Translate the STEP file into a new XDE document
 
-    def read_file(self):
-        r"""Read file"""
+        Returns
+        -------
+        TDocStd.Handle_TDocStd_Document
+
+        """
         logger.info("Reading STEP file")
         h_doc = TDocStd.Handle_TDocStd_Document()
 
@@ -94,10 +424,6 @@ class StepOcafImporter(object):
 
         # Get root assembly
         doc = h_doc.GetObject()
-        h_shape_tool = XCAFDoc.XCAFDoc_DocumentTool().ShapeTool(doc.Main()).GetObject()
-        color_tool = XCAFDoc.XCAFDoc_DocumentTool().ColorTool(doc.Main()).GetObject()
-        layer_tool = XCAFDoc.XCAFDoc_DocumentTool().LayerTool(doc.Main()).GetObject()
-        l_materials = XCAFDoc.XCAFDoc_DocumentTool().MaterialTool(doc.Main()).GetObject()
 
         step_reader = STEPCAFControl.STEPCAFControl_Reader()
         step_reader.SetColorMode(True)
@@ -111,68 +437,292 @@ class StepOcafImporter(object):
             logger.info("Transfer doc to STEPCAFControl_Reader")
             step_reader.Transfer(doc.GetHandle())
         else:
+            app.Close(h_doc)
             raise ValueError("could not read {}".format(self.filename))
+        return h_doc
 
-        labels = TDF.TDF_LabelSequence()
-        color_labels = TDF.TDF_LabelSequence()
-        # TopoDS_Shape a_shape;
-        h_shape_tool.GetFreeShapes(labels)
-        h_shape_tool.GetShapes(labels)
-
-        logger.info('Number of shapes at root :%i' % labels.Length())
-
-        # for i in range(labels.Length()):
-        #     a_shape = h_shape_tool.GetObject().GetShape(labels.Value(i+1))
-        #     logger.debug("%i - type : %s" % (i, a_shape.ShapeType()))
-        #     sub_shapes_labels = TDF.TDF_LabelSequence()
-        #     print("Is Assembly?", shape_tool.IsAssembly(labels.Value(i + 1)))
-        #     # sub_shapes = shape_tool.getsubshapes(labels.Value(i+1), sub_shapes_labels)
-        #
-        #     sub_shapes = shape_tool.FindSubShape(labels.Value(i + 1), a_shape, labels.Value(i + 1))
-        #     print('Number of subshapes in the assembly : %i' % sub_shapes_labels.Length())
-        #
-        # color_tool.GetObject().GetColors(color_labels)
-        # logger.info('Number of colors : %i' % color_labels.Length())
-
-        for i in range(labels.Length()):
-            # print i
-            label = labels.Value(i + 1)
-            logger.debug("Label : %s" % label)
-            a_shape = h_shape_tool.GetShape(labels.Value(i + 1))
-
-            # string_seq = TColStd.TColStd_HSequenceOfExtendedString()
-            # string_seq is an TColStd.TColStd_HSequenceOfExtendedString
-            string_seq = layer_tool.GetLayers(a_shape)
-            color = Quantity.Quantity_Color()
-            c = color_tool.GetColor(a_shape, XCAFDoc.XCAFDoc_ColorSurf, color)
-
-            logger.info("The shape type is : %i" % a_shape.ShapeType())
-            if a_shape.ShapeType() == TopAbs.TopAbs_COMPOUND:
-                logger.info("The shape type is TopAbs.TopAbs_COMPOUND")
-                topo = Topo(a_shape)
-                logger.info("Nb of compounds : %i" % topo.number_of_compounds)
-                logger.info("Nb of solids : %i" % topo.number_of_solids)
-                logger.info("Nb of shells : %i" % topo.number_of_shells)
-                for solid in topo.solids:
-                    logger.info("Adding solid to the shapes list")
-                    self._shapes.append(solid)
-            elif a_shape.ShapeType() == TopAbs.TopAbs_SOLID:
-                logger.info("The shape type is TopAbs.TopAbs_SOLID")
-                self._shapes.append(a_shape)
-                self._colors.append(color)
-                self._layers.append(string_seq)
+    def read_file(self):
+        r"""Read file, or its cache if the cache is fresh
 
+        The STEP file is translated if the cache cannot be loaded. A cache that cannot be saved is logged,
+        the file is read all the same.
+        """
+        h_doc, translated = None, False
+        if self.cache_is_fresh:
+            logger.info("Loading the document from the cache %s" % self.cache_filename)
+            try:
+                h_doc = load_document(self.cache_filename)
+            except (AssertionError, ValueError) as e:
+                logger.warning("Could not load the cache %s, translating the STEP file : %s" %
+                               (self.cache_filename, str(e)))
+        if h_doc is None:
+            h_doc, translated = self._translate(), True
+
+        self._table = AssemblyTable()
+        try:
+            if translated and self.cache_filename is not None:
+                try:
+                    save_document(h_doc, self.cache_filename)
+                except (AssertionError, ValueError, IOError, OSError) as e:
+                    logger.error("Could not save the cache %s : %s" % (self.cache_filename, str(e)))
+            _AssemblyWalker(h_doc.GetObject(), self._table).walk()
+        finally:
+            # the shapes outlive the document
+            XCAFApp._XCAFApp.XCAFApp_Application_GetApplication().GetObject().Close(h_doc)
+        self._solids = None
+        logger.info("%i node(s), %i unique part(s)" % (len(self._table), len(self._table.prototypes)))
         return True
 
 
+def save_document(h_doc, filename):
+    r"""Save a XDE document in the OCAF binary format (BinXCAF)
+
+    The document is saved to a temporary file in the directory of filename, then renamed :
+    filename is either the previous file or the complete document, never a partial one.
+
+    Parameters
+    ----------
+    h_doc : TDocStd.Handle_TDocStd_Document
+        document of the XCAFApp application
+    filename : str
+        .xbf file
+
+    Raises
+    ------
+    ValueError
+        if the document could not be saved
+
+    """
+    check_exporter_filename(filename, xbf_extensions)
+    check_overwrite(filename)
+
+    h_doc.GetObject().ChangeStorageFormat(TCollection.TCollection_ExtendedString("BinXCAF"))
+    app = XCAFApp._XCAFApp.XCAFApp_Application_GetApplication().GetObject()
+    directory, basename = os.path.split(os.path.abspath(filename))
+    fd, temporary_filename = tempfile.mkstemp(suffix=os.path.splitext(basename)[1], prefix=basename + ".",
+                                              dir=directory)
+    os.close(fd)
+    try:
+        status = app.SaveAs(h_doc, TCollection.TCollection_ExtendedString(temporary_filename))
+        if status != PCDM.PCDM_SS_OK:
+            msg = "Could not save the document to %s (PCDM_StoreStatus %i)" % (filename, status)
+            logger.error(msg)
+            raise ValueError(msg)
+        getattr(os, "replace", os.rename)(temporary_filename, filename)  # os.replace() is Python 3.3+
+    finally:
+        if os.path.isfile(temporary_filename):
+            os.remove(temporary_filename)
+    logger.info("Document saved to %s" % filename)
+
+
+def load_document(filename):
+    r"""Load a XDE document saved in the OCAF binary format (BinXCAF)
+
+    The document is opened in the XCAFApp application, close it with the application Close() method
+    when done.
+
+    Parameters
+    ----------
+    filename : str
+        .xbf file
+
+    Returns
+    -------
+    TDocStd.Handle_TDocStd_Document
+
+    Raises
+    ------
+    ValueError
+        if the document could not be loaded
+
+    """
+    check_importer_filename(filename, xbf_extensions)
+
+    h_doc = TDocStd.Handle_TDocStd_Document()
+    app = XCAFApp._XCAFApp.XCAFApp_Application_GetApplication().GetObject()
+    status = app.Open(TCollection.TCollection_ExtendedString(filename), h_doc)
+    if status != PCDM.PCDM_RS_OK:
+        msg = "Could not load the document from %s (PCDM_ReaderStatus %i)" % (filename, status)
+        logger.error(msg)
+        raise ValueError(msg)
+    return h_doc
+
+
+class _AssemblyWalker(object):
+    r"""Fills an AssemblyTable from the XCAFDoc_ShapeTool of a document
+
+    Parameters
+    ----------
+    doc : TDocStd.TDocStd_Document
+    table : AssemblyTable
+
+    """
+
+    def __init__(self, doc, table):
+        self._shape_tool = XCAFDoc.XCAFDoc_DocumentTool().ShapeTool(doc.Main()).GetObject()
+        self._color_tool = XCAFDoc.XCAFDoc_DocumentTool().ColorTool(doc.Main()).GetObject()
+        self._strings = _LabelStrings(XCAFDoc.XCAFDoc_DocumentTool().LayerTool(doc.Main()).GetObject(),
+                                      XCAFDoc.XCAFDoc_DocumentTool().MaterialTool(doc.Main()).GetObject())
+        self._table = table
+        self._prototypes = dict()  # prototype label entry -> prototype index
+
+    def walk(self):
+        r"""Walk the assembly tree from the free shapes"""
+        labels = TDF.TDF_LabelSequence()
+        self._shape_tool.GetFreeShapes(labels)
+        logger.info("Number of free shapes : %i" % labels.Length())
+        for i in range(1, labels.Length() + 1):
+            self._add_node(labels.Value(i), None, -1)
+
+    def _add_node(self, label, component, parent):
+        r"""Add the node of label (an assembly or a part) and, for an assembly, its components
+
+        Parameters
+        ----------
+        label : TDF.TDF_Label
+            the assembly or part label (the referred label for a component)
+        component : TDF.TDF_Label or None
+            the component (instance) label, None for a free shape
+        parent : int
+            index of the parent row
+
+        """
+        strings = self._strings
+        entry = _label_entry(label)
+        if component is None:
+            instance_entry, location, name = entry, TopLoc.TopLoc_Location(), strings.name(label, entry)
+            rgb = _label_color(label, self._color_tool)
+            layers = strings.layers(label, entry)
+        else:
+            instance_entry = _label_entry(component)
+            location = self._shape_tool.GetLocation(component)
+            name = strings.name(component, instance_entry) or strings.name(label, entry)
+            # an instance color overrides the product color
+            rgb = _label_color(component, self._color_tool) or _label_color(label, self._color_tool)
+            layers = strings.layers(component, instance_entry)
+            layers += [layer for layer in strings.layers(label, entry) if layer not in layers]
+        material = strings.material(label, entry)
+
+        if self._shape_tool.IsAssembly(label):
+            row = self._table.add(instance_entry, name, -1, location, parent, rgb, layers, material)
+            components = TDF.TDF_LabelSequence()
+            self._shape_tool.GetComponents(label, components, False)
+            for i in range(1, components.Length() + 1):
+                referred = TDF.TDF_Label()
+                if self._shape_tool.GetReferredShape(components.Value(i), referred):
+                    self._add_node(referred, components.Value(i), row)
+        else:
+            if entry not in self._prototypes:
+                self._prototypes[entry] = self._table.add_prototype(self._shape_tool.GetShape(label))
+            self._table.add(instance_entry, name, self._prototypes[entry], location, parent, rgb, layers, material)
+
+
+def _label_entry(label):
+    r"""Entry of a TDF_Label (e.g. "0:1:1:3")"""
+    entry = TCollection.TCollection_AsciiString()
+    TDF.TDF_Tool().Entry(label, entry)
+    return entry.ToCString()
+
+
+def _label_color(label, color_tool):
+    r"""Surface (or generic) color of a shape label as a (r, g, b) tuple, None if the label has no color"""
+    color = Quantity.Quantity_Color()
+    for color_type in (XCAFDoc.XCAFDoc_ColorSurf, XCAFDoc.XCAFDoc_ColorGen):
+        if color_tool.GetColor(label, color_type, color):
+            return color.Red(), color.Green(), color.Blue()
+    return None
+
+
+class _LabelStrings(object):
+    r"""Names, layer names and material names of the labels of a XDE document, converted once
+
+    The conversions to str are cached by label entry : a part instanced many times, and a layer or a
+    material shared by many shapes, are converted only once.
+
+    Parameters
+    ----------
+    layer_tool : XCAFDoc.XCAFDoc_LayerTool
+    material_tool : XCAFDoc.XCAFDoc_MaterialTool
+
+    """
+
+    def __init__(self, layer_tool, material_tool):
+        self._layer_tool = layer_tool
+        self._material_tool = material_tool
+        self._names = dict()  # label entry -> name
+        self._layers = dict()  # shape label entry -> tuple of layer names
+        self._layer_names = dict()  # layer label entry -> layer name
+        self._materials = dict()  # shape label entry -> material name or None
+
+    def name(self, label, entry):
+        r"""Name attribute of a label, "" if the label has no name"""
+        if entry not in self._names:
+            h_name = TDataStd.Handle_TDataStd_Name()
+            if label.FindAttribute(TDataStd.TDataStd_Name_GetID(), h_name):
+                self._names[entry] = _extended_string_to_str(h_name.GetObject().Get())
+            else:
+                self._names[entry] = ""
+        return self._names[entry]
+
+    def layers(self, label, entry):
+        r"""Layer names of a shape label (a new list)"""
+        if entry not in self._layers:
+            layer_labels = TDF.TDF_LabelSequence()
+            self._layer_tool.GetLayers(label, layer_labels)
+            names = list()
+            for j in range(1, layer_labels.Length() + 1):
+                layer_label = layer_labels.Value(j)
+                layer_entry = _label_entry(layer_label)
+                if layer_entry not in self._layer_names:
+                    layer_name = TCollection.TCollection_ExtendedString()
+                    self._layer_tool.GetLayer(layer_label, layer_name)
+                    self._layer_names[layer_entry] = _extended_string_to_str(layer_name)
+                names.append(self._layer_names[layer_entry])
+            self._layers[entry] = tuple(names)
+        return list(self._layers[entry])
+
+    def material(self, label, entry):
+        r"""Name of the material of a shape label, None if the shape has no material"""
+        if entry not in self._materials:
+            self._materials[entry] = _label_material(label, self._material_tool)
+        return self._materials[entry]
+
+
+def _label_material(label, material_tool):
+    r"""Name of the material of a shape label, None if the shape has no material"""
+    h_node = TDataStd.Handle_TDataStd_TreeNode()
+    if not label.FindAttribute(XCAFDoc.xcafdoc_MaterialRefGUID(), h_node) or not h_node.GetObject().HasFather():
+        return None
+    material_label = h_node.GetObject().Father().GetObject().Label()
+    h_name = TCollection.Handle_TCollection_HAsciiString()
+    h_description = TCollection.Handle_TCollection_HAsciiString()
+    h_density_name = TCollection.Handle_TCollection_HAsciiString()
+    h_density_value_type = TCollection.Handle_TCollection_HAsciiString()
+    found, _density = material_tool.GetMaterial(material_label, h_name, h_description, h_density_name,
+                                                h_density_value_type)
+    if not found or h_name.IsNull():
+        return None
+    return h_name.GetObject().ToCString()
+
+
 class StepOcafExporter(object):
-    r"""STEP export that support layers & colors"""
+    r"""STEP export that support layers & colors
+
+    Parameters
+    ----------
+    filename : str or None
+        None for an exporter that only writes to streams (write_to()) or bytes (to_bytes())
+    layer_name : str
+        name of the initial current layer
+
+    """
 
-    def __init__(self, filename, layer_name='layer-00'):
+    def __init__(self, filename=None, layer_name='layer-00'):
         logger.info("StepOcafExporter instantiated with filename : %s" % filename)
 
-        check_exporter_filename(filename, step_extensions)
-        check_overwrite(filename)
+        if filename is not None:
+            check_exporter_filename(filename, step_extensions, compressed=True)
+            check_overwrite(filename)
 
         self.filename = filename
         self.h_doc = h_doc = TDocStd.Handle_TDocStd_Document()
@@ -195,6 +745,7 @@ class StepOcafExporter(object):
         self.current_color = Quantity.Quantity_Color(Quantity.Quantity_NOC_RED)
         self.current_layer = self.layers.AddLayer(TCollection.TCollection_ExtendedString(layer_name))
         self.layer_names = {}
+        self._color_labels = {}  # (r, g, b) -> color label
 
     def set_color(self, r=1, g=1, b=1, color=None):
         r"""Set color
@@ -230,6 +781,23 @@ class StepOcafExporter(object):
             self.current_layer = self.layers.AddLayer(TCollection.TCollection_ExtendedString(layer_name))
             self.layer_names[layer_name] = self.current_layer
 
+    def _color_label(self, color):
+        r"""Label of a color in the document color table, the color is added to the table the first time
+
+        Parameters
+        ----------
+        color : Quantity.Quantity_Color
+
+        Returns
+        -------
+        TDF.TDF_Label
+
+        """
+        key = (color.Red(), color.Green(), color.Blue())
+        if key not in self._color_labels:
+            self._color_labels[key] = self.colors.AddColor(color)
+        return self._color_labels[key]
+
     def add_shape(self, shape, color=None, layer=None):
         r"""add a shape to export
 
@@ -252,25 +820,122 @@ class StepOcafExporter(object):
 
         shp_label = self.shape_tool.AddShape(shape)
 
-        if color is None:
-            self.colors.SetColor(shp_label, self.current_color, XCAFDoc.XCAFDoc_ColorGen)
-        else:
+        if color is not None:
             if isinstance(color, Quantity.Quantity_Color):
                 self.current_color = color
             else:
                 assert len(color) == 3, 'expected a tuple with three values < 1.'
                 r, g, b = color
                 self.set_color(r, g, b)
-            self.colors.SetColor(shp_label, self.current_color, XCAFDoc.XCAFDoc_ColorGen)
+        self.colors.SetColor(shp_label, self._color_label(self.current_color), XCAFDoc.XCAFDoc_ColorGen)
 
-        if layer is None:
-            self.layers.SetLayer(shp_label, self.current_layer)
-        else:
+        if layer is not None:
             self.set_layer(layer)
-            self.layers.SetLayer(shp_label, self.current_layer)
+        self.layers.SetLayer(shp_label, self.current_layer)
+
+    def add_shapes(self, shapes, colors=None, layers=None):
+        r"""Add several shapes to export
+
+        Each distinct color and layer is added once to the document, the shapes then reference them.
+        Unlike add_shape(), the current color and layer are not changed.
+
+        Parameters
+        ----------
+        shapes : list[TopoDS_Shape]
+        colors : array like or None
+            (N, 3) array of r, g, b values in [0, 1], one row per shape.
+            None (default) uses the current color for all the shapes.
+        layers : list[str] or None
+            one layer name per shape. None (default) uses the current layer for all the shapes.
+
+        Returns
+        -------
+        list[TDF.TDF_Label]
+            the labels of the shapes
+
+        Raises
+        ------
+        ValueError
+            if the number of colors or layers is not the number of shapes, or a shape is not valid.
+            Nothing is added to the document then.
+
+        """
+        import numpy as np
+
+        # check everything before the document is changed : the shapes are all added or none is
+        nb_shapes = len(shapes)
+        for shape in shapes:
+            check_shape(shape)  # raises an exception if the shape is not valid
+        if colors is not None:
+            colors = np.asarray(colors, dtype=np.float64)
+            if colors.shape != (nb_shapes, 3):
+                msg = "Expecting a (%i, 3) colors array, got %s" % (nb_shapes, str(colors.shape))
+                logger.error(msg)
+                raise ValueError(msg)
+        if layers is not None and len(layers) != nb_shapes:
+            msg = "Expecting %i layer names, got %i" % (nb_shapes, len(layers))
+            logger.error(msg)
+            raise ValueError(msg)
+
+        if colors is None:
+            color_labels = [self._color_label(self.current_color)]
+            color_indices = np.zeros(nb_shapes, dtype=np.int64)
+        else:
+            unique_colors, color_indices = np.unique(colors, axis=0, return_inverse=True)
+            color_indices = color_indices.ravel()
+            color_labels = [self._color_label(Quantity.Quantity_Color(r, g, b, Quantity.Quantity_TOC_RGB))
+                            for r, g, b in unique_colors.tolist()]
+
+        if layers is None:
+            layer_labels = [self.current_layer] * nb_shapes
+        else:
+            for layer_name in set(layers) - set(self.layer_names):
+                self.layer_names[layer_name] = self.layers.AddLayer(TCollection.TCollection_ExtendedString(layer_name))
+            layer_labels = [self.layer_names[layer_name] for layer_name in layers]
+
+        add_shape, set_color, set_layer = self.shape_tool.AddShape, self.colors.SetColor, self.layers.SetLayer
+        color_gen = XCAFDoc.XCAFDoc_ColorGen
+        labels = list()
+        for shape, color_index, layer_label in zip(shapes, color_indices.tolist(), layer_labels):
+            shp_label = add_shape(shape)
+            set_color(shp_label, color_labels[color_index], color_gen)
+            set_layer(shp_label, layer_label)
+            labels.append(shp_label)
+        logger.info("%i shapes added, %i distinct color(s)" % (nb_shapes, len(color_labels)))
+        return labels
 
     def write_file(self):
         r"""Write file"""
+        check_exporter_has_filename(self.filename)
+        if codec_from_extension(self.filename) is not None:
+            write_compressed(self.write_to, self.filename)
+        else:
+            self._write(self.filename)
+
+    def write_to(self, stream):
+        r"""Write the STEP file content to a binary stream (e.g. a socket file or a buffer)
+
+        The STEPCAFControl writer only writes files : the content goes through a temporary file.
+
+        Parameters
+        ----------
+        stream : binary file like object
+
+        """
+        write_through_file(self._write, step_extensions[0], stream)
+
+    def to_bytes(self):
+        r"""STEP file content
+
+        Returns
+        -------
+        bytes
+
+        """
+        return written_bytes(self.write_to)
+
+    def _write(self, filename):
+        r"""Write the STEP file to filename"""
         work_session = XSControl.XSControl_WorkSession()
         writer = STEPCAFControl.STEPCAFControl_Writer(work_session.GetHandle(), False)
 
@@ -281,7 +946,7 @@ class StepOcafExporter(object):
             raise ValueError(msg)
         logger.info('Writing STEP file')
 
-        write_status = writer.Write(self.filename)
+        write_status = writer.Write(filename)
         if write_status == IFSelect.IFSelect_RetDone:
             logger.info("STEP file write successful.")
         else:
@@ -5,31 +5,116 @@ r"""STL module of OCCDataExchange"""
 
 from __future__ import print_function
 
+import importlib
 import logging
+import re
+import struct
 
-from OCC import StlAPI
-from OCC import TopoDS
-from OCC.BRepMesh import BRepMesh_IncrementalMesh
-from OCCDataExchange.checks import check_importer_filename, check_exporter_filename, check_overwrite, check_shape
+from OCCDataExchange.checks import check_importer_source, check_exporter_filename, check_exporter_has_filename, \
+    check_overwrite, check_shape
+from OCCDataExchange.compression import codec_from_extension, write_compressed
 from OCCDataExchange.extensions import stl_extensions
+from OCCDataExchange.utils import is_plain_file, read_source, source_name, written_bytes
 
 logger = logging.getLogger(__name__)
 
 
+def preload():
+    r"""Import the OpenCascade modules used by this module (see OCCDataExchange.registry.Format.preload())"""
+    from OCCDataExchange import mesh
+
+    for module_name in ["OCC.StlAPI", "OCC.TopoDS"]:
+        importlib.import_module(module_name)
+    mesh.preload()
+
+
+_VERTEX = re.compile(br"vertex\s+(\S+)\s+(\S+)\s+(\S+)")
+
+_CHUNK_SIZE = 65536  # facets formatted at once in ASCII STL
+
+
+def read_stl(filename):
+    r"""Read the triangles of a binary or ASCII STL file, identical vertices are merged
+
+    Parameters
+    ----------
+    filename : str, bytes, bytearray, memoryview or binary file object
+
+    Returns
+    -------
+    tuple(numpy.ndarray, numpy.ndarray)
+        (n, 3) float64 array of vertices, (m, 3) int64 array of triangles
+
+    """
+    import numpy as np
+    from OCCDataExchange.mesh import weld_vertices
+
+    data = read_source(filename)
+    if len(data) >= 84 and len(data) == 84 + 50 * struct.unpack("<I", data[80:84])[0]:
+        facets = np.frombuffer(data, dtype=np.dtype([("normal", "<f4", 3), ("vertices", "<f4", (3, 3)),
+                                                     ("attribute", "<u2")]), offset=84)
+        vertices = facets["vertices"].reshape(-1, 3)
+    else:
+        vertices = np.array(_VERTEX.findall(data), dtype=np.float64).reshape(-1, 3)
+    return weld_vertices(vertices, np.arange(len(vertices)).reshape(-1, 3))
+
+
+def write_stl(stream, vertices, triangles, ascii_mode=False):
+    r"""Write triangles to a binary stream in the STL format
+
+    Parameters
+    ----------
+    stream : binary file like object
+    vertices : numpy.ndarray
+        (n, 3) float array
+    triangles : numpy.ndarray
+        (m, 3) int array, counterclockwise when seen from outside the material
+    ascii_mode : bool
+        if True, write an ASCII STL, otherwise a binary STL
+
+    """
+    import numpy as np
+
+    corners = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)[np.asarray(triangles, dtype=np.int64)]
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    lengths = np.linalg.norm(normals, axis=1)
+    normals[lengths > 0] /= lengths[lengths > 0, np.newaxis]
+
+    if ascii_mode:
+        template = ("facet normal %.9e %.9e %.9e\n outer loop\n  vertex %.9e %.9e %.9e\n"
+                    "  vertex %.9e %.9e %.9e\n  vertex %.9e %.9e %.9e\n endloop\nendfacet\n")
+        rows = np.hstack([normals, corners.reshape(-1, 9)])
+        stream.write(b"solid OCCDataExchange\n")
+        for start in range(0, len(rows), _CHUNK_SIZE):
+            chunk = rows[start:start + _CHUNK_SIZE]
+            stream.write(((template * len(chunk)) % tuple(chunk.ravel().tolist())).encode("ascii"))
+        stream.write(b"endsolid OCCDataExchange\n")
+        return
+
+    facets = np.zeros(len(corners), dtype=np.dtype([("normal", "<f4", 3), ("vertices", "<f4", (3, 3)),
+                                                    ("attribute", "<u2")]))
+    facets["normal"] = normals
+    facets["vertices"] = corners
+    stream.write(b"OCCDataExchange binary STL".ljust(80, b" "))
+    stream.write(struct.pack("<I", len(facets)))
+    stream.write(facets.tobytes())
+
+
 class StlImporter(object):
     r"""STL importer
 
     Parameters
     ----------
-    filename : str
+    filename : str, bytes, bytearray, memoryview or binary file object
+        In memory data and compressed files are read by read_stl(), without going through the disk
 
     """
 
     def __init__(self, filename):
-        logger.info("StlImporter instantiated with filename : %s" % filename)
+        logger.info("StlImporter instantiated with filename : %s" % source_name(filename))
 
-        check_importer_filename(filename, stl_extensions)
-        self._filename = filename
+        check_importer_source(filename, stl_extensions, compressed=True)
+        self._source = filename
         self._shape = None
 
         logger.info("Reading file ....")
@@ -37,9 +122,18 @@ class StlImporter(object):
 
     def read_file(self):
         r"""Read the STL file and stores the result in a TopoDS_Shape"""
+        if not is_plain_file(self._source):
+            from OCCDataExchange.mesh import arrays_to_shape
+
+            self._shape = arrays_to_shape(*read_stl(self._source))
+            return
+
+        from OCC import StlAPI
+        from OCC import TopoDS
+
         stl_reader = StlAPI.StlAPI_Reader()
         shape = TopoDS.TopoDS_Shape()
-        stl_reader.Read(shape, self._filename)
+        stl_reader.Read(shape, self._source)
         self._shape = shape
 
     @property
@@ -56,7 +150,8 @@ class StlExporter(object):
 
     Parameters
     ----------
-    :param: filename: str
+    :param: filename: str or None: None for an exporter that only writes to
+        streams (write_to()) or bytes (to_bytes())
     :param: ascii_mode : bool (default is False)
     :param: line_deflection: float: default 0.9: linear deflection for meshing
         the shape (default is 0.9)
@@ -75,8 +170,9 @@ class StlExporter(object):
         logger.info("StlExporter instantiated with filename : %s" % filename)
         logger.info("StlExporter ascii : %s" % str(ascii_mode))
 
-        check_exporter_filename(filename, stl_extensions)
-        check_overwrite(filename)
+        if filename is not None:
+            check_exporter_filename(filename, stl_extensions, compressed=True)
+            check_overwrite(filename)
 
         self._shape = None  # only one shape can be exported
         self._ascii_mode = ascii_mode
@@ -100,11 +196,42 @@ class StlExporter(object):
 
     def write_file(self):
         r"""Write file"""
-        mesh = BRepMesh_IncrementalMesh(
-            self._shape, self._line_deflection, self._is_relative,
-            self._angular_deflection, self._in_parallel)
-        mesh.Perform()
+        from OCC import StlAPI
+        from OCCDataExchange.mesh import mesh_shape
+
+        check_exporter_has_filename(self._filename)
+        if codec_from_extension(self._filename) is not None:
+            write_compressed(self.write_to, self._filename)
+            return
+        mesh_shape(self._shape, self._line_deflection, self._is_relative, self._angular_deflection,
+                   self._in_parallel)
         stl_writer = StlAPI.StlAPI_Writer()
         stl_writer.SetASCIIMode(self._ascii_mode)
         stl_writer.Write(self._shape, self._filename)
         logger.info("Wrote STL file")
+
+    def write_to(self, stream):
+        r"""Write the STL file content to a binary stream (e.g. a socket file or a buffer)
+
+        The mesh is written by write_stl(), without going through the disk.
+
+        Parameters
+        ----------
+        stream : binary file like object
+
+        """
+        from OCCDataExchange.mesh import mesh_shape, triangulation_arrays
+
+        mesh_shape(self._shape, self._line_deflection, self._is_relative, self._angular_deflection,
+                   self._in_parallel)
+        write_stl(stream, *triangulation_arrays(self._shape), ascii_mode=self._ascii_mode)
+
+    def to_bytes(self):
+        r"""STL file content
+
+        Returns
+        -------
+        bytes
+
+        """
+        return written_bytes(self.write_to)
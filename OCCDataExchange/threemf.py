@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""3MF module of OCCDataExchange
+
+Summary
+-------
+
+Export of shapes to 3MF (3D Manufacturing Format) packages : a zip of XML parts, the 3D model part
+holding the meshes (objects, with shared vertices) and the build (items, instances of the objects
+with their transforms).
+
+Each distinct solid is meshed once and its mesh XML is streamed in large chunks into the zip
+so that the memory used does not depend on the size of the build.
+
+"""
+
+from __future__ import print_function
+
+import importlib
+import logging
+import os
+import sys
+import tempfile
+import zipfile
+
+from OCCDataExchange.checks import check_exporter_filename, check_overwrite, check_shape
+from OCCDataExchange.extensions import threemf_extensions
+from OCCDataExchange.mesh import Prototypes, shape_to_arrays, trsf_to_matrix
+
+logger = logging.getLogger(__name__)
+
+
+def preload():
+    r"""Import the OpenCascade modules used by this module (see OCCDataExchange.registry.Format.preload())"""
+    from OCCDataExchange import mesh
+
+    importlib.import_module("OCCUtils.Topology")
+    mesh.preload()
+
+
+_CONTENT_TYPES = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+                  '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                  '<Default Extension="rels" '
+                  'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                  '<Default Extension="model" '
+                  'ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>'
+                  '</Types>')
+
+_RELATIONSHIPS = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+                  '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                  '<Relationship Target="/3D/3dmodel.model" Id="rel0" '
+                  'Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>'
+                  '</Relationships>')
+
+_MODEL_PART = "3D/3dmodel.model"
+
+_CHUNK_SIZE = 65536  # vertices or triangles formatted at once
+
+_UNITS = ["micron", "millimeter", "centimeter", "inch", "foot", "meter"]
+
+
+def _escape(text):
+    r"""Escape text for an XML attribute value"""
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+
+
+def _display_color(rgb):
+    r"""3MF display color (#RRGGBBAA) of a (r, g, b) tuple in [0, 1]"""
+    return "#%02X%02X%02XFF" % tuple(int(round(255 * min(max(component, 0.), 1.))) for component in rgb)
+
+
+def _transform(trsf):
+    r"""3MF transform attribute value of a gp_Trsf
+
+    3MF transforms apply to row vectors : the 4x3 matrix is the transpose of the OpenCascade 3x4 matrix.
+    """
+    matrix = trsf_to_matrix(trsf)
+    return " ".join("%.9g" % value for value in list(matrix[:3, :3].T.ravel()) + list(matrix[:3, 3]))
+
+
+def _chunks(rows, template):
+    r"""Format the rows of a 2D array with template, in chunks of _CHUNK_SIZE rows"""
+    for start in range(0, len(rows), _CHUNK_SIZE):
+        chunk = rows[start:start + _CHUNK_SIZE]
+        # a single formatting call per chunk
+        yield (template * len(chunk)) % tuple(chunk.ravel().tolist())
+
+
+class ThreeMfExporter(object):
+    r"""3MF exporter
+
+    Each solid added is a build item. Solids sharing the same topology (instances) share their
+    3MF object, and thus their mesh.
+
+    Parameters
+    ----------
+    filename : str
+    line_deflection : float
+        linear deflection for meshing the shapes (default is 0.9)
+    is_relative : bool
+        if True the deflection used for each edge is line_deflection * size of the edge
+    angular_deflection : float
+    in_parallel : bool
+        if True the shapes are meshed in parallel
+    unit : str
+        unit of the model coordinates, one of micron, millimeter (default), centimeter, inch, foot, meter
+
+    """
+
+    def __init__(self, filename, line_deflection=0.9, is_relative=False, angular_deflection=0.5, in_parallel=False,
+                 unit="millimeter"):
+        logger.info("ThreeMfExporter instantiated with filename : %s" % filename)
+
+        check_exporter_filename(filename, threemf_extensions)
+        check_overwrite(filename)
+        if unit not in _UNITS:
+            msg = "Unknown 3MF unit %s, accepted units are %s" % (unit, str(_UNITS))
+            logger.error(msg)
+            raise AssertionError(msg)
+
+        self._filename = filename
+        self._mesh_parameters = (line_deflection, is_relative, angular_deflection, in_parallel)
+        self._unit = unit
+
+        self._prototypes = Prototypes()  # shapes meshed once
+        self._items = list()  # (prototype index, rgb or None, name or None, gp_Trsf or None)
+
+    def add_shape(self, a_shape, rgb=None, name=None):
+        r"""Add a shape to export
+
+        Each solid of the shape becomes a separate build item. A shape without solids is a single item.
+
+        Parameters
+        ----------
+        a_shape : TopoDS.TopoDS_Shape
+        rgb : tuple(float, float, float) or None
+            color, in [0, 1]
+        name : str or None
+
+        """
+        from OCCUtils.Topology import Topo
+
+        check_shape(a_shape)  # raises an exception if the shape is not valid
+        solids = list(Topo(a_shape).solids()) or [a_shape]
+        for solid in solids:
+            location = solid.Location()
+            trsf = None if location.IsIdentity() else location.Transformation()
+            self._items.append((self._prototypes.add(solid), None if rgb is None else tuple(rgb), name, trsf))
+
+    def _write_model(self, f):
+        r"""Stream the 3D model part to the binary file like object f"""
+        def write(text):
+            f.write(text.encode("utf-8"))
+
+        line_deflection, is_relative, angular_deflection, in_parallel = self._mesh_parameters
+
+        colors = sorted(set(rgb for _, rgb, _, _ in self._items if rgb is not None))
+        color_indices = dict((rgb, i) for i, rgb in enumerate(colors))
+
+        write('<?xml version="1.0" encoding="UTF-8"?>\n'
+              '<model unit="%s" xml:lang="en-US" '
+              'xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02">\n<resources>\n' % self._unit)
+        if colors:
+            write('<basematerials id="1">')
+            for rgb in colors:
+                write('<base name="%s" displaycolor="%s"/>' % (_display_color(rgb), _display_color(rgb)))
+            write('</basematerials>\n')
+
+        # one object per (prototype, color) pair, most parts have a single color
+        object_ids = dict()
+        for prototype, rgb, _, _ in self._items:
+            if (prototype, rgb) in object_ids:
+                continue
+            vertices, triangles = shape_to_arrays(self._prototypes[prototype], line_deflection, is_relative,
+                                                  angular_deflection, in_parallel)
+            if len(triangles) == 0:
+                logger.warning("Shape %i has no triangles, it is not exported" % prototype)
+                object_ids[(prototype, rgb)] = None
+                continue
+            object_id = len(object_ids) + 2  # id 1 is the base materials
+            object_ids[(prototype, rgb)] = object_id
+            material = "" if rgb is None else ' pid="1" pindex="%i"' % color_indices[rgb]
+            write('<object id="%i" type="model"%s><mesh>\n<vertices>\n' % (object_id, material))
+            for text in _chunks(vertices, '<vertex x="%.9g" y="%.9g" z="%.9g"/>\n'):
+                write(text)
+            write('</vertices>\n<triangles>\n')
+            for text in _chunks(triangles, '<triangle v1="%i" v2="%i" v3="%i"/>\n'):
+                write(text)
+            write('</triangles>\n</mesh></object>\n')
+
+        write('</resources>\n<build>\n')
+        for prototype, rgb, name, trsf in self._items:
+            object_id = object_ids[(prototype, rgb)]
+            if object_id is None:
+                continue
+            attributes = 'objectid="%i"' % object_id
+            if trsf is not None:
+                attributes += ' transform="%s"' % _transform(trsf)
+            if name:
+                attributes += ' partnumber="%s"' % _escape(name)
+            write('<item %s/>\n' % attributes)
+        write('</build>\n</model>\n')
+
+    def write_file(self):
+        r"""Write file"""
+        with zipfile.ZipFile(self._filename, "w", zipfile.ZIP_DEFLATED) as package:
+            package.writestr("[Content_Types].xml", _CONTENT_TYPES)
+            package.writestr("_rels/.rels", _RELATIONSHIPS)
+            if sys.version_info >= (3, 6):  # ZipFile.open(mode="w") : stream into the zip
+                with package.open(_MODEL_PART, "w", force_zip64=True) as f:
+                    self._write_model(f)
+            else:
+                handle, temporary = tempfile.mkstemp(suffix=".model")
+                try:
+                    with os.fdopen(handle, "wb") as f:
+                        self._write_model(f)
+                    package.write(temporary, _MODEL_PART)
+                finally:
+                    os.remove(temporary)
+        logger.info("Wrote 3MF file : %i object(s), %i item(s)" % (len(self._prototypes), len(self._items)))
@@ -5,12 +5,32 @@ r"""utils module of OCCDataExchange"""
 
 from __future__ import print_function
 
+import contextlib
+import importlib
+import io
 import logging
 import os
+import shutil
+import tempfile
+
+from OCCDataExchange.compression import MAGIC_SIZE, codec_from_extension, codec_from_magic, decompress, \
+    decompressing_reader, file_codec
 
 logger = logging.getLogger(__name__)
 
 
+def preload():
+    r"""Import the OpenCascade modules used by this module (see OCCDataExchange.registry.Format.preload())"""
+    for module_name in ["OCC.BRep", "OCC.TopoDS"]:
+        importlib.import_module(module_name)
+
+
+try:
+    _string_types = (basestring,)  # Python 2 : str is also bytes, strings are filenames
+except NameError:
+    _string_types = (str,)
+
+
 def path_from_file(file_origin, relative_path):
     r"""Builds an absolute path from a file using a relative path
 
@@ -51,73 +71,273 @@ def extract_file_extension(filename):
         return (filename.split("/")[-1]).split(".")[-1]
 
 
+def is_filename(source):
+    r"""True if an importer source is a path to a file, False if it is in memory data
+
+    Parameters
+    ----------
+    source : str, os.PathLike, bytes, bytearray, memoryview or binary file object
+
+    """
+    return isinstance(source, _string_types) or hasattr(source, "__fspath__")
+
+
+def source_name(source):
+    r"""Name of an importer source, for the log messages"""
+    if is_filename(source):
+        return str(source)
+    if hasattr(source, "read"):
+        return getattr(source, "name", "<file object>")
+    return "<%i bytes in memory>" % memoryview(source).nbytes
+
+
+def is_plain_file(source):
+    r"""True if source is the path to an uncompressed file, that OpenCascade readers can read as is"""
+    return is_filename(source) and file_codec(source) is None
+
+
+def read_source(source):
+    r"""Content of an importer source, decompressed if it is compressed (see OCCDataExchange.compression)
+
+    Parameters
+    ----------
+    source : str, os.PathLike, bytes, bytearray, memoryview or binary file object
+
+    Returns
+    -------
+    bytes
+
+    """
+    if is_filename(source):
+        with open_source(source) as f:
+            return f.read()
+    if hasattr(source, "read"):
+        data = source.read()
+        data = data.encode("utf-8") if not isinstance(data, bytes) else data
+    elif isinstance(source, memoryview):
+        data = source.tobytes()
+    else:
+        data = bytes(source)
+    return decompress(data)
+
+
+@contextlib.contextmanager
+def open_source(source):
+    r"""Binary file object reading an importer source, decompressing it on the fly if it is compressed
+
+    A file object source is left open. A file object that cannot seek is read in memory.
+    """
+    if is_filename(source):
+        with open(source, "rb") as f:
+            codec = codec_from_extension(source) or codec_from_magic(f.read(MAGIC_SIZE))
+            f.seek(0)
+            if codec is None:
+                yield f
+            else:
+                with contextlib.closing(decompressing_reader(f, codec)) as reader:
+                    yield reader
+    elif hasattr(source, "read") and getattr(source, "seekable", lambda: False)():
+        position = source.tell()
+        codec = codec_from_magic(source.read(MAGIC_SIZE))
+        source.seek(position)
+        if codec is None:
+            yield source
+        else:
+            with contextlib.closing(decompressing_reader(source, codec)) as reader:
+                yield reader
+    else:
+        yield io.BytesIO(read_source(source))
+
+
+@contextlib.contextmanager
+def temporary_filename(extension):
+    r"""Path, with the extension, in a temporary directory removed afterwards"""
+    directory = tempfile.mkdtemp()
+    try:
+        yield os.path.join(directory, "OCCDataExchange.%s" % extension)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+@contextlib.contextmanager
+def source_filename(source, extension):
+    r"""Path to an uncompressed file holding the content of an importer source
+
+    The path to an uncompressed file is yielded as is. In memory data and compressed files are streamed
+    to a temporary file with the extension, removed afterwards : the last resort for readers that
+    only read files.
+    """
+    if is_plain_file(source):
+        yield source
+        return
+    with temporary_filename(extension) as path:
+        with open(path, "wb") as f:
+            with open_source(source) as reader:
+                shutil.copyfileobj(reader, f)
+        yield path
+
+
+def write_through_file(write, extension, stream):
+    r"""Copy to stream what write(filename) writes to a temporary file
+
+    The last resort for writers that only write files.
+
+    Parameters
+    ----------
+    write : callable
+        write(filename) writes the file
+    extension : str
+    stream : binary file like object
+
+    """
+    with temporary_filename(extension) as path:
+        write(path)
+        with open(path, "rb") as f:
+            shutil.copyfileobj(f, stream)
+
+
+def written_bytes(write_to):
+    r"""Bytes written by write_to(stream)"""
+    stream = io.BytesIO()
+    write_to(stream)
+    return stream.getvalue()
+
+
+class ShapeList(list):
+    r"""A list of shapes that keeps track of its modifications
+
+    Behaves exactly like a list. The version attribute is incremented by every
+    operation that modifies the list, so that values derived from the list
+    (e.g. a compound of all the shapes) can be cached and invalidated.
+
+    """
+
+    def __init__(self, *args):
+        super(ShapeList, self).__init__(*args)
+        self.version = 0
+
+    def _modified(self):
+        self.version += 1
+
+
+def _tracked(name):
+    r"""Wrap the list method 'name' so that calling it marks the ShapeList as modified"""
+    method = getattr(list, name)
+
+    def wrapper(self, *args, **kwargs):
+        self._modified()
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = name
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+for _name in ["append", "extend", "insert", "remove", "pop", "clear", "sort", "reverse",
+              "__setitem__", "__delitem__", "__iadd__", "__imul__", "__setslice__", "__delslice__"]:
+    if hasattr(list, _name):
+        setattr(ShapeList, _name, _tracked(_name))
+
+
+def build_compound(shapes):
+    r"""Build a compound from a sequence of shapes
+
+    The shapes are not copied, the compound references them.
+
+    Parameters
+    ----------
+    shapes : iterable of TopoDS.TopoDS_Shape
+
+    Returns
+    -------
+    TopoDS.TopoDS_Compound
+
+    """
+    from OCC import BRep
+    from OCC import TopoDS
+
+    compound = TopoDS.TopoDS_Compound()
+    brep_builder = BRep.BRep_Builder()
+    brep_builder.MakeCompound(compound)
+    for shape in shapes:
+        brep_builder.Add(compound, shape)
+    return compound
+
+
+class CachedCompound(object):
+    r"""Compound of the shapes of a ShapeList, rebuilt only when the list has changed
+
+    Parameters
+    ----------
+    shapes : ShapeList
+
+    """
+
+    def __init__(self, shapes):
+        self._shapes = shapes
+        self._compound = None
+        self._version = None
+
+    def get(self):
+        r"""The compound of all the shapes, rebuilt if the shapes list was modified since the last call
+
+        Returns
+        -------
+        TopoDS.TopoDS_Compound
+
+        """
+        if self._compound is None or self._version != self._shapes.version:
+            logger.debug("Building compound of %i shapes" % len(self._shapes))
+            self._compound = build_compound(self._shapes)
+            self._version = self._shapes.version
+        return self._compound
+
+
 def shape_to_file(shape, pth, filename, format='iges'):
-    """write a Shape to a .iges .brep .stl or .step file"""
+    r"""Write a Shape to a file in any format of the registry (see OCCDataExchange.registry)
 
-    from OCCDataExchange.brep import BrepExporter
-    from OCCDataExchange.iges import IgesExporter
-    from OCCDataExchange.step import StepExporter
-    from OCCDataExchange.stl import StlExporter
+    Parameters
+    ----------
+    shape : TopoDS.TopoDS_Shape
+    pth : str
+        directory
+    filename : str
+        file name, without extension
+    format : str
+        format name or extension, e.g. 'iges', 'stp', 'stl'
+
+    Returns
+    -------
+    str
+        path to the file written
+
+    """
+    from OCCDataExchange.registry import get_format, write_shape
 
     _pth = os.path.join(pth, filename)
     assert not os.path.isdir(_pth), 'wrong path, filename'
-    _file = str("%s.%s" % (_pth, format))
-
-    _formats = ['iges', 'igs', 'step', 'stp', 'brep', 'stl']
-    assert format in _formats, '%s is not a readable format, should be one of %s ' % (format, _formats)
-
-    if format in ['iges', 'igs']:
-        writer = IgesExporter(_file)
-        writer.add_shape(shape)
-        writer.write_file()
-        return _file
-
-    elif format in ['step', 'stp']:
-        writer = StepExporter(_file)
-        writer.add_shape(shape)
-        writer.write_file()
-        return _file
-
-    elif format == 'brep':
-        writer = BrepExporter(_file)
-        writer.set_shape(shape)
-        writer.write_file()
-        return _file
-
-    elif format == 'stl':
-        writer = StlExporter(_file)
-        writer.set_shape(shape)
-        writer.write_file()
-        return _file
-
-    else:
-        raise ValueError('format should be one of [iges,igs], [step,stp], brep, stl\ngot %s' % (format))
+    a_format = get_format(format)  # raises ValueError if the format is unknown
+    _file = str("%s.%s" % (_pth, format if format in a_format.extensions else a_format.extensions[0]))
+    write_shape(shape, _file, a_format.name)
+    return _file
 
 
 def file_to_shape(pth):
-    '''get a Shape from an .iges or .step file'''
-
-    from OCCDataExchange.brep import BrepImporter
-    from OCCDataExchange.iges import IgesImporter
-    from OCCDataExchange.step import StepImporter
-    from OCCDataExchange.stl import StlImporter
+    r"""Get a Shape from a file in any readable format of the registry
 
-    assert os.path.isfile(pth), '%s is not a valid file' % (pth)
-    ext = os.path.splitext(pth)[1].lower()
-    assert ext in ['.iges', '.igs', '.stp', '.step', '.brep', '.stl'], '%s is not an readable format' % (ext)
+    The format is detected from the file content, and otherwise from its extension.
 
-    if ext in ['.iges', '.igs']:
-        reader = IgesImporter(pth)
-        return reader.compound
+    Parameters
+    ----------
+    pth : str
+        path to the file
 
-    elif ext in ['.step', '.stp']:
-        reader = StepImporter(pth)
-        return reader.compound
+    Returns
+    -------
+    TopoDS.TopoDS_Shape
 
-    elif ext == '.brep':
-        reader = BrepImporter(pth)
-        return reader.compound
+    """
+    from OCCDataExchange.registry import read_shape
 
-    elif ext == '.stl':
-        reader = StlImporter(pth)
-        return reader.shape
+    assert os.path.isfile(pth), '%s is not a valid file' % (pth)
+    return read_shape(pth)
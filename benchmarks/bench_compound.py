@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Micro-benchmark of the importers compound property for a 100k shapes import
+
+The importer is filled with 100k vertices instead of reading a file,
+so that only the cost of the compound property is measured.
+
+Usage : python benchmarks/bench_compound.py [nb_shapes] [nb_accesses]
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+
+from OCC import BRepBuilderAPI
+from OCC import gp
+
+from OCCDataExchange.step import StepImporter
+from OCCDataExchange.utils import build_compound, path_from_file
+
+nb_shapes = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+nb_accesses = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+importer = StepImporter(path_from_file(__file__, "../tests/models_in/box_203.stp"), transfer=False)
+for i in range(nb_shapes):
+    importer.shapes.append(BRepBuilderAPI.BRepBuilderAPI_MakeVertex(gp.gp_Pnt(i, 0, 0)).Shape())
+
+uncached = timeit.timeit(lambda: build_compound(importer.shapes), number=nb_accesses)
+cached = timeit.timeit(lambda: importer.compound, number=nb_accesses)
+
+print("%i shapes, %i accesses" % (nb_shapes, nb_accesses))
+print("rebuilt on each access : %.3f s" % uncached)
+print("cached compound        : %.3f s" % cached)
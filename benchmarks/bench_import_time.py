@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Import time of the OCCDataExchange modules, measured with python -X importtime (Python >= 3.7)
+
+Each module is imported in a fresh interpreter. The cumulative import time of the module is
+compared to its budget and the script exits with status 1 if a budget is exceeded.
+
+Usage : python benchmarks/bench_import_time.py [nb_runs]
+"""
+
+from __future__ import print_function
+
+import os.path
+import subprocess
+import sys
+
+# budgets in milliseconds (best of nb_runs), none of these modules should load OpenCascade
+budgets = {"OCCDataExchange.checks": 50,
+           "OCCDataExchange.registry": 50,
+           "OCCDataExchange.utils": 50,
+           "OCCDataExchange.dat": 50,
+           "OCCDataExchange.brep": 50,
+           "OCCDataExchange.stl": 50,
+           "OCCDataExchange.step": 50,
+           "OCCDataExchange.iges": 50}
+
+nb_runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def cumulative_import_time(module):
+    r"""Cumulative import time of module in a fresh interpreter, in milliseconds"""
+    output = subprocess.check_output([sys.executable, "-X", "importtime", "-c", "import %s" % module],
+                                     stderr=subprocess.STDOUT, cwd=root).decode("utf-8")
+    for line in output.splitlines():
+        # import time: self [us] | cumulative | imported package
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1]) / 1000.
+    raise RuntimeError("No import time found for %s" % module)
+
+
+over_budget = list()
+for module, budget in sorted(budgets.items()):
+    milliseconds = min(cumulative_import_time(module) for _ in range(nb_runs))
+    status = "ok" if milliseconds <= budget else "OVER BUDGET"
+    print("%-28s %7.1f ms (budget %i ms) %s" % (module, milliseconds, budget, status))
+    if milliseconds > budget:
+        over_budget.append(module)
+
+sys.exit(1 if over_budget else 0)
@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Micro-benchmark of StepOcafExporter.add_shapes against a loop of add_shape
+
+Boxes get one of a few colors and layers, as in a colored assembly.
+Only the time spent adding the shapes to the document is measured, the file is not written.
+
+Usage : python benchmarks/bench_step_ocaf_add_shapes.py [nb_shapes] [nb_colors]
+"""
+
+from __future__ import print_function
+
+import sys
+import time
+
+import numpy as np
+from OCC import BRepPrimAPI
+from OCC import gp
+
+from OCCDataExchange.step_ocaf import StepOcafExporter
+from OCCDataExchange.utils import path_from_file
+
+nb_shapes = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+nb_colors = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+
+filename = path_from_file(__file__, "../tests/models_out/bench_ocaf.stp")
+shapes = [BRepPrimAPI.BRepPrimAPI_MakeBox(gp.gp_Pnt(i, 0, 0), 0.5, 0.5, 0.5).Shape() for i in range(nb_shapes)]
+palette = np.random.RandomState(0).uniform(size=(nb_colors, 3))
+colors = palette[np.arange(nb_shapes) % nb_colors]
+layers = ["layer-%02i" % (i % nb_colors) for i in range(nb_shapes)]
+
+exporter = StepOcafExporter(filename)
+start = time.time()
+for shape, color, layer in zip(shapes, colors.tolist(), layers):
+    exporter.add_shape(shape, color=color, layer=layer)
+loop = time.time() - start
+
+exporter = StepOcafExporter(filename)
+start = time.time()
+exporter.add_shapes(shapes, colors=colors, layers=layers)
+batch = time.time() - start
+
+print("%i shapes, %i colors and layers" % (nb_shapes, nb_colors))
+print("add_shape loop : %.3f s" % loop)
+print("add_shapes     : %.3f s" % batch)
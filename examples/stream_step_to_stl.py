@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Streaming the roots of a STEP file to a single ASCII STL file
+
+Only one root shape (and its mesh) is alive at any time
+"""
+
+from __future__ import print_function
+
+import logging
+import os
+import shutil
+import tempfile
+
+from OCCDataExchange.step import StepImporter
+from OCCDataExchange.stl import StlExporter
+from OCCDataExchange.utils import path_from_file
+
+logging.basicConfig(level=logging.DEBUG,
+                    format='%(asctime)s :: %(levelname)6s :: %(module)20s :: %(lineno)3d :: %(message)s')
+
+step_filename = path_from_file(__file__, "./models_in/step/as1-oc-214.stp")
+stl_filename = path_from_file(__file__, "./models_out/result_stream.stl")
+
+step_importer = StepImporter(step_filename, transfer=False)
+tmp_dir = tempfile.mkdtemp()
+tmp_stl_filename = os.path.join(tmp_dir, "root.stl")
+
+try:
+    with open(stl_filename, "w") as stl_file:
+        for i, shape in enumerate(step_importer.iter_shapes()):
+            # An ASCII STL file can contain several 'solid ... endsolid' blocks
+            stl_exporter = StlExporter(tmp_stl_filename, ascii_mode=True)
+            stl_exporter.set_shape(shape)
+            stl_exporter.write_file()
+            with open(tmp_stl_filename) as tmp_stl_file:
+                shutil.copyfileobj(tmp_stl_file, stl_file)
+            print("Root %i written" % (i + 1))
+finally:
+    shutil.rmtree(tmp_dir)
@@ -135,7 +135,7 @@ setup(
     # "scripts" keyword. Entry points provide cross-platform support and allow
     # pip to create the appropriate form of executable for the target platform.
     # entry_points={'console_scripts': ['sample=sample:main',],},
-    entry_points={}
+    entry_points={'console_scripts': ['occdx=OCCDataExchange.cli:main']}
 
     )
 
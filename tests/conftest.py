@@ -0,0 +1,11 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""pytest configuration of the OCCDataExchange tests"""
+
+import sys
+
+collect_ignore = list()
+
+if sys.version_info < (3, 5):  # async def is a syntax error before Python 3.5
+    collect_ignore.append("test_aio.py")
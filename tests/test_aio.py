@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""asyncio API tests"""
+
+import asyncio
+import glob
+import os.path
+import shutil
+import time
+
+import pytest
+
+from OCCDataExchange.aio import AsyncConverter, aexport, aimport_file
+from OCCDataExchange.utils import path_from_file
+
+
+@pytest.yield_fixture(autouse=True)
+def cleandir():
+    r"""Clean the tests output directory
+
+    autouse=True insure this fixture wraps every test function
+    yield represents the function call
+    """
+    yield  # represents the test function call
+    output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models_out")
+    files = glob.glob(output_dir + "\*")
+    print("Cleaning output directory ...")
+    for f in files:
+        if os.path.isdir(f):
+            shutil.rmtree(f)
+        else:
+            os.remove(f)
+    print("Output directory clean")
+
+
+def _run(coroutine):
+    r"""Run a coroutine in a new event loop"""
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test_run_value():
+    r"""The value returned in the child process is returned by the coroutine"""
+    assert _run(AsyncConverter().run(pow, 2, 10)) == 1024
+
+
+def test_run_failure():
+    r"""A failure in the child process raises a ValueError"""
+    with pytest.raises(ValueError):
+        _run(AsyncConverter().run(int, "not an int"))
+
+
+def test_run_timeout():
+    r"""The child process is killed when it runs over the time limit"""
+    with pytest.raises(ValueError):
+        _run(AsyncConverter(timeout=0.5).run(time.sleep, 30))
+
+
+def test_run_concurrency_limit():
+    r"""At most max_workers calls run at the same time"""
+    converter = AsyncConverter(max_workers=2)
+
+    async def four_calls():
+        return await asyncio.gather(*[converter.run(time.sleep, 0.5) for _ in range(4)])
+
+    start = time.time()
+    _run(four_calls())
+    assert time.time() - start >= 1.
+
+
+def test_run_cancellation():
+    r"""Cancelling the coroutine kills the child process"""
+    async def cancelled_call():
+        await asyncio.wait_for(AsyncConverter().run(time.sleep, 30), 0.5)
+
+    start = time.time()
+    with pytest.raises(asyncio.TimeoutError):
+        _run(cancelled_call())
+    assert time.time() - start < 10
+
+
+def test_aimport_aexport():
+    r"""A shape imported then exported in child processes"""
+    filename = path_from_file(__file__, "./models_out/box_aio.brep")
+
+    async def round_trip():
+        a_shape = await aimport_file(path_from_file(__file__, "./models_in/box_203.stp"))
+        await aexport(a_shape, filename)
+        return a_shape
+
+    a_shape = _run(round_trip())
+    assert not a_shape.IsNull()
+    assert os.path.isfile(filename)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Zip archive import tests"""
+
+import glob
+import gzip
+import io
+import os.path
+import zipfile
+
+import pytest
+
+from OCCDataExchange.archive import ArchiveImporter, list_members
+from OCCDataExchange.utils import path_from_file
+
+
+@pytest.yield_fixture(autouse=True)
+def cleandir():
+    r"""Clean the tests output directory
+
+    autouse=True insure this fixture wraps every test function
+    yield represents the function call
+    """
+    yield  # represents the test function call
+    output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models_out")
+    files = glob.glob(output_dir + "\*")
+    print("Cleaning output directory ...")
+    for f in files:
+        os.remove(f)
+    print("Output directory clean")
+
+
+@pytest.fixture()
+def archive():
+    r"""Zip archive of parts in various formats, with a directory, a compressed part and a text file"""
+    filename = path_from_file(__file__, "./models_out/parts.zip")
+    with zipfile.ZipFile(filename, "w", zipfile.ZIP_DEFLATED) as f:
+        f.writestr("parts/", b"")
+        f.write(path_from_file(__file__, "./models_in/box_203.stp"), "parts/box.stp")
+        f.write(path_from_file(__file__, "./models_in/box.igs"), "parts/box.igs")
+        f.write(path_from_file(__file__, "./models_in/box_binary.stl"), "meshes/box")  # no extension
+        buffer = io.BytesIO()
+        with open(path_from_file(__file__, "./models_in/2_boxes_214.stp"), "rb") as step_file:
+            with gzip.GzipFile(fileobj=buffer, mode="wb") as gzip_file:
+                gzip_file.write(step_file.read())
+        f.writestr("parts/2_boxes.stp.gz", buffer.getvalue())
+        f.write(path_from_file(__file__, "./models_in/naca0006.dat"), "naca0006.dat")
+        f.writestr("README.txt", b"Parts for the next delivery")
+    return filename
+
+
+def test_list_members(archive):
+    r"""The formats of the members are sniffed, the directories are left out"""
+    members = dict((member.name, member.format) for member in list_members(archive))
+    assert members == {"parts/box.stp": "step",
+                       "parts/box.igs": "iges",
+                       "meshes/box": "stl",
+                       "parts/2_boxes.stp.gz": "step",
+                       "naca0006.dat": "dat",
+                       "README.txt": None}
+
+
+def test_archive_importer_wrong_extension():
+    r"""Trying to import a file that is not a zip archive"""
+    with pytest.raises(AssertionError):
+        ArchiveImporter(path_from_file(__file__, "./models_in/box_203.stp"))
+
+
+def test_archive_importer_selection(archive):
+    r"""By default the members of the formats that can be imported are selected"""
+    importer = ArchiveImporter(archive, transfer=False)
+    assert [member.name for member in importer.selected] == ["parts/box.stp", "parts/box.igs", "meshes/box",
+                                                             "parts/2_boxes.stp.gz"]
+    importer = ArchiveImporter(archive, members="parts/*.stp*", transfer=False)
+    assert [member.name for member in importer.selected] == ["parts/box.stp", "parts/2_boxes.stp.gz"]
+    importer = ArchiveImporter(archive, members=["meshes/box"], transfer=False)
+    assert [member.name for member in importer.selected] == ["meshes/box"]
+    with pytest.raises(ValueError):
+        ArchiveImporter(archive, members=["parts/missing.stp"], transfer=False)
+
+
+def test_archive_importer(archive):
+    r"""The selected members are read in parallel, a member that fails does not stop the others"""
+    importer = ArchiveImporter(archive, members=["parts/box.stp", "parts/2_boxes.stp.gz", "README.txt"],
+                               workers=2, timeout=60)
+    assert list(importer.shapes.keys()) == ["parts/box.stp", "parts/2_boxes.stp.gz"]
+    assert all(not shape.IsNull() for shape in importer.shapes.values())
+    assert list(importer.errors.keys()) == ["README.txt"]
+    assert importer.errors["README.txt"].reason == "error"
+    assert importer.compound.IsNull() is False
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""BREP serialization tests"""
+
+import pytest
+from OCC import BRepPrimAPI
+from OCC import TopAbs
+from OCC import TopLoc
+from OCC import gp
+from OCCUtils.Topology import Topo
+
+from OCCDataExchange.brep import BrepExporter, BrepImporter, shape_from_string, shape_to_string
+
+
+def test_shape_string_round_trip():
+    r"""A located and reversed box survives serialization"""
+    box = BRepPrimAPI.BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+    trsf = gp.gp_Trsf()
+    trsf.SetTranslation(gp.gp_Vec(1, 2, 3))
+    box = box.Moved(TopLoc.TopLoc_Location(trsf)).Reversed()
+
+    brep_string = shape_to_string(box)
+    assert brep_string.startswith("DBRep_DrawableShape")
+    shape = shape_from_string(brep_string)
+    assert shape.ShapeType() == TopAbs.TopAbs_SOLID
+    assert shape.Orientation() == TopAbs.TopAbs_REVERSED
+    assert shape.Location().Transformation().TranslationPart().IsEqual(gp.gp_XYZ(1, 2, 3), 1e-9)
+    assert Topo(shape).number_of_faces() == 6
+
+
+def test_shape_from_string_no_shape():
+    r"""A string that does not contain a shape"""
+    with pytest.raises(ValueError):
+        shape_from_string("DBRep_DrawableShape\n")
+
+
+def test_brep_importer_bytes():
+    r"""The BREP importer reads bytes without going through the disk"""
+    box = BRepPrimAPI.BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+    importer = BrepImporter(shape_to_string(box).encode("ascii"))
+    assert len([solid for solid in Topo(importer.shape).solids()]) == 1
+
+
+def test_brep_exporter_to_bytes():
+    r"""The BREP exporter writes to bytes without going through the disk"""
+    box = BRepPrimAPI.BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+    exporter = BrepExporter()
+    exporter.set_shape(box)
+    assert len([solid for solid in Topo(BrepImporter(exporter.to_bytes()).shape).solids()]) == 1
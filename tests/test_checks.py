@@ -9,7 +9,9 @@ from OCC import TopoDS
 from OCC import gp
 from OCCUtils.Topology import Topo
 
-from OCCDataExchange.checks import check_importer_filename, check_exporter_filename, check_overwrite, check_shape
+from OCCDataExchange.checks import check_importer_filename, check_exporter_filename, check_overwrite, check_shape, \
+    check_importer_source
+from OCCDataExchange.extensions import step_extensions
 from OCCDataExchange.utils import path_from_file
 
 
@@ -87,3 +89,11 @@ def test_check_shape():
     check_shape(next(Topo(shape).edges()))
 
 
+def test_check_importer_source():
+    r"""In memory data is accepted, other objects are not"""
+    check_importer_source(b"ISO-10303-21;", step_extensions)
+    check_importer_source(memoryview(b"ISO-10303-21;"), step_extensions)
+    with pytest.raises(AssertionError):
+        check_importer_source(42, step_extensions)
+    with pytest.raises(AssertionError):
+        check_importer_source(path_from_file(__file__, "./models_in/box_203.stp"), ["igs"])
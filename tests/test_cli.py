@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""occdx command line tests"""
+
+import glob
+import os.path
+import shutil
+
+import pytest
+
+from OCCDataExchange.cli import MANIFEST_NAME, collect_inputs, convert, main, read_manifest
+from OCCDataExchange.utils import path_from_file
+
+
+@pytest.yield_fixture(autouse=True)
+def cleandir():
+    r"""Clean the tests output directory
+
+    autouse=True insure this fixture wraps every test function
+    yield represents the function call
+    """
+    yield  # represents the test function call
+    output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models_out")
+    files = glob.glob(os.path.join(output_dir, "*"))
+    print("Cleaning output directory ...")
+    for f in files:
+        if os.path.isdir(f):
+            shutil.rmtree(f)
+        else:
+            os.remove(f)
+    print("Output directory clean")
+
+
+def test_collect_inputs():
+    r"""Directories are searched for readable files, glob patterns are expanded"""
+    models_in = path_from_file(__file__, "./models_in")
+    inputs = collect_inputs([models_in])
+    assert (os.path.join(models_in, "box_203.stp"), "box_203") in inputs
+    assert all(not filename.endswith(".dat") for filename, _ in inputs)
+    assert [relative for _, relative in collect_inputs([os.path.join(models_in, "box_2*.stp")])] == \
+        ["box_203", "box_214"]
+
+
+def test_collect_inputs_keeps_directories(tmpdir):
+    r"""Files with the same name in different directories matched by a glob pattern have different outputs"""
+    root = str(tmpdir)
+    for directory in ("x", "y"):
+        tmpdir.ensure_dir(directory)
+        shutil.copy(path_from_file(__file__, "./models_in/box_203.stp"), os.path.join(root, directory, "part.stp"))
+    inputs = collect_inputs([os.path.join(root, "*", "*.stp")])
+    assert [relative for _, relative in inputs] == [os.path.join("x", "part"), os.path.join("y", "part")]
+    # the same file matched twice is converted once
+    assert len(collect_inputs([os.path.join(root, "x", "part.stp"), os.path.join(root, "x")])) == 1
+
+
+def test_collect_inputs_same_output(tmpdir):
+    r"""Inputs that would be converted to the same output file keep their extension in the output path"""
+    root = str(tmpdir)
+    tmpdir.ensure_dir("x")
+    shutil.copy(path_from_file(__file__, "./models_in/box_203.stp"), os.path.join(root, "x", "part.stp"))
+    shutil.copy(path_from_file(__file__, "./models_in/box.igs"), os.path.join(root, "x", "part.igs"))
+    shutil.copy(path_from_file(__file__, "./models_in/box_214.stp"), os.path.join(root, "x", "box.stp"))
+    assert sorted(relative for _, relative in collect_inputs([root])) == \
+        [os.path.join("x", "box"), os.path.join("x", "part.igs"), os.path.join("x", "part.stp")]
+
+
+def test_collect_inputs_different_directories(tmpdir):
+    r"""Files with the same relative path under different arguments are prefixed with their directory name"""
+    for directory in ("a", "b", os.path.join("c", "a")):
+        tmpdir.ensure_dir(directory)
+        shutil.copy(path_from_file(__file__, "./models_in/box_203.stp"), str(tmpdir.join(directory, "part.stp")))
+    a, b = str(tmpdir.join("a")), str(tmpdir.join("b"))
+    assert [relative for _, relative in collect_inputs([a, b])] == [os.path.join("a", "part"),
+                                                                     os.path.join("b", "part")]
+    assert [relative for _, relative in collect_inputs([os.path.join(a, "*.stp"), os.path.join(b, "*.stp")])] == \
+        [os.path.join("a", "part"), os.path.join("b", "part")]
+    # directories with the same name
+    with pytest.raises(ValueError):
+        collect_inputs([a, str(tmpdir.join("c", "a"))])
+
+
+def test_convert_unknown_format():
+    r"""The output format must be writable"""
+    with pytest.raises(ValueError):
+        main(["convert", path_from_file(__file__, "./models_in/box_203.stp"), "--to", "dat",
+              "-o", path_from_file(__file__, "./models_out/converted")])
+
+
+def test_convert_and_resume():
+    r"""Files converted by a previous run are skipped, failures are recorded"""
+    output_directory = path_from_file(__file__, "./models_out/converted")
+    inputs = [path_from_file(__file__, "./models_in/box_203.stp"), path_from_file(__file__, "./models_in/empty.stp")]
+    arguments = ["convert"] + inputs + ["--to", "stl", "-o", output_directory, "--workers", "2", "--timeout", "120"]
+
+    assert main(arguments) == 1  # empty.stp cannot be converted
+    assert os.path.isfile(os.path.join(output_directory, "box_203.stl"))
+    records = read_manifest(os.path.join(output_directory, MANIFEST_NAME))
+    assert records[(inputs[0], os.path.join(output_directory, "box_203.stl"))]["status"] == "ok"
+    assert records[(inputs[1], os.path.join(output_directory, "empty.stl"))]["status"] == "failed"
+
+    # the second run only retries the failed file
+    assert main(arguments) == 1
+    with open(os.path.join(output_directory, MANIFEST_NAME)) as f:
+        assert len(f.readlines()) == 3
+
+
+def test_convert_to_two_formats():
+    r"""A conversion to another format in the same output directory is not skipped"""
+    output_directory = path_from_file(__file__, "./models_out/converted")
+    input_filename = path_from_file(__file__, "./models_in/box_203.stp")
+    arguments = ["convert", input_filename, "-o", output_directory, "--workers", "2", "--timeout", "120"]
+
+    assert main(arguments + ["--to", "stl"]) == 0
+    assert main(arguments + ["--to", "glb"]) == 0
+    assert os.path.isfile(os.path.join(output_directory, "box_203.stl"))
+    assert os.path.isfile(os.path.join(output_directory, "box_203.glb"))
+    records = read_manifest(os.path.join(output_directory, MANIFEST_NAME))
+    assert sorted(output for _, output in records) == [os.path.join(output_directory, "box_203.glb"),
+                                                       os.path.join(output_directory, "box_203.stl")]
+
+    # both conversions are done now
+    with open(os.devnull, "w") as out:
+        assert convert([input_filename], "glb", output_directory, out=out)["skipped"] == 1
+        assert convert([input_filename], "stl", output_directory, out=out)["skipped"] == 1
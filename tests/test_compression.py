@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Compressed files tests"""
+
+import glob
+import gzip
+import io
+import os.path
+
+import pytest
+
+from OCCDataExchange.checks import check_exporter_filename, check_importer_filename
+from OCCDataExchange.compression import _BZ2Reader, _BZ2Writer, codec_from_extension, codec_from_magic, \
+    compressing_writer, decompress, open_output, split_extension, strip_extensions
+from OCCDataExchange.dat import DatImporter
+from OCCDataExchange.registry import sniff
+from OCCDataExchange.utils import path_from_file, read_source
+
+
+@pytest.yield_fixture(autouse=True)
+def cleandir():
+    r"""Clean the tests output directory
+
+    autouse=True insure this fixture wraps every test function
+    yield represents the function call
+    """
+    yield  # represents the test function call
+    output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models_out")
+    files = glob.glob(output_dir + "\*")
+    print("Cleaning output directory ...")
+    for f in files:
+        os.remove(f)
+    print("Output directory clean")
+
+
+def _gzipped(data):
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode="wb") as f:
+        f.write(data)
+    return buffer.getvalue()
+
+
+def test_split_extension():
+    r"""The content extension is the one before the compression extension"""
+    assert split_extension("part.STP.gz") == ("stp", "gzip")
+    assert split_extension("mesh.stl.zst") == ("stl", "zstd")
+    assert split_extension("part.stp") == ("stp", None)
+    assert split_extension("archive.gz") == ("", "gzip")
+    assert strip_extensions("parts/part.stp.xz") == "parts/part"
+    assert strip_extensions("parts/part.stp") == "parts/part"
+
+
+def test_codec_from_magic():
+    r"""Compressed data is recognized from its first bytes"""
+    assert codec_from_magic(_gzipped(b"ISO-10303-21;")) == "gzip"
+    assert codec_from_magic(b"ISO-10303-21;") is None
+
+
+def test_decompress():
+    r"""Compressed data is decompressed, other data is returned as is"""
+    assert decompress(_gzipped(b"solid box")) == b"solid box"
+    assert decompress(b"solid box") == b"solid box"
+    assert read_source(_gzipped(b"solid box")) == b"solid box"
+
+
+def test_check_importer_filename_compound_extension():
+    r"""A compressed file is checked against the extension before the compression extension"""
+    filename = path_from_file(__file__, "./models_out/box.stp.gz")
+    with open(filename, "wb") as f:
+        f.write(_gzipped(b"ISO-10303-21;"))
+    check_importer_filename(filename, ["step", "stp"], compressed=True)
+    with pytest.raises(AssertionError):
+        check_importer_filename(filename, ["stl"], compressed=True)
+    # an importer that does not read compressed files
+    with pytest.raises(AssertionError):
+        check_importer_filename(filename, ["step", "stp"])
+
+
+def test_check_exporter_filename_compound_extension():
+    r"""Only the exporters that write compressed files accept a compression extension"""
+    filename = path_from_file(__file__, "./models_out/box.3mf.gz")
+    check_exporter_filename(filename, ["3mf"], compressed=True)
+    with pytest.raises(AssertionError):
+        check_exporter_filename(filename, ["3mf"])
+
+
+@pytest.mark.parametrize("extension", ["gz", "bz2", "xz", "zst"])
+def test_open_output_round_trip(extension):
+    r"""What open_output() compresses is read back decompressed"""
+    try:
+        compressing_writer(io.BytesIO(), codec_from_extension("naca0006.dat.%s" % extension)).close()
+    except ValueError:  # e.g. xz without lzma on Python 2, zstd without zstandard
+        pytest.skip("%s compression is not available" % extension)
+    filename = path_from_file(__file__, "./models_out/naca0006.dat.%s" % extension)
+    with open(path_from_file(__file__, "./models_in/naca0006.dat"), "rb") as f:
+        data = f.read()
+    with open_output(filename) as f:
+        f.write(data)
+    with open(filename, "rb") as f:
+        assert f.read() != data
+    assert read_source(filename) == data
+    assert len(DatImporter(filename, skip_first_line=True).points) == 35
+
+
+def test_bz2_streams():
+    r"""The bzip2 streams used before Python 3.3 read what they write, and concatenated bzip2 streams"""
+    buffer = io.BytesIO()
+    for data in [b"solid box\n", b"endsolid box\n"]:
+        writer = io.BufferedWriter(_BZ2Writer(buffer))
+        writer.write(data)
+        writer.close()
+    assert not buffer.closed
+    buffer.seek(0)
+    reader = io.BufferedReader(_BZ2Reader(buffer))
+    assert reader.readline() == b"solid box\n"
+    assert reader.read() == b"endsolid box\n"
+    assert decompress(buffer.getvalue()) == b"solid box\nendsolid box\n"
+
+
+def test_sniff_compressed_step():
+    r"""The format of a compressed file is sniffed from its decompressed content"""
+    with open(path_from_file(__file__, "./models_in/box_203.stp"), "rb") as f:
+        data = f.read()
+    filename = path_from_file(__file__, "./models_out/box.gz")  # no hint in the extension
+    with open(filename, "wb") as f:
+        f.write(_gzipped(data))
+    assert sniff(filename).name == "step"
+    assert sniff(_gzipped(data)).name == "step"
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Conversion daemon tests"""
+
+import glob
+import os.path
+import shutil
+import tempfile
+import threading
+
+import pytest
+
+from OCCDataExchange.daemon import ConversionDaemon, convert, request
+from OCCDataExchange.utils import path_from_file
+
+
+@pytest.yield_fixture(autouse=True)
+def cleandir():
+    r"""Clean the tests output directory
+
+    autouse=True insure this fixture wraps every test function
+    yield represents the function call
+    """
+    yield  # represents the test function call
+    output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models_out")
+    files = glob.glob(output_dir + "\*")
+    print("Cleaning output directory ...")
+    for f in files:
+        if os.path.isdir(f):
+            shutil.rmtree(f)
+        else:
+            os.remove(f)
+    print("Output directory clean")
+
+
+@pytest.yield_fixture()
+def daemon():
+    r"""Start a conversion daemon with 2 workers replaced after 2 jobs, stop it after the test"""
+    directory = tempfile.mkdtemp()
+    conversion_daemon = ConversionDaemon(os.path.join(directory, "occdx.sock"), workers=2, max_jobs=2)
+    thread = threading.Thread(target=conversion_daemon.serve_forever)
+    thread.start()
+    assert conversion_daemon.ready.wait(60)
+    yield conversion_daemon
+    conversion_daemon.shutdown()
+    thread.join()
+    shutil.rmtree(directory)
+
+
+@pytest.fixture()
+def socket_path(daemon):
+    r"""Socket of the running conversion daemon"""
+    return daemon.socket_path
+
+
+def test_ping(socket_path):
+    r"""The daemon reports its number of workers"""
+    assert request(socket_path, {"command": "ping"}) == {"ok": True, "workers": 2}
+
+
+def test_unknown_command(socket_path):
+    r"""An unknown command is an error reply, not a crash"""
+    reply = request(socket_path, {"command": "nothing"})
+    assert not reply["ok"]
+    assert "unknown command" in reply["error"]
+
+
+def test_failed_job_and_recycling(socket_path):
+    r"""A failed conversion is a structured error and workers are replaced after max_jobs jobs"""
+    workers = set()
+    for _ in range(6):
+        reply = request(socket_path, {"command": "convert", "input": "/nonexistent.stp",
+                                      "output": "/nonexistent.stl"})
+        assert not reply["ok"]
+        assert reply["error"] and "died" not in reply["error"]
+        workers.add(reply["worker"])
+    assert len(workers) >= 3
+    with pytest.raises(ValueError):
+        convert(socket_path, "/nonexistent.stp", "/nonexistent.stl")
+
+
+def test_invalid_timeout(socket_path):
+    r"""A timeout that is not a non-negative number is an error reply and the next job gets its own reply"""
+    for timeout in ["60", -1, True, [1]]:
+        reply = request(socket_path, {"command": "convert", "input": "/nonexistent.stp",
+                                      "output": "/nonexistent.stl", "timeout": timeout})
+        assert not reply["ok"]
+        assert "timeout" in reply["error"]
+    reply = request(socket_path, {"command": "convert", "input": "/other.stp", "output": "/other.stl"})
+    assert not reply["ok"]
+    assert "other.stp" in reply["error"]
+
+
+def test_invalid_request(socket_path):
+    r"""A request that is not a JSON object is an error reply"""
+    assert not request(socket_path, [1, 2])["ok"]
+
+
+def test_template_died(daemon, socket_path):
+    r"""Once the template process is dead, retired workers cannot be replaced : error replies, no hang"""
+    daemon._pool._template.terminate()
+    daemon._pool._template.join()
+    replies = [request(socket_path, {"command": "convert", "input": "/nonexistent.stp",
+                                     "output": "/nonexistent.stl"}, timeout=60) for _ in range(6)]
+    assert all(not reply["ok"] for reply in replies)
+    assert any("template process died" in reply["error"] for reply in replies)
+
+
+def test_convert(socket_path):
+    r"""A STEP file converted to STL by a warm worker"""
+    output_filename = path_from_file(__file__, "./models_out/box_daemon.stl")
+    assert convert(socket_path, path_from_file(__file__, "./models_in/box_203.stp"), output_filename) == \
+        output_filename
+    assert os.path.isfile(output_filename)
@@ -18,3 +18,14 @@ def test_read_dat_file():
                                                skip_first_line=True)
     pts = importer.points
     assert len(pts) == 35
+
+
+def test_read_dat_in_memory():
+    r"""A dat file read from bytes or from a file object gives the same points as from its path"""
+    filename = path_from_file(__file__, "./models_in/naca0006.dat")
+    with open(filename, "rb") as f:
+        data = f.read()
+    with open(filename, "rb") as f:
+        from_file_object = DatImporter(f, skip_first_line=True).points
+    assert DatImporter(data, skip_first_line=True).points == from_file_object
+    assert len(from_file_object) == 35
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""glTF (GLB) export tests"""
+
+import glob
+import json
+import os.path
+import struct
+
+import pytest
+from OCC import BRepPrimAPI
+from OCC import TopLoc
+from OCC import gp
+
+from OCCDataExchange.gltf import GltfExporter
+from OCCDataExchange.step_ocaf import StepOcafExporter, StepOcafImporter
+from OCCDataExchange.utils import path_from_file
+
+
+@pytest.yield_fixture(autouse=True)
+def cleandir():
+    r"""Clean the tests output directory
+
+    autouse=True insure this fixture wraps every test function
+    yield represents the function call
+    """
+    yield  # represents the test function call
+    output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models_out")
+    files = glob.glob(output_dir + "\*")
+    print("Cleaning output directory ...")
+    for f in files:
+        os.remove(f)
+    print("Output directory clean")
+
+
+@pytest.fixture()
+def box_shape():
+    r"""Box shape for testing"""
+    return BRepPrimAPI.BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+
+
+def _read_glb(filename):
+    r"""JSON document and binary chunk of a GLB file"""
+    with open(filename, "rb") as f:
+        data = f.read()
+    magic, version, length = struct.unpack_from("<III", data, 0)
+    assert magic == 0x46546C67
+    assert version == 2
+    assert length == len(data)
+    json_length, _ = struct.unpack_from("<II", data, 12)
+    document = json.loads(data[20:20 + json_length].decode("utf-8"))
+    bin_length, _ = struct.unpack_from("<II", data, 20 + json_length)
+    return document, data[28 + json_length:28 + json_length + bin_length]
+
+
+def test_gltf_exporter_wrong_extension():
+    r"""Trying to write a glb file with a wrong extension"""
+    with pytest.raises(AssertionError):
+        GltfExporter(path_from_file(__file__, "./models_out/box.stl"))
+
+
+def test_gltf_instances(box_shape):
+    r"""Instances of a shape share a single mesh"""
+    filename = path_from_file(__file__, "./models_out/boxes.glb")
+    translation = gp.gp_Trsf()
+    translation.SetTranslation(gp.gp_Vec(100, 0, 0))
+
+    exporter = GltfExporter(filename)
+    exporter.add_shape(box_shape, rgb=(1., 0., 0.), name="box 1")
+    exporter.add_shape(box_shape.Located(TopLoc.TopLoc_Location(translation)), rgb=(1., 0., 0.), name="box 2")
+    exporter.write_file()
+
+    document, binary = _read_glb(filename)
+    assert len(document["meshes"]) == 1
+    assert len(document["materials"]) == 1
+    assert document["buffers"][0]["byteLength"] == len(binary)
+    mesh_nodes = [node for node in document["nodes"] if "mesh" in node]
+    assert len(mesh_nodes) == 2
+    assert mesh_nodes[1]["matrix"][12] == 100.
+    assert document["accessors"][0]["max"] == [10., 20., 30.]
+
+
+def test_gltf_assembly(box_shape):
+    r"""Export of a STEP assembly read with StepOcafImporter"""
+    step_filename = path_from_file(__file__, "./models_out/box_ocaf.stp")
+    filename = path_from_file(__file__, "./models_out/box_ocaf.glb")
+    sphere = BRepPrimAPI.BRepPrimAPI_MakeSphere(10).Shape()
+
+    step_exporter = StepOcafExporter(step_filename)
+    step_exporter.add_shape(box_shape, color=(1, 0, 0), layer="red")
+    step_exporter.add_shape(sphere, color=(0, 1, 0), layer="green")
+    step_exporter.write_file()
+
+    exporter = GltfExporter(filename)
+    exporter.add_assembly(StepOcafImporter(step_filename))
+    exporter.write_file()
+
+    document, _ = _read_glb(filename)
+    assert len(document["meshes"]) == 2
+    assert len(document["materials"]) == 2
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""IGES index tests"""
+
+import logging
+
+import pytest
+
+from OCCDataExchange.iges_index import IgesIndex, parse_global_section, read_global_section
+from OCCDataExchange.utils import path_from_file
+
+logging.basicConfig(level=logging.DEBUG,
+                    format='%(asctime)s :: %(levelname)6s :: %(module)20s :: %(lineno)3d :: %(message)s')
+
+
+def test_iges_index_wrong_extension():
+    r"""wrong file format (i.e. trying to index a step file)"""
+    with pytest.raises(AssertionError):
+        IgesIndex(path_from_file(__file__, "./models_in/aube_pleine.stp"))
+
+
+def test_iges_index_wrong_file_content():
+    r"""wrong file content"""
+    with pytest.raises(ValueError):
+        IgesIndex(path_from_file(__file__, "./models_in/empty.igs"))
+
+
+def test_iges_index_box():
+    r"""Index of an iges file containing a box"""
+    index = IgesIndex(path_from_file(__file__, "./models_in/box.igs"))
+    assert index.version == "5.2"
+    assert index.global_section["unit_name"] == "MM"
+    assert index.global_section["native_system_id"] == "Rhinoceros ( Jan 18 2007 )"
+    assert index.global_section["file_name"].endswith("box.igs")
+
+    assert index.nb_entities == 18
+    assert index.count_by_type() == {128: 6, 314: 6, 406: 6}
+    assert index.entities["de"].tolist() == list(range(1, 36, 2))
+    assert (index.entities["blank"] == 0).all()
+    assert len(index.select(types=[128], visible_only=True)) == 6
+    assert len(index.select(types=[128], levels=[1])) == 6
+    assert len(index.select(levels=[7])) == 0
+
+
+def test_iges_index_aube():
+    r"""Index of a CATIA V5 iges file"""
+    index = IgesIndex(path_from_file(__file__, "./models_in/aube_pleine.iges"))
+    assert index.version == "5.3"
+    assert index.nb_entities == 145
+    assert index.levels().tolist() == [0, 10000]
+    assert index.count_by_type()[144] == 13
+
+
+def test_read_global_section():
+    r"""The Global section alone is the same as the one of the full index"""
+    filename = path_from_file(__file__, "./models_in/2_boxes.igs")
+    assert read_global_section(filename) == IgesIndex(filename).global_section
+
+
+def test_parse_global_section_delimiters():
+    r"""Non default delimiters and Hollerith strings containing delimiters"""
+    global_section = parse_global_section("1H//1H#/5HA,B;C/4Hx.iG#")
+    assert global_section["parameter_delimiter"] == "/"
+    assert global_section["record_delimiter"] == "#"
+    assert global_section["sender_product_id"] == "A,B;C"
+    assert global_section["file_name"] == "x.iG"
+    assert global_section["version_flag"] == ""
+
+
+def test_read_global_section_in_memory():
+    r"""The Global section of in memory data"""
+    filename = path_from_file(__file__, "./models_in/2_boxes.igs")
+    with open(filename, "rb") as f:
+        assert read_global_section(f.read()) == read_global_section(filename)
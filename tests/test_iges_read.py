@@ -64,3 +64,55 @@ def test_iges_importer_2_boxes():
     topo = Topo(importer.compound)
     assert topo.number_of_faces() == 6 * 2
     assert topo.number_of_edges() == 24 * 2
+
+
+def test_iges_importer_iter_shapes():
+    r"""iter_shapes() yields the shapes one by one, without storing them"""
+    importer = IgesImporter(path_from_file(__file__, "./models_in/box.igs"), transfer=False)
+    shapes = list(importer.iter_shapes())
+    assert len(importer.shapes) == 0
+    assert sum(Topo(shape).number_of_faces() for shape in shapes) == 6
+
+
+def test_iges_importer_filters():
+    r"""Only the roots matching the levels and entity types filters are transferred"""
+    filename = path_from_file(__file__, "./models_in/box.igs")
+
+    importer = IgesImporter(filename, entity_types=[128, 144])
+    assert Topo(importer.compound).number_of_faces() == 6
+
+    importer = IgesImporter(filename, entity_types=[110])
+    assert len(importer.shapes) == 0
+
+    importer = IgesImporter(filename, levels=[1, 2, 3, 4, 5, 6], only_visible=True)
+    assert Topo(importer.compound).number_of_faces() == 6
+
+    importer = IgesImporter(filename, levels=[42])
+    assert len(importer.shapes) == 0
+
+
+def test_iges_importer_sew():
+    r"""The 6 faces of an iges box are sewn into a solid"""
+    importer = IgesImporter(path_from_file(__file__, "./models_in/box.igs"))
+    importer.sew()
+    topo = Topo(importer.compound)
+    assert topo.number_of_solids() == 1
+    assert topo.number_of_faces() == 6
+    assert topo.number_of_edges() == 12
+
+
+def test_iges_importer_sew_2_boxes_in_parallel():
+    r"""The 2 boxes are 2 components sewn in 2 processes"""
+    importer = IgesImporter(path_from_file(__file__, "./models_in/2_boxes.igs"))
+    importer.sew(processes=2)
+    assert len(importer.shapes) == 2
+    assert Topo(importer.compound).number_of_solids() == 2
+
+
+def test_iges_importer_in_memory():
+    r"""bytes give the same shapes as the path"""
+    filename = path_from_file(__file__, "./models_in/2_boxes.igs")
+    with open(filename, "rb") as f:
+        importer = IgesImporter(f.read())
+    assert len(importer.shapes) == len(IgesImporter(filename).shapes)
+    assert importer.version == IgesImporter(filename).version
@@ -128,3 +128,48 @@ def test_iges_exporter_overwrite(box_shape):
     importer = IgesImporter(filename)
     topo_compound = Topo(importer.compound)
     assert topo_compound.number_of_faces() == 6  # 6 from box
+
+
+def test_iges_exporter_unit(box_shape):
+    r"""The unit is written to the global section whatever the process wide write.iges.unit is"""
+    from OCC import Interface
+
+    filename = path_from_file(__file__, "./models_out/box.igs")
+    exporter = IgesExporter(filename, unit="M")
+    exporter.add_shape(box_shape)
+    global_unit = Interface.Interface_Static_CVal("write.iges.unit")
+    exporter.write_file()
+    assert Interface.Interface_Static_CVal("write.iges.unit") == global_unit
+
+    with open(filename) as f:
+        global_section = "".join(line[:72] for line in f if line[72:73] == "G")
+    assert "1HM" in global_section
+
+
+def test_iges_export_batch(box_shape):
+    r"""Batch export to individual files, with failing jobs"""
+    from OCCDataExchange.iges import export_batch
+
+    sphere = BRepPrimAPI.BRepPrimAPI_MakeSphere(10).Shape()
+    jobs = [(box_shape, path_from_file(__file__, "./models_out/box.igs")),
+            (TopoDS.TopoDS_Shape(), path_from_file(__file__, "./models_out/null.igs")),
+            (sphere, path_from_file(__file__, "./models_out/sphere.igs")),
+            (box_shape, path_from_file(__file__, "./nonexistent/box.igs"))]
+    for processes in [1, 2]:
+        results = export_batch(jobs, processes=processes)
+        assert [result.ok for result in results] == [True, False, True, False]
+        assert [result.filename for result in results] == [filename for _, filename in jobs]
+        assert results[1].error.startswith("ValueError")
+        assert results[3].error.startswith("AssertionError")
+        assert all(result.seconds >= 0 for result in results)
+        assert os.path.isfile(jobs[0][1]) and os.path.isfile(jobs[2][1])
+        assert not os.path.isfile(jobs[1][1])
+
+
+def test_iges_exporter_to_bytes(box_shape):
+    r"""An exporter without filename writes to bytes and streams"""
+    exporter = IgesExporter()
+    exporter.add_shape(box_shape)
+    with pytest.raises(AssertionError):
+        exporter.write_file()
+    assert len(IgesImporter(exporter.to_bytes()).shapes) > 0
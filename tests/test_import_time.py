@@ -0,0 +1,27 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Importing OCCDataExchange modules must not load OpenCascade"""
+
+import os.path
+import subprocess
+import sys
+
+import pytest
+
+
+@pytest.mark.parametrize("module", ["OCCDataExchange.checks",
+                                    "OCCDataExchange.registry",
+                                    "OCCDataExchange.utils",
+                                    "OCCDataExchange.dat",
+                                    "OCCDataExchange.brep",
+                                    "OCCDataExchange.stl",
+                                    "OCCDataExchange.step",
+                                    "OCCDataExchange.iges"])
+def test_no_occ_on_import(module):
+    r"""OCC modules are imported on first use, not when the OCCDataExchange module is imported"""
+    code = ("import sys; import %s; "
+            "loaded = [m for m in sys.modules if m.split('.')[0] in ('OCC', 'OCCUtils')]; "
+            "assert not loaded, loaded" % module)
+    subprocess.check_call([sys.executable, "-c", code],
+                          cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Isolated calls tests"""
+
+import os
+import sys
+import time
+
+import pytest
+
+from OCCDataExchange.brep import shape_from_string
+from OCCDataExchange.isolation import IsolatedCall, import_isolated, import_many, run_isolated, run_many
+from OCCDataExchange.utils import path_from_file
+
+
+def test_run_isolated_value():
+    r"""The value returned by the function is sent back"""
+    outcome = run_isolated(pow, (2, 10))
+    assert outcome.ok
+    assert outcome.value == 1024
+    assert outcome.error is None
+
+
+def test_run_isolated_exception():
+    r"""An exception raised in the child is reported as an error message"""
+    outcome = run_isolated(int, ("not an int",))
+    assert not outcome.ok
+    assert outcome.error.startswith("ValueError")
+
+
+def test_run_isolated_timeout():
+    r"""The child is killed when it runs over its time limit"""
+    start = time.time()
+    outcome = run_isolated(time.sleep, (30,), timeout=0.5)
+    assert not outcome.ok
+    assert "timeout" in outcome.error
+    assert time.time() - start < 10
+
+
+def test_run_isolated_crash():
+    r"""A child exiting without a result is reported"""
+    outcome = run_isolated(os._exit, (3,))
+    assert not outcome.ok
+    assert "code 3" in outcome.error
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="memory limits are POSIX only")
+def test_run_isolated_memory_limit():
+    r"""The child cannot allocate more than its memory limit"""
+    outcome = run_isolated(bytearray, (2 * 1024 ** 3,), max_memory=512 * 1024 ** 2)
+    assert not outcome.ok
+    assert "memory" in outcome.error
+
+
+def test_run_many():
+    r"""Calls run concurrently, at most workers at a time"""
+    start = time.time()
+    calls = list(run_many((IsolatedCall(time.sleep, (0.5,)) for _ in range(4)), workers=4))
+    assert len(calls) == 4
+    assert all(call.outcome.ok for call in calls)
+    assert time.time() - start < 1.9
+
+
+def _spin():
+    r"""Burn CPU time forever"""
+    while True:
+        pass
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="CPU time limits are POSIX only")
+def test_run_isolated_cpu_limit():
+    r"""The child is stopped when it exceeds its CPU time limit"""
+    outcome = run_isolated(_spin, max_cpu=1, timeout=30)
+    assert not outcome.ok
+    assert outcome.reason == "cpu"
+
+
+def test_outcome_reason():
+    r"""Failures are classified"""
+    assert run_isolated(pow, (2, 10)).reason is None
+    assert run_isolated(int, ("not an int",)).reason == "error"
+    assert run_isolated(time.sleep, (30,), timeout=0.5).reason == "timeout"
+    assert run_isolated(os._exit, (3,)).reason == "crash"
+
+
+def test_import_isolated_failure():
+    r"""A file that cannot be read is a failed outcome, not an exception"""
+    outcome = import_isolated("/nonexistent.stp", timeout=60)
+    assert not outcome.ok
+    assert outcome.reason == "error"
+
+
+def test_import_many():
+    r"""A batch proceeds past the files that fail"""
+    filenames = [path_from_file(__file__, "./models_in/box_203.stp"), "/nonexistent.stp"]
+    outcomes = dict(import_many(filenames, workers=2, timeout=60))
+    assert outcomes[filenames[0]].ok
+    assert shape_from_string(outcomes[filenames[0]].value).IsNull() is False
+    assert not outcomes[filenames[1]].ok
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Triangulation extraction tests"""
+
+import numpy as np
+from OCC import BRepPrimAPI
+from OCCUtils.Topology import Topo
+
+from OCCDataExchange.mesh import Prototypes, arrays_to_shape, mesh_shape, shape_to_arrays, triangulation_arrays, \
+    weld_vertices
+
+
+def test_triangulation_arrays_box():
+    r"""A box is triangulated in 12 triangles, 4 vertices per face"""
+    box = BRepPrimAPI.BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+    mesh_shape(box)
+    vertices, triangles = triangulation_arrays(box)
+    assert vertices.shape == (24, 3)
+    assert triangles.shape == (12, 3)
+    assert triangles.min() == 0
+    assert triangles.max() == 23
+    assert np.allclose(vertices.min(axis=0), [0, 0, 0])
+    assert np.allclose(vertices.max(axis=0), [10, 20, 30])
+
+
+def test_triangulation_arrays_orientation():
+    r"""Triangles are counterclockwise seen from outside : the signed volume of a closed mesh is positive"""
+    box = BRepPrimAPI.BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+    mesh_shape(box)
+    vertices, triangles = triangulation_arrays(box)
+    a, b, c = vertices[triangles[:, 0]], vertices[triangles[:, 1]], vertices[triangles[:, 2]]
+    volume = np.einsum("ij,ij->i", a, np.cross(b, c)).sum() / 6.
+    assert abs(volume - 6000.) < 1e-6
+
+
+def test_triangulation_arrays_not_meshed():
+    r"""Shapes that are not triangulated give empty arrays"""
+    vertices, triangles = triangulation_arrays(BRepPrimAPI.BRepPrimAPI_MakeBox(1, 1, 1).Shape())
+    assert vertices.shape == (0, 3)
+    assert triangles.shape == (0, 3)
+
+
+def test_weld_vertices():
+    r"""Duplicate vertices are merged and degenerate triangles dropped"""
+    vertices = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [1, 0, 0], [1, 1, 0]], dtype=np.float64)
+    triangles = np.array([[0, 1, 2], [3, 4, 2], [1, 3, 4]])
+    welded_vertices, welded_triangles = weld_vertices(vertices, triangles)
+    assert welded_vertices.shape == (4, 3)
+    assert welded_triangles.shape == (2, 3)
+    assert np.allclose(welded_vertices[welded_triangles], vertices[triangles[:2]])
+
+
+def test_shape_to_arrays_box():
+    r"""The welded mesh of a box has its 8 corners only"""
+    vertices, triangles = shape_to_arrays(BRepPrimAPI.BRepPrimAPI_MakeBox(10, 20, 30).Shape())
+    assert vertices.shape == (8, 3)
+    assert triangles.shape == (12, 3)
+
+
+def test_arrays_to_shape():
+    r"""Triangles sharing an edge share the edge in the shell"""
+    vertices = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [1, 1, 0]], dtype=np.float64)
+    shell = arrays_to_shape(vertices, np.array([[0, 1, 2], [1, 3, 2]]))
+    topo = Topo(shell)
+    assert topo.number_of_faces() == 2
+    assert topo.number_of_edges() == 5
+    assert topo.number_of_vertices() == 4
+
+
+def test_prototypes():
+    r"""Moved copies of a shape share its prototype, other shapes get their own"""
+    from OCC import TopLoc, gp
+
+    box = BRepPrimAPI.BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+    trsf = gp.gp_Trsf()
+    trsf.SetTranslation(gp.gp_Vec(100, 0, 0))
+    prototypes = Prototypes()
+    assert prototypes.add(box) == 0
+    assert prototypes.add(box.Moved(TopLoc.TopLoc_Location(trsf))) == 0
+    assert prototypes.add(BRepPrimAPI.BRepPrimAPI_MakeBox(1, 1, 1).Shape()) == 1
+    assert len(prototypes) == 2
+    assert prototypes[0].Location().IsIdentity()
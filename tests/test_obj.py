@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""OBJ files tests"""
+
+import glob
+import os.path
+
+import numpy as np
+import pytest
+from OCC import BRepPrimAPI
+
+from OCCDataExchange.obj import ObjExporter, ObjImporter, read_obj, write_obj
+from OCCDataExchange.utils import path_from_file
+
+
+@pytest.yield_fixture(autouse=True)
+def cleandir():
+    r"""Clean the tests output directory
+
+    autouse=True insure this fixture wraps every test function
+    yield represents the function call
+    """
+    yield  # represents the test function call
+    output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models_out")
+    files = glob.glob(output_dir + "\*")
+    print("Cleaning output directory ...")
+    for f in files:
+        os.remove(f)
+    print("Output directory clean")
+
+
+@pytest.fixture()
+def box_shape():
+    r"""Box shape for testing"""
+    return BRepPrimAPI.BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+
+
+def test_obj_exporter_wrong_extension():
+    r"""Trying to write a obj file with a wrong extension"""
+    with pytest.raises(AssertionError):
+        ObjExporter(path_from_file(__file__, "./models_out/box.stl"))
+
+
+def test_obj_arrays_round_trip():
+    r"""Vertices and triangles are read back as written"""
+    filename = path_from_file(__file__, "./models_out/square.obj")
+    vertices = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [1, 1, 0]], dtype=np.float64)
+    triangles = np.array([[0, 1, 2], [1, 3, 2]])
+    write_obj(filename, vertices, triangles)
+    read_vertices, read_triangles = read_obj(filename)
+    assert np.allclose(read_vertices, vertices)
+    assert read_triangles.tolist() == triangles.tolist()
+
+
+def test_obj_box_round_trip(box_shape):
+    r"""A box is written as an indexed mesh of its 8 corners"""
+    filename = path_from_file(__file__, "./models_out/box.obj")
+    exporter = ObjExporter(filename)
+    exporter.set_shape(box_shape)
+    exporter.write_file()
+
+    importer = ObjImporter(filename)
+    assert importer.vertices.shape == (8, 3)
+    assert importer.triangles.shape == (12, 3)
+    assert not importer.shape.IsNull()
+
+
+def test_obj_polygons_and_relative_indices():
+    r"""Quads are triangulated, v/vt/vn and negative indices are resolved"""
+    filename = path_from_file(__file__, "./models_out/quad.obj")
+    with open(filename, "w") as f:
+        f.write("v 0 0 0\nv 1 0 0\nv 1 1 0\nv 0 1 0\nvn 0 0 1\nf -4//1 -3//1 -2//1 -1//1\n")
+    vertices, triangles = read_obj(filename)
+    assert vertices.shape == (4, 3)
+    assert triangles.tolist() == [[0, 1, 2], [0, 2, 3]]
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""PLY files tests"""
+
+import glob
+import os.path
+
+import numpy as np
+import pytest
+from OCC import BRepPrimAPI
+
+from OCCDataExchange.ply import PlyExporter, PlyImporter, read_ply, write_ply
+from OCCDataExchange.utils import path_from_file
+
+
+@pytest.yield_fixture(autouse=True)
+def cleandir():
+    r"""Clean the tests output directory
+
+    autouse=True insure this fixture wraps every test function
+    yield represents the function call
+    """
+    yield  # represents the test function call
+    output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models_out")
+    files = glob.glob(output_dir + "\*")
+    print("Cleaning output directory ...")
+    for f in files:
+        os.remove(f)
+    print("Output directory clean")
+
+
+@pytest.fixture()
+def box_shape():
+    r"""Box shape for testing"""
+    return BRepPrimAPI.BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+
+
+def test_ply_exporter_wrong_extension():
+    r"""Trying to write a ply file with a wrong extension"""
+    with pytest.raises(AssertionError):
+        PlyExporter(path_from_file(__file__, "./models_out/box.stl"))
+
+
+def test_ply_arrays_round_trip():
+    r"""Vertices and triangles are read back as written"""
+    filename = path_from_file(__file__, "./models_out/square.ply")
+    vertices = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [1, 1, 0]], dtype=np.float64)
+    triangles = np.array([[0, 1, 2], [1, 3, 2]])
+    write_ply(filename, vertices, triangles)
+    read_vertices, read_triangles = read_ply(filename)
+    assert np.allclose(read_vertices, vertices)
+    assert read_triangles.tolist() == triangles.tolist()
+
+
+def test_ply_box_round_trip(box_shape):
+    r"""A box is written as an indexed mesh of its 8 corners"""
+    filename = path_from_file(__file__, "./models_out/box.ply")
+    exporter = PlyExporter(filename)
+    exporter.set_shape(box_shape)
+    exporter.write_file()
+
+    importer = PlyImporter(filename)
+    assert importer.vertices.shape == (8, 3)
+    assert importer.triangles.shape == (12, 3)
+    assert not importer.shape.IsNull()
+
+
+def test_ply_ascii_polygons():
+    r"""ascii PLY with an extra vertex property and a quad"""
+    filename = path_from_file(__file__, "./models_out/quad.ply")
+    with open(filename, "w") as f:
+        f.write("ply\nformat ascii 1.0\nelement vertex 4\nproperty float x\nproperty float y\nproperty float z\n"
+                "property uchar red\nelement face 1\nproperty list uchar int vertex_indices\nend_header\n"
+                "0 0 0 255\n1 0 0 255\n1 1 0 255\n0 1 0 255\n4 0 1 2 3\n")
+    vertices, triangles = read_ply(filename)
+    assert vertices.shape == (4, 3)
+    assert triangles.tolist() == [[0, 1, 2], [0, 2, 3]]
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Format registry tests"""
+
+import glob
+import os.path
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from OCCDataExchange import registry
+from OCCDataExchange.utils import path_from_file
+
+
+@pytest.yield_fixture(autouse=True)
+def cleandir():
+    r"""Clean the tests output directory
+
+    autouse=True insure this fixture wraps every test function
+    yield represents the function call
+    """
+    yield  # represents the test function call
+    output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models_out")
+    files = glob.glob(output_dir + "\*")
+    print("Cleaning output directory ...")
+    for f in files:
+        os.remove(f)
+    print("Output directory clean")
+
+
+@pytest.mark.parametrize("filename, format_name", [("2_boxes.igs", "iges"),
+                                                   ("aube_pleine.iges", "iges"),
+                                                   ("box_203.stp", "step"),
+                                                   ("box_214.stp", "step"),
+                                                   ("box_ascii.stl", "stl"),
+                                                   ("box_binary.stl", "stl"),
+                                                   ("2_boxes_binary.stl", "stl")])
+def test_sniff(filename, format_name):
+    r"""Formats are recognized from the file content"""
+    assert registry.sniff(path_from_file(__file__, "./models_in/%s" % filename)).name == format_name
+
+
+def test_sniff_unknown():
+    r"""Empty files and formats without sniffer are not recognized"""
+    assert registry.sniff(path_from_file(__file__, "./models_in/empty.stp")) is None
+    assert registry.sniff(path_from_file(__file__, "./models_in/naca0006.dat")) is None
+
+
+def test_detect_format_content_over_extension():
+    r"""An IGES file with a STEP extension is detected as IGES"""
+    filename = path_from_file(__file__, "./models_out/box_is_iges.stp")
+    shutil.copyfile(path_from_file(__file__, "./models_in/box.igs"), filename)
+    assert registry.detect_format(filename).name == "iges"
+
+
+def test_detect_format_extension_fallback():
+    r"""Files that are not recognized from their content fall back on their extension"""
+    assert registry.detect_format(path_from_file(__file__, "./models_in/naca0006.dat")).name == "dat"
+
+
+def test_get_format():
+    r"""Formats can be looked up by name or extension"""
+    assert registry.get_format("stp").name == "step"
+    assert registry.get_format(".IGS").name == "iges"
+    assert registry.get_format("step").importer == "OCCDataExchange.step:StepImporter"
+    with pytest.raises(ValueError):
+        registry.get_format("unknown")
+    with pytest.raises(ValueError):
+        registry.get_format("dat").exporter_class
+
+
+def test_register():
+    r"""A format registered later takes precedence"""
+    custom = registry.Format("custom_stl", ["stl"], sniffer=lambda head, size: head.startswith(b"CUSTOM"))
+    registry.register(custom)
+    try:
+        assert registry.get_format("stl") is custom
+        assert registry.get_format("custom_stl") is custom
+    finally:
+        registry._formats.remove(custom)
+    assert registry.get_format("stl").name == "stl"
+
+
+_preloaded = list()
+
+
+class _Importer(object):
+    r"""Importer and exporter of the format in test_preload()"""
+
+
+def preload():
+    r"""Module preload function, called by Format.preload()"""
+    _preloaded.append(__name__)
+
+
+def test_preload():
+    r"""Preloading a format calls the preload() function of its module, once for the importer and the exporter"""
+    a_format = registry.Format("preloaded", ["preloaded"], importer="%s:_Importer" % __name__,
+                               exporter="%s:_Importer" % __name__)
+    del _preloaded[:]
+    a_format.preload()
+    assert _preloaded == [__name__]
+    registry.get_format("dat").preload()  # the dat module has no preload()
+
+
+def test_lazy_import():
+    r"""Looking up formats does not import the format modules"""
+    code = ("import sys; from OCCDataExchange import registry; registry.get_format('step'); "
+            "assert 'OCCDataExchange.step' not in sys.modules; assert 'OCC' not in sys.modules")
+    subprocess.check_call([sys.executable, "-c", code],
+                          cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_sniff_in_memory():
+    r"""Formats are recognized from in memory data"""
+    with open(path_from_file(__file__, "./models_in/box_binary.stl"), "rb") as f:
+        assert registry.sniff(f.read()).name == "stl"
+    assert registry.sniff(bytearray(b"ISO-10303-21;\nHEADER;")).name == "step"
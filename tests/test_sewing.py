@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""sewing.py module tests"""
+
+import numpy as np
+
+from OCCDataExchange.sewing import connected_components
+
+
+def test_connected_components_plates():
+    r"""2 plates of 10 x 10 square faces are 2 components"""
+    points, owners = list(), list()
+    nb_faces = 0
+    for x_offset in [0., 100.]:
+        for i in range(10):
+            for j in range(10):
+                for dx, dy in [(0, 0), (1, 0), (1, 1), (0, 1)]:
+                    points.append((x_offset + i + dx, j + dy + 1e-8 * (i % 2), 0.))
+                    owners.append(nb_faces)
+                nb_faces += 1
+    labels = connected_components(np.array(points), np.array(owners), nb_faces, 1e-6)
+    assert labels.tolist() == [0] * 100 + [1] * 100
+
+
+def test_connected_components_tolerance():
+    r"""Points further apart than a few tolerances are not connected"""
+    points = np.array([[0., 0., 0.], [1e-7, 0., 0.], [1., 0., 0.]])
+    labels = connected_components(points, np.array([0, 1, 2]), 3, 1e-6)
+    assert labels.tolist() == [0, 0, 1]
+
+
+def test_connected_components_no_points():
+    r"""Owners without points are components of their own"""
+    labels = connected_components(np.zeros((0, 3)), np.zeros(0, dtype=np.int64), 2, 1e-6)
+    assert labels.tolist() == [0, 1]
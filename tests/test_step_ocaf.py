@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""STEP with colors and layers (OCAF) tests"""
+
+import glob
+import os.path
+
+import pytest
+from OCC import BRepPrimAPI
+from OCC import TCollection
+from OCC import TDF
+from OCC import TopAbs
+from OCC import TopLoc
+from OCC import TopoDS
+from OCC import gp
+
+from OCCDataExchange.step_ocaf import AssemblyTable, StepOcafExporter, StepOcafImporter, _extended_string_to_str
+from OCCDataExchange.utils import path_from_file
+
+
+@pytest.yield_fixture(autouse=True)
+def cleandir():
+    r"""Clean the tests output directory
+
+    autouse=True insure this fixture wraps every test function
+    yield represents the function call
+    """
+    yield  # represents the test function call
+    output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models_out")
+    files = glob.glob(output_dir + "\*")
+    print("Cleaning output directory ...")
+    for f in files:
+        os.remove(f)
+    print("Output directory clean")
+
+
+@pytest.fixture()
+def box_shape():
+    r"""Box shape for testing"""
+    return BRepPrimAPI.BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+
+
+def test_assembly_table(box_shape):
+    r"""Rows, string tables, instances and NumPy export of an AssemblyTable"""
+    table = AssemblyTable()
+    box = table.add_prototype(box_shape)
+    translation = gp.gp_Trsf()
+    translation.SetTranslation(gp.gp_Vec(100, 0, 0))
+
+    assert table.add("0:1:1:1", "assembly", -1, TopLoc.TopLoc_Location(translation), layers=["boxes"]) == 0
+    assert table.add("0:1:1:1:1", "box", box, TopLoc.TopLoc_Location(), 0, rgb=(1., 0., 0.),
+                     layers=["red", "boxes"]) == 1
+    assert table.add("0:1:1:1:2", "box", box, TopLoc.TopLoc_Location(translation), 0, layers=["red"],
+                     material="steel") == 2
+
+    assert len(table) == 3
+    assert len(table.prototypes) == 1
+    assert table.is_assembly(0)
+    assert table.shape(0) is None
+    assert table.parent(2) == 0
+    assert table.prototype(2) == box
+    assert table.rgb(1) == (1., 0., 0.)
+    assert table.rgb(2) is None
+    assert table.layers(1) == ["red", "boxes"]
+    assert table.layers(2) == ["red"]
+    assert table.layer_names == ["boxes", "red"]
+    assert table.material(1) is None
+    assert table.material(2) == "steel"
+    assert table.shape_type(0) == TopAbs.TopAbs_COMPOUND
+    assert table.shape_type(1) == TopAbs.TopAbs_SOLID
+
+    # instances share the prototype geometry, locations are composed with the parents'
+    assert table.shape(1).IsPartner(table.shape(2))
+    assert table.absolute_location(2).Transformation().TranslationPart().X() == 200.
+
+    columns = table.to_numpy()
+    assert columns["rgb"].shape == (3, 3)
+    assert columns["rgb"].dtype.name == "float32"
+    assert columns["parent"].tolist() == [-1, 0, 0]
+    assert columns["prototype"].tolist() == [-1, 0, 0]
+    assert columns["location"].shape == (3, 3, 4)
+    assert columns["location"][2, 0, 3] == 100.
+    assert columns["layer_offsets"].tolist() == [0, 1, 3, 4]
+    assert columns["layer_ids"].tolist() == [0, 1, 0, 1]
+    assert columns["material"].tolist() == [-1, -1, 0]
+    assert columns["entry"].tolist() == ["0:1:1:1", "0:1:1:1:1", "0:1:1:1:2"]
+
+
+def test_extended_string_to_str():
+    r"""TCollection_ExtendedString conversion"""
+    assert _extended_string_to_str(TCollection.TCollection_ExtendedString("layer-00")) == "layer-00"
+    assert _extended_string_to_str(TCollection.TCollection_ExtendedString("")) == ""
+
+
+def test_step_ocaf_round_trip(box_shape):
+    r"""Colors and layers written by StepOcafExporter are read back aligned with the shapes"""
+    filename = path_from_file(__file__, "./models_out/box_ocaf.stp")
+    sphere = BRepPrimAPI.BRepPrimAPI_MakeSphere(10).Shape()
+
+    exporter = StepOcafExporter(filename)
+    exporter.add_shape(box_shape, color=(1, 0, 0), layer="red")
+    exporter.add_shape(sphere, color=(0, 1, 0), layer="green")
+    exporter.write_file()
+
+    importer = StepOcafImporter(filename)
+    assert len(importer.shapes) == len(importer.colors) == len(importer.layers) == 2
+    assert sorted(importer.layers_str) == ["green", "red"]
+    assert len(importer.table.prototypes) == 2
+    for i in range(len(importer.table)):
+        assert importer.table.shape_type(i) in (TopAbs.TopAbs_SOLID, TopAbs.TopAbs_COMPOUND)
+
+
+def test_step_ocaf_add_shapes():
+    r"""Shapes added in bulk share their colors and layers"""
+    filename = path_from_file(__file__, "./models_out/boxes_ocaf.stp")
+    boxes = [BRepPrimAPI.BRepPrimAPI_MakeBox(gp.gp_Pnt(20 * i, 0, 0), 10, 10, 10).Shape() for i in range(4)]
+
+    exporter = StepOcafExporter(filename)
+    labels = exporter.add_shapes(boxes,
+                                 colors=[(1, 0, 0), (0, 1, 0), (1, 0, 0), (1, 0, 0)],
+                                 layers=["red", "green", "red", "red"])
+    assert len(labels) == 4
+    assert len(exporter._color_labels) == 2
+    assert sorted(exporter.layer_names) == ["green", "red"]
+    exporter.write_file()
+
+    importer = StepOcafImporter(filename)
+    assert len(importer.shapes) == 4
+    assert sorted(importer.layers_str) == ["green", "red", "red", "red"]
+
+
+def test_step_ocaf_add_shapes_wrong_colors(box_shape):
+    r"""The colors array must have one row per shape"""
+    exporter = StepOcafExporter(path_from_file(__file__, "./models_out/box_ocaf.stp"))
+    with pytest.raises(ValueError):
+        exporter.add_shapes([box_shape, box_shape], colors=[(1, 0, 0)])
+    with pytest.raises(ValueError):
+        exporter.add_shapes([box_shape], layers=["a", "b"])
+
+
+def test_step_ocaf_add_shapes_invalid_shape(box_shape):
+    r"""An invalid shape is detected before the document is changed : no shape, color or layer is added"""
+    def nb_free_shapes(exporter):
+        free_shapes = TDF.TDF_LabelSequence()
+        exporter.shape_tool.GetFreeShapes(free_shapes)
+        return free_shapes.Length()
+
+    exporter = StepOcafExporter(path_from_file(__file__, "./models_out/box_ocaf.stp"))
+    nb_shapes = nb_free_shapes(exporter)
+    with pytest.raises(ValueError):
+        exporter.add_shapes([box_shape, TopoDS.TopoDS_Shape()], colors=[(1, 0, 0), (0, 1, 0)], layers=["a", "b"])
+    assert exporter._color_labels == {}
+    assert exporter.layer_names == {}
+    assert nb_free_shapes(exporter) == nb_shapes
+
+
+def test_step_ocaf_cache(box_shape):
+    r"""The second import of a STEP file is loaded from the OCAF binary cache"""
+    filename = path_from_file(__file__, "./models_out/box_ocaf.stp")
+    cache_filename = path_from_file(__file__, "./models_out/box_ocaf.xbf")
+
+    exporter = StepOcafExporter(filename)
+    exporter.add_shape(box_shape, color=(1, 0, 0), layer="red")
+    exporter.write_file()
+
+    translated = StepOcafImporter(filename, cache_filename=cache_filename)
+    assert os.path.isfile(cache_filename)
+
+    cached = StepOcafImporter(filename, cache_filename=cache_filename)
+    assert cached.cache_is_fresh
+    assert len(cached.table) == len(translated.table)
+    assert cached.layers_str == translated.layers_str == ["red"]
+
+
+def test_step_ocaf_cache_failures(box_shape):
+    r"""A cache that cannot be loaded is replaced, a cache that cannot be saved does not stop the import"""
+    filename = path_from_file(__file__, "./models_out/box_ocaf_cache.stp")
+    cache_filename = path_from_file(__file__, "./models_out/box_ocaf_cache.xbf")
+
+    exporter = StepOcafExporter(filename)
+    exporter.add_shape(box_shape, color=(1, 0, 0), layer="red")
+    exporter.write_file()
+
+    with open(cache_filename, "wb") as f:
+        f.write(b"not a document")
+    assert StepOcafImporter(filename, cache_filename=cache_filename).layers_str == ["red"]
+    assert StepOcafImporter(filename, cache_filename=cache_filename).layers_str == ["red"]  # from the new cache
+    assert glob.glob(cache_filename + ".*") == []  # no temporary file left
+
+    importer = StepOcafImporter(filename, cache_filename=path_from_file(__file__, "./nonexistent/box.xbf"))
+    assert importer.layers_str == ["red"]
+
+
+def test_step_ocaf_cache_wrong_extension():
+    r"""The cache must be a .xbf file"""
+    with pytest.raises(AssertionError):
+        StepOcafImporter(path_from_file(__file__, "./models_in/box_203.stp"),
+                         cache_filename=path_from_file(__file__, "./models_out/box.stp"))
+
+
+def test_step_ocaf_to_bytes(box_shape):
+    r"""The OCAF exporter writes to bytes without a filename"""
+    exporter = StepOcafExporter()
+    exporter.add_shape(box_shape, color=(1, 0, 0), layer="box")
+    with pytest.raises(AssertionError):
+        exporter.write_file()
+    assert exporter.to_bytes().startswith(b"ISO-10303-21")
@@ -72,3 +72,37 @@ def test_step_importer_2_boxes():
     assert topo.number_of_comp_solids() == 0
     assert topo.number_of_solids() == 2
     assert topo.number_of_shells() == 2
+
+
+def test_step_importer_iter_shapes():
+    r"""iter_shapes() yields the same shapes as read_file(), without storing them"""
+    filename = path_from_file(__file__, "./models_in/2_boxes_203.stp")
+    importer = StepImporter(filename, transfer=False)
+    assert len(importer.shapes) == 0
+
+    shapes = list(importer.iter_shapes())
+    assert len(importer.shapes) == 0
+    assert len(shapes) == len(StepImporter(filename).shapes) == 1
+    assert Topo(shapes[0]).number_of_solids() == 2
+
+
+def test_step_importer_cached_compound():
+    r"""The compound is cached until the shapes list is modified"""
+    importer = StepImporter(path_from_file(__file__, "./models_in/2_boxes_203.stp"))
+    compound = importer.compound
+    assert importer.compound is compound
+
+    importer.shapes.append(importer.shapes[0])
+    assert importer.compound is not compound
+    assert importer.compound is importer.compound
+
+
+def test_step_importer_in_memory():
+    r"""bytes, memoryview and file objects give the same shapes as the path"""
+    filename = path_from_file(__file__, "./models_in/2_boxes_203.stp")
+    with open(filename, "rb") as f:
+        data = f.read()
+    with open(filename, "rb") as f:
+        from_file_object = StepImporter(f)
+    for importer in (StepImporter(data), StepImporter(memoryview(data)), from_file_object):
+        assert len(importer.shapes) == len(StepImporter(filename).shapes)
@@ -134,3 +134,40 @@ def test_step_exporter_overwrite(box_shape):
     importer = StepImporter(filename)
     assert len([i for i in Topo(importer.compound).faces()]) == 6  # 6 from box
     assert len([i for i in Topo(importer.compound).solids()]) == 1
+
+
+def test_step_exporter_interleaved_schemas(box_shape):
+    r"""Exporters with different schemas used in the same process do not see each other's schema"""
+    from OCC import Interface
+
+    global_schema = Interface.Interface_Static_CVal("write.step.schema")
+
+    filename_203 = path_from_file(__file__, "./models_out/box_203.stp")
+    filename_214 = path_from_file(__file__, "./models_out/box_214.stp")
+    exporter_203 = StepExporter(filename_203, schema="AP203")
+    exporter_214 = StepExporter(filename_214, schema="AP214CD")
+    exporter_203.add_shape(box_shape)
+    exporter_214.add_shape(box_shape)
+
+    exporter_214.write_file()
+    exporter_203.write_file()
+    exporter_214.write_file()
+
+    with open(filename_203) as f:
+        assert "CONFIG_CONTROL_DESIGN" in f.read()
+    with open(filename_214) as f:
+        assert "AUTOMOTIVE_DESIGN" in f.read()
+
+    # the process wide parameter is left untouched
+    assert Interface.Interface_Static_CVal("write.step.schema") == global_schema
+
+
+def test_step_exporter_to_bytes(box_shape):
+    r"""An exporter without filename writes to bytes and streams"""
+    exporter = StepExporter()
+    exporter.add_shape(box_shape)
+    with pytest.raises(AssertionError):
+        exporter.write_file()
+    data = exporter.to_bytes()
+    assert data.startswith(b"ISO-10303-21")
+    assert len(StepImporter(data).shapes) == 1
@@ -9,7 +9,7 @@ import pytest
 from OCC import TopoDS
 from OCCUtils.Topology import Topo
 
-from OCCDataExchange.stl import StlImporter
+from OCCDataExchange.stl import StlImporter, read_stl
 from OCCDataExchange.utils import path_from_file
 
 logging.basicConfig(level=logging.DEBUG,
@@ -93,3 +93,17 @@ def test_stl_importer_2_boxes():
     assert topo.number_of_edges() == 162 * 2
 
 
+@pytest.mark.parametrize("filename", ["box_ascii.stl", "box_binary.stl"])
+def test_read_stl_in_memory(filename):
+    r"""The triangles of an in memory STL file, with shared vertices"""
+    with open(path_from_file(__file__, "./models_in/%s" % filename), "rb") as f:
+        vertices, triangles = read_stl(memoryview(f.read()))
+    assert vertices.shape == (8, 3)
+    assert triangles.shape == (12, 3)
+
+
+def test_stl_importer_bytes():
+    r"""The STL importer reads bytes without going through the disk"""
+    with open(path_from_file(__file__, "./models_in/box_binary.stl"), "rb") as f:
+        importer = StlImporter(f.read())
+    assert len([face for face in Topo(importer.shape).faces()]) == 12
@@ -3,6 +3,9 @@
 
 r"""STL file writing tests"""
 
+import io
+
+import numpy as np
 import pytest
 import os.path
 import glob
@@ -14,7 +17,7 @@ from OCC import TopoDS
 from OCCUtils.Topology import Topo
 from OCCUtils.types_lut import ShapeToTopology
 
-from OCCDataExchange.stl import StlExporter, StlImporter
+from OCCDataExchange.stl import StlExporter, StlImporter, read_stl, write_stl
 from OCCDataExchange.utils import path_from_file
 
 logging.basicConfig(level=logging.DEBUG,
@@ -125,3 +128,38 @@ def test_stl_exporter_overwrite(box_shape):
     importer = StlImporter(filename)
     topo = Topo(importer.shape)
     assert topo.number_of_shells() == 1
+
+
+@pytest.mark.parametrize("ascii_mode", [False, True])
+def test_stl_exporter_to_bytes(box_shape, ascii_mode):
+    r"""The STL written to bytes, without going through the disk, is the box mesh"""
+    exporter = StlExporter(ascii_mode=ascii_mode)
+    exporter.set_shape(box_shape)
+    with pytest.raises(AssertionError):
+        exporter.write_file()
+    vertices, triangles = read_stl(exporter.to_bytes())
+    assert vertices.shape == (8, 3)
+    assert triangles.shape == (12, 3)
+
+
+def test_write_stl_read_stl():
+    r"""write_stl() then read_stl() gives back the triangles"""
+    vertices = np.array([[0., 0., 0.], [1., 0., 0.], [0., 1., 0.], [1., 1., 0.]])
+    triangles = np.array([[0, 1, 2], [1, 3, 2]])
+    for ascii_mode in (False, True):
+        stream = io.BytesIO()
+        write_stl(stream, vertices, triangles, ascii_mode)
+        read_vertices, read_triangles = read_stl(stream.getvalue())
+        assert np.allclose(np.sort(read_vertices[read_triangles].reshape(-1, 3), axis=0),
+                           np.sort(vertices[triangles].reshape(-1, 3), axis=0))
+
+
+def test_stl_exporter_gzip_round_trip(box_shape):
+    r"""A .stl.gz file is written compressed and read back by the STL importer"""
+    filename = path_from_file(__file__, "./models_out/box.stl.gz")
+    exporter = StlExporter(filename)
+    exporter.set_shape(box_shape)
+    exporter.write_file()
+    with open(filename, "rb") as f:
+        assert f.read(2) == b"\x1f\x8b"
+    assert len(list(Topo(StlImporter(filename).shape).faces())) == 12
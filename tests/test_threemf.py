@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""3MF export tests"""
+
+import glob
+import os.path
+import xml.etree.ElementTree as ElementTree
+import zipfile
+
+import pytest
+from OCC import BRepPrimAPI
+from OCC import TopLoc
+from OCC import gp
+
+from OCCDataExchange.threemf import ThreeMfExporter
+from OCCDataExchange.utils import path_from_file
+
+_NAMESPACE = "{http://schemas.microsoft.com/3dmanufacturing/core/2015/02}"
+
+
+@pytest.yield_fixture(autouse=True)
+def cleandir():
+    r"""Clean the tests output directory
+
+    autouse=True insure this fixture wraps every test function
+    yield represents the function call
+    """
+    yield  # represents the test function call
+    output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models_out")
+    files = glob.glob(output_dir + "\*")
+    print("Cleaning output directory ...")
+    for f in files:
+        os.remove(f)
+    print("Output directory clean")
+
+
+@pytest.fixture()
+def box_shape():
+    r"""Box shape for testing"""
+    return BRepPrimAPI.BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+
+
+def test_threemf_exporter_wrong_extension():
+    r"""Trying to write a 3mf file with a wrong extension"""
+    with pytest.raises(AssertionError):
+        ThreeMfExporter(path_from_file(__file__, "./models_out/box.stl"))
+
+
+def test_threemf_exporter_wrong_unit():
+    r"""Unknown unit"""
+    with pytest.raises(AssertionError):
+        ThreeMfExporter(path_from_file(__file__, "./models_out/box.3mf"), unit="parsec")
+
+
+def test_threemf_instances(box_shape):
+    r"""Instances of a solid share a single object"""
+    filename = path_from_file(__file__, "./models_out/boxes.3mf")
+    translation = gp.gp_Trsf()
+    translation.SetTranslation(gp.gp_Vec(100, 0, 0))
+    sphere = BRepPrimAPI.BRepPrimAPI_MakeSphere(10).Shape()
+
+    exporter = ThreeMfExporter(filename)
+    exporter.add_shape(box_shape, rgb=(1., 0., 0.), name="box")
+    exporter.add_shape(box_shape.Located(TopLoc.TopLoc_Location(translation)), rgb=(1., 0., 0.), name="box")
+    exporter.add_shape(sphere, rgb=(0., 1., 0.))
+    exporter.write_file()
+
+    with zipfile.ZipFile(filename) as package:
+        assert "[Content_Types].xml" in package.namelist()
+        assert "_rels/.rels" in package.namelist()
+        model = ElementTree.fromstring(package.read("3D/3dmodel.model"))
+
+    objects = model.findall("%sresources/%sobject" % (_NAMESPACE, _NAMESPACE))
+    items = model.findall("%sbuild/%sitem" % (_NAMESPACE, _NAMESPACE))
+    assert len(objects) == 2
+    assert len(items) == 3
+    assert len(model.findall("%sresources/%sbasematerials/%sbase" % (_NAMESPACE, _NAMESPACE, _NAMESPACE))) == 2
+    assert items[0].get("objectid") == items[1].get("objectid")
+    assert items[1].get("transform").split()[9] == "100"
+    box_vertices = objects[0].findall("%smesh/%svertices/%svertex" % (_NAMESPACE, _NAMESPACE, _NAMESPACE))
+    assert len(box_vertices) == 8
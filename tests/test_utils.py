@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""utils.py module tests"""
+
+from OCCDataExchange.utils import ShapeList, extract_file_extension
+
+
+def test_extract_file_extension():
+    r"""extract_file_extension() tests"""
+    assert extract_file_extension("/tmp/box.StP") == "StP"
+    assert extract_file_extension("/tmp.d/box") == ""
+
+
+def test_shape_list_version():
+    r"""Every modification of a ShapeList changes its version"""
+    shapes = ShapeList([1, 2, 3])
+    assert isinstance(shapes, list)
+
+    versions = [shapes.version]
+    for modification in [lambda l: l.append(4),
+                         lambda l: l.extend([5]),
+                         lambda l: l.insert(0, 6),
+                         lambda l: l.remove(6),
+                         lambda l: l.pop(),
+                         lambda l: l.__setitem__(0, 7),
+                         lambda l: l.__delitem__(0),
+                         lambda l: l.__iadd__([8]),
+                         lambda l: l.sort(),
+                         lambda l: l.reverse()]:
+        modification(shapes)
+        assert shapes.version not in versions
+        versions.append(shapes.version)
+
+    # reading does not change the version
+    _ = shapes[0], len(shapes), list(shapes)
+    assert shapes.version == versions[-1]